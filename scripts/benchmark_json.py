@@ -0,0 +1,79 @@
+""" Compare the JSON backends when rendering the content of a large wall, like /api/1/walls/{rid}/content does.
+
+    Usage: python scripts/benchmark_json.py [collections] [cards per collection] [rounds]
+"""
+import sys
+from timeit import repeat
+
+from pyramid import testing
+from pyramid.request import apply_request_extensions
+
+from kedja.models.json import JSON_BACKENDS
+from kedja.models.json import json_dumps_factory
+
+
+def make_wall(collections, cards):
+    from kedja.resources.card import Card
+    from kedja.resources.collection import Collection
+    from kedja.resources.root import Root
+    from kedja.resources.wall import Wall
+    root = Root()
+    root['wall'] = wall = Wall(rid=2, title="Benchmark")
+    rid = 10
+    for i in range(collections):
+        rid += 1
+        wall[str(rid)] = collection = Collection(rid=rid, title="Collection %s" % i)
+        for j in range(cards):
+            rid += 1
+            collection[str(rid)] = Card(rid=rid, title="Card %s in collection %s" % (j, i), int_indicator=j)
+    return wall
+
+
+def get_content(wall):
+    results = {}
+    for collection in wall.values():
+        results[collection.rid] = collection
+        for card in collection.values():
+            results[card.rid] = card
+    return {'resources': results}
+
+
+def benchmark(backend, collections, cards, rounds):
+    config = testing.setUp(settings={'kedja.json_backend': backend})
+    try:
+        config.include('kedja.testing.minimal')
+        config.include('kedja.resources')
+        config.include('kedja.models.json')
+        request = testing.DummyRequest()
+        apply_request_extensions(request)
+        config.begin(request)
+        content = get_content(make_wall(collections, cards))
+        dumps = json_dumps_factory(request)
+        size = len(dumps(content))
+        timings = repeat(lambda: dumps(content), number=1, repeat=rounds)
+        return min(timings), size
+    finally:
+        testing.tearDown()
+
+
+def main(argv=sys.argv):
+    args = [20, 500, 5]
+    for (i, value) in enumerate(argv[1:4]):
+        args[i] = int(value)
+    collections, cards, rounds = args
+    print("%s collections with %s cards each, best of %s" % (collections, cards, rounds))
+    baseline = None
+    for backend in reversed(JSON_BACKENDS):
+        try:
+            __import__(backend)
+        except ImportError:
+            print("%-8s not installed" % backend)
+            continue
+        best, size = benchmark(backend, collections, cards, rounds)
+        if baseline is None:
+            baseline = best
+        print("%-8s %8.1f ms  %5.2fx  %s bytes" % (backend, best * 1000, baseline / best, size))
+
+
+if __name__ == '__main__':
+    main()
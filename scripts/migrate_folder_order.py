@@ -0,0 +1,37 @@
+from pyramid.paster import bootstrap
+
+from kedja.core.folder import Folder
+from kedja.core.ordering import FolderOrder
+
+
+def convert(folder):
+    """ Convert tuple-based ordering to FolderOrder, and drop empty FolderOrders since an empty tuple is enough.
+        Returns number of converted folders.
+    """
+    count = 0
+    order = getattr(folder, '_order', None)
+    if isinstance(order, tuple) and order:
+        folder._get_order()
+        count += 1
+    elif isinstance(order, FolderOrder) and not len(order):
+        folder._order = ()
+        count += 1
+    if '_order_rids' in folder.__dict__ and not isinstance(folder._order, tuple):
+        del folder._order_rids
+    for obj in folder.data.values():
+        if isinstance(obj, Folder):
+            count += convert(obj)
+    return count
+
+
+def migrate(root):
+    count = convert(root)
+    print("Converted ordering of %s folders" % count)
+
+
+if __name__ == '__main__':
+    with bootstrap('etc/development.ini') as env:
+        request = env['request']
+        request.tm.begin()
+        migrate(env['root'])
+        request.tm.commit()
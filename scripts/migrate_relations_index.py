@@ -0,0 +1,24 @@
+from pyramid.paster import bootstrap
+
+from kedja.interfaces import IWall
+
+
+def migrate(root):
+    """ Rebuild the relation indexes: integer sets per rid, and the duplicate check index.
+        Relations with the same members as another one are removed, since they can't be saved anymore.
+    """
+    for obj in root.values():
+        if IWall.providedBy(obj):
+            duplicates = obj.relations_map.merge_duplicates()
+            for (relation_id, kept) in sorted(duplicates.items()):
+                print("Wall %s: removed relation %s, it has the same members as %s" % (obj.rid, relation_id, kept))
+            count = obj.relations_map.rebuild_index()
+            print("Rebuilt index with %s relations for wall %s" % (count, obj.rid))
+
+
+if __name__ == '__main__':
+    with bootstrap('etc/development.ini') as env:
+        request = env['request']
+        request.tm.begin()
+        migrate(env['root'])
+        request.tm.commit()
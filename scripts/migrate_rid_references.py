@@ -0,0 +1,14 @@
+from pyramid.paster import bootstrap
+
+
+def migrate(root):
+    count = root.rid_map.build_references()
+    print("Stored %s resource references" % count)
+
+
+if __name__ == '__main__':
+    with bootstrap('etc/development.ini') as env:
+        request = env['request']
+        request.tm.begin()
+        migrate(env['root'])
+        request.tm.commit()
@@ -0,0 +1,18 @@
+from pyramid.paster import bootstrap
+
+from kedja.models.catalog import reindex_root
+from kedja.models.memberships import reindex_memberships
+
+
+def migrate(root):
+    """ Build the instance-wide search index and the index of which walls users have roles in. """
+    print("Indexed %s resources for search" % reindex_root(root))
+    print("Indexed walls for %s users" % reindex_memberships(root))
+
+
+if __name__ == '__main__':
+    with bootstrap('etc/development.ini') as env:
+        request = env['request']
+        request.tm.begin()
+        migrate(env['root'])
+        request.tm.commit()
@@ -0,0 +1,20 @@
+from pyramid.paster import bootstrap
+
+from kedja.interfaces import IWall
+from kedja.models.catalog import reindex_wall
+
+
+def migrate(root):
+    """ Index cards and collections in walls created before the wall catalog existed. """
+    for obj in root.values():
+        if IWall.providedBy(obj):
+            count = reindex_wall(obj)
+            print("Indexed %s resources in wall %s" % (count, obj.rid))
+
+
+if __name__ == '__main__':
+    with bootstrap('etc/development.ini') as env:
+        request = env['request']
+        request.tm.begin()
+        migrate(env['root'])
+        request.tm.commit()
@@ -0,0 +1,22 @@
+from pyramid.paster import bootstrap
+
+from kedja.interfaces import IWall
+from kedja.models.changes import get_change_log
+
+
+def migrate(root):
+    """ Walls created before change tracking existed don't have a change log,
+        and don't know about relation changes.
+    """
+    for obj in root.values():
+        if IWall.providedBy(obj):
+            get_change_log(obj)
+            obj.relations_map.__parent__ = obj
+
+
+if __name__ == '__main__':
+    with bootstrap('etc/development.ini') as env:
+        request = env['request']
+        request.tm.begin()
+        migrate(env['root'])
+        request.tm.commit()
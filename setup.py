@@ -60,6 +60,8 @@ setup(
     zip_safe=False,
     extras_require={
         'testing': tests_require,
+        'json': ['orjson'],
+        'export': ['msgpack', 'zstandard'],
     },
     install_requires=requires,
     entry_points={
@@ -46,6 +46,7 @@ def includeme(config):
 
     kedja_redis = settings['kedja.redis_url']
     settings.setdefault('redis.sessions.url', kedja_redis)
+    settings.setdefault('redis.sessions.redis_client_callable', 'kedja.utils.session_redis_client')
 
     # Pyramid/Pylons
     config.include('pyramid_tm')
@@ -2,12 +2,18 @@ import BTrees
 from BTrees.Length import Length
 from persistent import Persistent
 from pyramid.threadlocal import get_current_registry
+from pyramid.location import lineage
+from pyramid.traversal import resource_path_tuple
 from zope.interface import implementer
 from zope.copy import copy
 
 from kedja.core import get_rid_map
+from kedja.core.ordering import FolderOrder
 from kedja.events import ResourceWillBeAdded, ResourceRemoved, ResourceWillBeRemoved
 from kedja.events import ResourceAdded
+from kedja.events import ResourceUpdated
+from kedja.events import ResourceMoved
+from kedja.events import ResourceWillBeMoved
 from kedja.resources.mixins import ResourceMixin
 from kedja.interfaces import IFolder
 
@@ -25,8 +31,9 @@ class Folder(Persistent, ResourceMixin):
     __name__ = None
     __parent__ = None
     # Default uses ordering of underlying BTree.
-    _order = None  # tuple of names
-    _order_rids = None  # tuple of rids
+    # FolderOrder with names and rids. An empty tuple when ordering is enabled but nothing has been added yet,
+    # so empty folders don't need any extra persistent objects. See _get_order.
+    _order = None
 
     def __init__(self, appstruct=_MARKER, **kw):
         self.data = BTrees.family64.OO.BTree()
@@ -46,29 +53,44 @@ class Folder(Persistent, ResourceMixin):
         nameset = set(names)
         if len(names) != len(nameset):
             raise ValueError("No repeated items allowed in names")
-        if nameset != set(self.keys()):
+        if nameset != set(self.data.keys()):
             raise ValueError("Must specify all names when calling set_order")
 
-        order = []
-        order_rids = []
-
+        items = []
         for name in names:
             assert isinstance(name, str)
-            order.append(name)
             rid = self[name].rid
             assert rid, "Must not be falsy"
-            order_rids.append(rid)
+            items.append((name, rid))
+
+        self._order = _new_order(items)
 
-        self._order = tuple(order)
-        self._order_rids = tuple(order_rids)
+    def _order_items(self):
+        """ (name, rid) in order.
+
+        Folders saved before FolderOrder existed have a tuple of names, and possibly a tuple of rids
+        as '_order_rids'. They work until they're converted by scripts/migrate_folder_order.py
+        or changed, see _get_order.
+        """
+        order = self._order
+        if isinstance(order, tuple):
+            rids = getattr(self, '_order_rids', None) or [self.data[name].rid for name in order]
+            return zip(order, rids)
+        return order.items()
+
+    def _get_order(self):
+        """ Return the FolderOrder, creating or converting it if needed. Only use this for changes. """
+        if isinstance(self._order, tuple):
+            self._order = FolderOrder(list(self._order_items()))
+            if '_order_rids' in self.__dict__:
+                del self._order_rids
+        return self._order
 
     def del_order(self):
         """ Remove set order from a folder, making it unordered, and
         non-reorderable."""
         if self._order is not None:
             del self._order
-        if self._order_rids is not None:
-            del self._order_rids
 
     def is_ordered(self):
         """ Return true if the folder has a manually set ordering, false
@@ -81,30 +103,65 @@ class Folder(Persistent, ResourceMixin):
         Respect order, if set.
         """
         if self.is_ordered():
-            return self._order
+            return tuple(name for (name, rid) in self._order_items())
         return self.data.keys()
 
     order = property(keys, set_order, del_order)
 
+    def move_before(self, name: str, before: str, send_events=True, registry=None):
+        """ Move name so it's placed directly before the item 'before'.
+            Only changes the position of name, so the folder must be ordered.
+
+            Returns the new neighbours as in ``FolderOrder.neighbours``
+        """
+        return self._move_in_order(name, before, 'insert_before', send_events=send_events, registry=registry)
+
+    def move_after(self, name: str, after: str, send_events=True, registry=None):
+        """ Move name so it's placed directly after the item 'after'. Works like ``move_before``.
+        """
+        return self._move_in_order(name, after, 'insert_after', send_events=send_events, registry=registry)
+
+    def _move_in_order(self, name: str, other: str, method: str, send_events=True, registry=None):
+        if not self.is_ordered():
+            raise ValueError("%r isn't ordered" % self)
+        if name == other:
+            raise ValueError("Can't move %r in relation to itself" % name)
+        for x in (name, other):
+            if x not in self.data:
+                raise KeyError(x)
+        order = self._get_order()
+        rid = order.remove(name)
+        getattr(order, method)(name, rid, other)
+        if send_events:
+            if registry is None:
+                registry = get_current_registry()
+            registry.notify(ResourceUpdated(self, changed=['order'], registry=registry))
+        return order.neighbours(name)
+
     def get_order_rids(self, default=None):
         """ Return the ordering according to resource IDs.
         """
         if self.is_ordered():
-            return self._order_rids
+            return tuple(rid for (name, rid) in self._order_items())
         return default
 
     def __iter__(self):
         """ An alias for ``keys``
         """
-        return iter(self.keys())
+        if self.is_ordered():
+            return (name for (name, rid) in self._order_items())
+        return iter(self.data.keys())
+
+    def __contains__(self, name):
+        return name in self.data
 
     def values(self):
         """ Return an iterable sequence of the values present in the folder.
 
         Respect ``order``, if set.
         """
-        if self._order is not None:
-            return [self.data[name] for name in self.keys()]
+        if self.is_ordered():
+            return [self.data[name] for (name, rid) in self._order_items()]
         return self.data.values()
 
     def items(self):
@@ -113,9 +170,27 @@ class Folder(Persistent, ResourceMixin):
         Respect ``order``, if set.
         """
         if self.is_ordered():
-            return [(name, self.data[name]) for name in self.keys()]
+            return [(name, self.data[name]) for (name, rid) in self._order_items()]
         return self.data.items()
 
+    def items_after(self, cursor: str = None):
+        """ Iterate (cursor, name, value) in order, starting after the item with that cursor.
+        Nothing before it is loaded, so it can be used to page through large folders.
+
+        The cursor is the position within ``order`` for ordered folders, and the name otherwise.
+        A :exc:`ValueError` is raised if the cursor isn't valid for this folder.
+        """
+        if self.is_ordered():
+            position = None if cursor is None else int(cursor)
+            if isinstance(self._order, tuple):
+                # Same positions as the FolderOrder it will be converted to
+                items = ((i * FolderOrder.spacing, item) for (i, item) in enumerate(self._order_items()))
+                items = (x for x in items if position is None or x[0] > position)
+            else:
+                items = self._order.items_after(position)
+            return ((str(position), name, self.data[name]) for (position, (name, rid)) in items)
+        return ((name, name, value) for (name, value) in self.data.items(min=cursor, excludemin=cursor is not None))
+
     def __len__(self):
         """ Return the number of objects in the folder.
         """
@@ -176,7 +251,11 @@ class Folder(Persistent, ResourceMixin):
         rid_map = get_rid_map(self)
         if rid_map is not None:
             # Make surer the rid exist. If this is a new instance of an existing object, reset all contained rids
-            rid_map.check_rids(resource, reset=duplicating is not None)
+            # unless that has already been done.
+            reset = duplicating is not None and resource.get_rid() == duplicating.get_rid()
+            rid_map.check_rids(resource, reset=reset)
+            if reset:
+                _refresh_order_rids(resource)
 
         if send_events:
             event = ResourceWillBeAdded(
@@ -198,8 +277,7 @@ class Folder(Persistent, ResourceMixin):
         if self.is_ordered():
             rid = resource.get_rid()
             assert rid, "Must exist for resource objects"
-            self._order += (name,)
-            self._order_rids += (rid,)
+            self._get_order().append(name, rid)
 
         if rid_map is not None:
             rid_map.add(resource)
@@ -281,6 +359,8 @@ class Folder(Persistent, ResourceMixin):
                 # this might be a broken object
                 pass
 
+        # Before it's removed, since legacy orderings may need the contents to be converted
+        order = self._get_order() if self.is_ordered() else None
         del self.data[name]
         self._num_objects.change(-1)
 
@@ -288,14 +368,8 @@ class Folder(Persistent, ResourceMixin):
         if resource.rid and rid_map is not None:
             del rid_map[resource.rid]
 
-        if self.is_ordered():
-            order = list(self._order)
+        if order is not None:
             order.remove(name)
-            self._order = tuple(order)
-            order_rids = list(self._order_rids)
-            rid = resource.get_rid()
-            order_rids.remove(rid)
-            self._order_rids = tuple(order_rids)
 
         if send_events:
             event = ResourceRemoved(
@@ -308,22 +382,32 @@ class Folder(Persistent, ResourceMixin):
     def __delitem__(self, name):
         return self.remove(name)
 
-    def copy(self, name: str, newparent, newname: str = None, registry=None):
+    def copy(self, name: str, newparent, newname: str = None, rid_as_name=False, registry=None):
         """
         Copy a subobject named ``name`` from this folder to the folder
         represented by ``newparent``.  If ``newname`` is not none, it is used as
         the target object name; otherwise the existing subobject name is
-        used.
+        used. If ``rid_as_name`` is true, the new rids of the copy and everything
+        within it are used as names.
+
+        Returns the new name.
         """
+        obj = self[name]
+        newobj = copy(obj)
+        if rid_as_name:
+            rid_map = get_rid_map(newparent)
+            if rid_map is None:
+                raise ValueError("rid_as_name requires a rid map")
+            rid_map.check_rids(newobj, reset=True)
+            _rename_contained_to_rids(newobj)
+            _refresh_order_rids(newobj)
+            newname = str(newobj.rid)
         if newname is None:
             if self is newparent:
                 raise ValueError(
                     "You must specify newname if you create a copy in the same folder."
                 )
             newname = name
-
-        obj = self[name]
-        newobj = copy(obj)
         return newparent.add(newname, newobj, duplicating=obj, registry=registry)
 
     def move(self, name: str, newparent, newname: str = None, registry=None):
@@ -333,24 +417,95 @@ class Folder(Persistent, ResourceMixin):
         the target object name; otherwise the existing subobject name is
         used.
 
-        This operation is done in terms of a remove and an add.  The Removed
-        and WillBeRemoved events as well as the Added and WillBeAdded events
-        sent will indicate that the object is moving.
+        The resource keeps its rid, as does everything within it. Only the paths of the
+        moved resources are changed in the rid map. Instead of add and remove events,
+        WillBeMoved and Moved events are sent.
         """
         if newname is None:
             newname = name
         if registry is None:
             registry = get_current_registry()
-        ob = self.remove(name, moving=newparent, registry=registry)
-        newparent.add(newname, ob, moving=self, registry=registry)
-        return ob
+        if newname in newparent:
+            raise KeyError(
+                "%s already contains a resource with the name %r" % (newparent, newname)
+            )
+        resource = self.data[name]
+        if newparent is resource or resource in lineage(newparent):
+            raise ValueError("Can't move a resource into itself")
+        rid_map = get_rid_map(self)
+        if rid_map is not None and rid_map is not get_rid_map(newparent):
+            raise ValueError("Can only move within the same resource tree")
+        old_path_tuple = resource_path_tuple(resource)
+        contained_rids = None
+        if rid_map is not None:
+            contained_rids = rid_map.contained_rids(resource)
+
+        event_kw = dict(parent=newparent, name=newname, old_parent=self, old_name=name,
+                        contained_rids=contained_rids, registry=registry)
+        registry.notify(ResourceWillBeMoved(resource, **event_kw))
+
+        order = self._get_order() if self.is_ordered() else None
+        del self.data[name]
+        self._num_objects.change(-1)
+        if order is not None:
+            order.remove(name)
+
+        resource.__parent__ = newparent
+        resource.__name__ = newname
+        newparent.data[newname] = resource
+        newparent._num_objects.change(1)
+        if newparent.is_ordered():
+            rid = resource.get_rid()
+            assert rid, "Must exist for resource objects"
+            newparent._get_order().append(newname, rid)
+
+        if rid_map is not None:
+            rid_map.move(resource, old_path_tuple)
+
+        registry.notify(ResourceMoved(resource, **event_kw))
+        return resource
 
     def rename(self, oldname: str, newname: str, registry=None):
         """
         Rename a subobject from oldname to newname.
 
-        This operation is done in terms of a remove and an add.  The Removed
-        and WillBeRemoved events sent will indicate that the object is
-        moving.
+        This operation is done in terms of a move, see ``move``.
         """
         return self.move(oldname, self, newname, registry=registry)
+
+
+def _new_order(items):
+    """ A FolderOrder with items, or an empty tuple if there aren't any. """
+    if items:
+        return FolderOrder(items)
+    return ()
+
+
+def _rename_contained_to_rids(resource):
+    """ Rename everything within resource to their rids, which must already be set.
+        Used for copies, since contained resources get new rids but keep their old names otherwise.
+    """
+    if isinstance(resource, Folder):
+        ordered_names = list(resource.keys()) if resource.is_ordered() else None
+        items = list(resource.data.items())
+        renamed = {}
+        resource.data.clear()
+        for (name, contained) in items:
+            newname = str(contained.rid)
+            contained.__name__ = renamed[name] = newname
+            resource.data[newname] = contained
+            _rename_contained_to_rids(contained)
+        if ordered_names is not None:
+            names = [renamed[name] for name in ordered_names]
+            resource._order = _new_order([(name, resource.data[name].rid) for name in names])
+
+
+def _refresh_order_rids(resource):
+    """ Ordered folders keep the rids of their contents. After rids have been reset,
+        for instance for a copy, the order must be rebuilt.
+    """
+    if isinstance(resource, Folder):
+        if resource.is_ordered():
+            resource._order = _new_order([(name, resource.data[name].rid) for name in resource.keys()])
+        for contained in resource.data.values():
+            _refresh_order_rids(contained)
@@ -0,0 +1,128 @@
+from BTrees import family64
+from BTrees.Length import Length
+from persistent import Persistent
+
+
+class FolderOrder(Persistent):
+    """ A persistent ordered sequence of names and their resource IDs, used by ordered folders.
+
+        Items are stored under sparse positions, with an index of name -> position.
+        Adding, removing or moving an item only changes a few buckets,
+        instead of rewriting the whole order.
+    """
+    family = family64
+    # Distance between positions when items are appended or renumbered
+    spacing = 2 ** 16
+
+    def __init__(self, items=()):
+        # position -> (name, rid)
+        self.positions = self.family.IO.BTree()
+        # name -> position
+        self.name_to_position = self.family.OI.BTree()
+        self._length = Length()
+        for (name, rid) in items:
+            self.append(name, rid)
+
+    def __len__(self):
+        return self._length()
+
+    def __contains__(self, name):
+        return name in self.name_to_position
+
+    def __iter__(self):
+        return self.names()
+
+    def names(self):
+        for (name, rid) in self.positions.values():
+            yield name
+
+    def rids(self):
+        for (name, rid) in self.positions.values():
+            yield rid
+
+    def items(self):
+        """ (name, rid) in order. """
+        return self.positions.values()
+
+    def items_after(self, position:int=None):
+        """ (position, (name, rid)) in order, starting after position if specified.
+            The position doesn't have to exist, so it still works if that item was removed.
+        """
+        return self.positions.items(min=position, excludemin=position is not None)
+
+    def get_rid(self, name, default=None):
+        position = self.name_to_position.get(name, None)
+        if position is None:
+            return default
+        return self.positions[position][1]
+
+    def append(self, name:str, rid:int):
+        if self.positions:
+            position = self.positions.maxKey() + self.spacing
+        else:
+            position = 0
+        self._insert(position, name, rid)
+
+    def insert_before(self, name:str, rid:int, before:str):
+        """ Insert name right before the item 'before'. """
+        position = self.name_to_position[before]
+        try:
+            previous = self.positions.maxKey(position - 1)
+        except ValueError:
+            # 'before' is first
+            previous = position - 2 * self.spacing
+        if position - previous < 2:
+            self.renumber()
+            return self.insert_before(name, rid, before)
+        self._insert((previous + position) // 2, name, rid)
+
+    def insert_after(self, name:str, rid:int, after:str):
+        """ Insert name right after the item 'after'. """
+        position = self.name_to_position[after]
+        try:
+            following = self.positions.minKey(position + 1)
+        except ValueError:
+            # 'after' is last
+            following = position + 2 * self.spacing
+        if following - position < 2:
+            self.renumber()
+            return self.insert_after(name, rid, after)
+        self._insert((position + following) // 2, name, rid)
+
+    def neighbours(self, name:str):
+        """ Return the items (name, rid) right before and after name. None when there's nothing there. """
+        position = self.name_to_position[name]
+        previous = following = None
+        try:
+            previous = self.positions[self.positions.maxKey(position - 1)]
+        except ValueError:
+            pass
+        try:
+            following = self.positions[self.positions.minKey(position + 1)]
+        except ValueError:
+            pass
+        return previous, following
+
+    def remove(self, name:str):
+        """ Remove name and return its rid. """
+        position = self.name_to_position.pop(name)
+        (name, rid) = self.positions.pop(position)
+        self._length.change(-1)
+        return rid
+
+    def renumber(self):
+        """ Spread out all positions again. Only needed when there's no room left between two items. """
+        items = list(self.positions.values())
+        self.positions.clear()
+        self.name_to_position.clear()
+        for (i, (name, rid)) in enumerate(items):
+            position = i * self.spacing
+            self.positions[position] = (name, rid)
+            self.name_to_position[name] = position
+
+    def _insert(self, position:int, name:str, rid:int):
+        if name in self.name_to_position:
+            raise KeyError("%r is already in the order" % name)
+        self.positions[position] = (name, rid)
+        self.name_to_position[name] = position
+        self._length.change(1)
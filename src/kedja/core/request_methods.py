@@ -24,6 +24,21 @@ def _get_rid_map(request):
     return get_rid_map(request.root)
 
 
+def _acl_cache(request):
+    # Computed ACL parts per security aware resource. See kedja.resources.security
+    return {}
+
+
+def _requested_fields(request):
+    """ Names in the querystring parameter 'fields', separated by comma. None if it wasn't specified.
+        Used when rendering resources, see kedja.resources.mixins.JSONRenderable
+    """
+    fields = request.params.get('fields', None)
+    if fields is None:
+        return
+    return frozenset(x.strip() for x in fields.split(',') if x.strip())
+
+
 def get_default_schema(request, resource):
     name = resource.__class__.__name__
     return request.registry.default_schemas.get(name)
@@ -32,4 +47,6 @@ def get_default_schema(request, resource):
 def includeme(config):
     config.add_request_method(_get_root, name='root', reify=True)
     config.add_request_method(_get_rid_map, name='rid_map', reify=True)
+    config.add_request_method(_acl_cache, name='acl_cache', reify=True)
+    config.add_request_method(_requested_fields, name='requested_fields', reify=True)
     config.add_request_method(get_default_schema)
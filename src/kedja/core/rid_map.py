@@ -13,6 +13,8 @@ class ResourceIDMap(Persistent):
     """ Maps resource id and path tuple. Essentially a way to make indexing, referencing and similar more lightweight.
     """
     family = family64
+    # Direct references rid -> resource. Older databases won't have this until build_references has been run.
+    rid_to_resource = None
 
     def __init__(self, root):
         self.root = root
@@ -22,6 +24,7 @@ class ResourceIDMap(Persistent):
         self._minint = -self._maxint
         self.rid_to_path = self.family.IO.BTree()
         self.path_to_rid = self.family.OI.BTree()
+        self.rid_to_resource = self.family.IO.BTree()
         self.add(root)
 
     def __getitem__(self, rid):
@@ -47,6 +50,13 @@ class ResourceIDMap(Persistent):
         return self.path_to_rid.get(path_tuple, default)
 
     def get_resource(self, rid, default=None):
+        """ Lookup a resource via the stored reference. Traversal is used as a fallback in case the reference
+            doesn't exist or seems broken.
+        """
+        if self.rid_to_resource is not None:
+            resource = self.rid_to_resource.get(rid, None)
+            if resource is not None and resource.get_rid() == rid:
+                return resource
         try:
             path_tuple = self.rid_to_path[rid]
             return find_resource(self.root, path_tuple)
@@ -100,10 +110,29 @@ class ResourceIDMap(Persistent):
         else:
             self.path_to_rid[path_tuple] = rid
             self.rid_to_path[rid] = path_tuple
+        if self.rid_to_resource is not None and self.rid_to_resource.get(rid, None) is not resource:
+            self.rid_to_resource[rid] = resource
         for contained in resource.values():
             self.add(contained)
         return rid
 
+    def move(self, resource, old_path_tuple:tuple):
+        """ Update the paths of a resource that has been moved, and everything it contains.
+            The rids stay the same, and only the entries of the moved subtree are changed.
+        """
+        self._check_resource(resource)
+        new_path_tuple = resource_path_tuple(resource)
+        moved = [(old_path_tuple, self.path_to_rid[old_path_tuple])]
+        moved.extend(self.iter_contained_paths(old_path_tuple))
+        for (path_tuple, rid) in moved:
+            del self.path_to_rid[path_tuple]
+        prefix_len = len(old_path_tuple)
+        for (path_tuple, rid) in moved:
+            path_tuple = new_path_tuple + path_tuple[prefix_len:]
+            self.path_to_rid[path_tuple] = rid
+            self.rid_to_path[rid] = path_tuple
+        return len(moved)
+
     def __delitem__(self, rid:int):
         to_remove = self.contained_rids(rid)
         to_remove.add(rid)
@@ -111,10 +140,15 @@ class ResourceIDMap(Persistent):
             remove_path = self.rid_to_path[ridx]
             del self.path_to_rid[remove_path]
             del self.rid_to_path[ridx]
+            if self.rid_to_resource is not None:
+                self.rid_to_resource.pop(ridx, None)
 
     def contained_rids(self, item):
         """ Return any rids within this object, id or path tuple.
-            It might be a good idea to cache this later.
+
+            Path tuples sort lexicographically within path_to_rid, so everything contained within a path
+            is stored right after it. This is a range query, so the cost depends on the size of the subtree
+            rather than the number of resources within the site.
         """
         if isinstance(item, int):
             rid = item
@@ -123,13 +157,25 @@ class ResourceIDMap(Persistent):
         elif IResource.providedBy(item):
             rid = item.get_rid()
         path_tuple = self[rid]
+        return set(rid for (ptuple, rid) in self.iter_contained_paths(path_tuple))
+
+    def iter_contained_paths(self, path_tuple:tuple):
+        """ Yield (path tuple, rid) for everything contained within path_tuple, in path order.
+        """
         root_node_len = len(path_tuple)
-        found = set()
-        for (ptuple, id) in self.path_to_rid.items():
-            if len(ptuple) > root_node_len:
-                if ptuple[:root_node_len] == path_tuple:
-                    found.add(id)
-        return found
+        for (ptuple, rid) in self.path_to_rid.items(min=path_tuple, excludemin=True):
+            if ptuple[:root_node_len] != path_tuple:
+                break
+            yield ptuple, rid
+
+    def build_references(self):
+        """ (Re)build the rid -> resource references from the paths. Used to upgrade existing databases.
+            Returns the number of references stored.
+        """
+        self.rid_to_resource = self.family.IO.BTree()
+        for (rid, path_tuple) in self.rid_to_path.items():
+            self.rid_to_resource[rid] = find_resource(self.root, path_tuple)
+        return len(self.rid_to_resource)
 
     def _check_resource(self, resource):
         if not IResource.providedBy(resource):
@@ -189,6 +189,128 @@ class FolderTests(TestCase):
         self.assertEqual(root.order, ('a', 'b', 'c', 'd'))
         self.assertEqual(root.get_order_rids(), (1, 2, 3, 4))
 
+    def test_remove_updates_ordering_if_ordered(self):
+        root = self._rid_map_fixture()
+        order = self._folder_fixture(root)
+        root.order = order
+        del root['b']
+        self.assertEqual(root.order, ('a', 'c'))
+        self.assertEqual(list(root), ['a', 'c'])
+        self.assertEqual(root.get_order_rids(), (1, 3))
+        self.assertEqual(len(root._order), 2)
+
+    def test_items_after_unordered(self):
+        root = self._rid_map_fixture()
+        self._folder_fixture(root)
+        self.assertEqual(['a', 'b', 'c'], [x[0] for x in root.items_after()])
+        self.assertEqual([('c', 'c', root['c'])], list(root.items_after('b')))
+        # Cursors don't need to exist
+        self.assertEqual(['b', 'c'], [x[1] for x in root.items_after('aa')])
+
+    def test_items_after_ordered(self):
+        root = self._rid_map_fixture()
+        self._folder_fixture(root)
+        root.order = ('c', 'a', 'b')
+        items = list(root.items_after())
+        self.assertEqual(['c', 'a', 'b'], [x[1] for x in items])
+        self.assertEqual(['a', 'b'], [x[1] for x in root.items_after(items[0][0])])
+        # The item that had the cursor was removed
+        del root['a']
+        self.assertEqual(['b'], [x[1] for x in root.items_after(items[1][0])])
+        self.assertRaises(ValueError, root.items_after, 'abc')
+
+    def test_empty_order_is_cheap(self):
+        from kedja.core.ordering import FolderOrder
+        root = self._rid_map_fixture()
+        root.order = ()
+        self.assertTrue(root.is_ordered())
+        self.assertEqual((), root._order)
+        self.assertEqual((), root.order)
+        self.assertEqual([], list(root.items_after()))
+        root['a'] = self._cut(rid=1)
+        self.assertIsInstance(root._order, FolderOrder)
+        self.assertEqual(('a',), root.order)
+
+    def _legacy_fixture(self, with_rids=True):
+        """ Ordering as it was stored before FolderOrder existed. """
+        root = self._rid_map_fixture()
+        self._folder_fixture(root)
+        root._order = ('c', 'a', 'b')
+        if with_rids:
+            root._order_rids = (3, 1, 2)
+        return root
+
+    def test_legacy_order_read(self):
+        for with_rids in (True, False):
+            root = self._legacy_fixture(with_rids=with_rids)
+            self.assertEqual(('c', 'a', 'b'), root.order)
+            self.assertEqual(['c', 'a', 'b'], list(root))
+            self.assertEqual((3, 1, 2), root.get_order_rids())
+            self.assertEqual([3, 1, 2], [x.rid for x in root.values()])
+            items = list(root.items_after())
+            self.assertEqual(['c', 'a', 'b'], [x[1] for x in items])
+            self.assertEqual(['b'], [x[1] for x in root.items_after(items[1][0])])
+            self.assertIsInstance(root._order, tuple)
+
+    def test_legacy_order_cursors_survive_conversion(self):
+        root = self._legacy_fixture()
+        cursor = list(root.items_after())[0][0]
+        root._get_order()
+        self.assertEqual(['a', 'b'], [x[1] for x in root.items_after(cursor)])
+        self.assertNotIn('_order_rids', root.__dict__)
+
+    def test_legacy_order_changes(self):
+        from kedja.core.ordering import FolderOrder
+        for with_rids in (True, False):
+            root = self._legacy_fixture(with_rids=with_rids)
+            del root['a']
+            self.assertIsInstance(root._order, FolderOrder)
+            self.assertEqual((3, 2), root.get_order_rids())
+            root['d'] = self._cut(rid=4)
+            root.move_before('d', 'c')
+            self.assertEqual(('d', 'c', 'b'), root.order)
+
+    def test_move_before(self):
+        root = self._rid_map_fixture()
+        root.order = self._folder_fixture(root)
+        self.assertEqual(root.move_before('c', 'a'), (None, ('a', 1)))
+        self.assertEqual(root.order, ('c', 'a', 'b'))
+        self.assertEqual(root.get_order_rids(), (3, 1, 2))
+
+    def test_move_after(self):
+        root = self._rid_map_fixture()
+        root.order = self._folder_fixture(root)
+        self.assertEqual(root.move_after('a', 'b'), (('b', 2), ('c', 3)))
+        self.assertEqual(root.order, ('b', 'a', 'c'))
+
+    def test_move_errors(self):
+        root = self._rid_map_fixture()
+        self._folder_fixture(root)
+        self.assertRaises(ValueError, root.move_before, 'a', 'b')
+        root.order = ('a', 'b', 'c')
+        self.assertRaises(ValueError, root.move_before, 'a', 'a')
+        self.assertRaises(KeyError, root.move_before, 'a', '404')
+        self.assertRaises(KeyError, root.move_after, '404', 'a')
+        self.assertEqual(root.order, ('a', 'b', 'c'))
+
+    def test_move_event(self):
+        from kedja.interfaces import IResourceUpdated
+        L = []
+        self.config.add_subscriber(L.append, IResourceUpdated)
+        root = self._rid_map_fixture()
+        root.order = self._folder_fixture(root)
+        root.move_after('a', 'c')
+        self.assertEqual(len(L), 1)
+        self.assertIs(L[0].resource, root)
+        self.assertEqual(L[0].changed, {'order'})
+
+    def test_contains(self):
+        root = self._cut()
+        self._folder_fixture(root)
+        root.order = ['c', 'b', 'a']
+        self.assertIn('a', root)
+        self.assertNotIn('d', root)
+
     def test_add_event_will_be_added(self):
         L = []
 
@@ -282,6 +404,57 @@ class FolderContentsIntegrationTests(TestCase):
         self.assertEqual(rid_map[10], ("", "newfolder", "movedhere", "a"))
         self.assertEqual(rid_map[11], ("", "newfolder", "movedhere", "b"))
 
+    def test_moving_keeps_order(self):
+        root = self._fixture()
+        root.order = ('folder',)
+        newfolder = self._cut(rid=200)
+        newfolder.order = ()
+        root['newfolder'] = newfolder
+        root.move('folder', newfolder)
+        self.assertEqual(root.order, ('newfolder',))
+        self.assertEqual(newfolder.get_order_rids(), (1,))
+        self.assertEqual(len(root), 1)
+        self.assertEqual(len(newfolder), 1)
+
+    def test_moving_name_exists(self):
+        root = self._fixture()
+        root['newfolder'] = newfolder = self._cut(rid=200)
+        newfolder['folder'] = self._cut(rid=201)
+        self.assertRaises(KeyError, root.move, 'folder', newfolder)
+
+    def test_moving_into_itself(self):
+        root = self._fixture()
+        self.assertRaises(ValueError, root.move, 'folder', root['folder']['a'])
+
+    def test_rename(self):
+        root = self._fixture()
+        root.rename('folder', 'renamed')
+        self.assertEqual(root.rid_map[10], ("", "renamed", "a"))
+        self.assertEqual(root['renamed'].rid, 1)
+
+    def test_copy_rid_as_name(self):
+        root = self._fixture()
+        folder = root['folder']
+        folder.order = ('b', 'a')
+        name = root.copy('folder', root, rid_as_name=True)
+        clone = root[name]
+        self.assertEqual(name, str(clone.rid))
+        self.assertNotEqual(clone.rid, 1)
+        self.assertEqual(root.rid_map[clone.rid], ("", name))
+        # Contained resources are renamed too, and the order has the new rids
+        self.assertEqual(list(clone.keys()), [str(x) for x in clone.get_order_rids()])
+        self.assertEqual([x.__name__ for x in clone.values()], list(clone.keys()))
+        self.assertNotIn(10, clone.get_order_rids())
+        for x in clone.values():
+            self.assertEqual(root.rid_map[x.rid], ("", name, str(x.rid)))
+
+    def test_copy_refreshes_order_rids(self):
+        root = self._fixture()
+        root['folder'].order = ('b', 'a')
+        root.copy('folder', root, newname='clone')
+        clone = root['clone']
+        self.assertEqual(clone.get_order_rids(), (clone['b'].rid, clone['a'].rid))
+
     def test_deleting(self):
         root = self._fixture()
         del root['folder']
@@ -410,3 +583,29 @@ class FolderEventsIntegrationTests(TestCase):
         self.assertEqual(len(L), 1)
         event = L[0]
         self.assertEqual(event.contained_rids, {2})
+
+    def test_events_moved(self):
+        from kedja.interfaces import IResourceMoved
+        from kedja.interfaces import IResourceWillBeMoved
+        L = []
+        self.config.add_subscriber(L.append, IResourceWillBeMoved)
+        self.config.add_subscriber(L.append, IResourceMoved)
+        self.config.add_subscriber(L.append, IResourceAdded)
+        self.config.add_subscriber(L.append, IResourceWillBeRemoved)
+        root = self._fixture()
+        folder = self._cut(rid=1)
+        root.add('folder', folder, send_events=False)
+        folder.add('child', self._cut(rid=2), send_events=False)
+        root.add('other', self._cut(rid=3), send_events=False)
+        root.move('folder', root['other'], newname='moved')
+        self.assertEqual(len(L), 2)
+        self.assertTrue(IResourceWillBeMoved.providedBy(L[0]))
+        self.assertFalse(IResourceMoved.providedBy(L[0]))
+        self.assertTrue(IResourceMoved.providedBy(L[1]))
+        for event in L:
+            self.assertIs(event.resource, folder)
+            self.assertIs(event.old_parent, root)
+            self.assertEqual(event.old_name, 'folder')
+            self.assertIs(event.parent, root['other'])
+            self.assertEqual(event.name, 'moved')
+            self.assertEqual(event.contained_rids, {2})
@@ -0,0 +1,72 @@
+from unittest import TestCase
+
+
+class FolderOrderTests(TestCase):
+
+    @property
+    def _cut(self):
+        from kedja.core.ordering import FolderOrder
+        return FolderOrder
+
+    def _fixture(self):
+        return self._cut([('a', 1), ('b', 2), ('c', 3)])
+
+    def test_init(self):
+        obj = self._fixture()
+        self.assertEqual(list(obj.names()), ['a', 'b', 'c'])
+        self.assertEqual(list(obj.rids()), [1, 2, 3])
+        self.assertEqual(list(obj.items()), [('a', 1), ('b', 2), ('c', 3)])
+        self.assertEqual(len(obj), 3)
+        self.assertIn('a', obj)
+        self.assertNotIn('d', obj)
+
+    def test_append(self):
+        obj = self._fixture()
+        obj.append('d', 4)
+        self.assertEqual(list(obj), ['a', 'b', 'c', 'd'])
+        self.assertEqual(len(obj), 4)
+
+    def test_append_existing(self):
+        obj = self._fixture()
+        self.assertRaises(KeyError, obj.append, 'a', 1)
+
+    def test_remove(self):
+        obj = self._fixture()
+        self.assertEqual(obj.remove('b'), 2)
+        self.assertEqual(list(obj.items()), [('a', 1), ('c', 3)])
+        self.assertEqual(len(obj), 2)
+        self.assertRaises(KeyError, obj.remove, 'b')
+
+    def test_insert_before(self):
+        obj = self._fixture()
+        obj.insert_before('d', 4, 'b')
+        obj.insert_before('e', 5, 'a')
+        self.assertEqual(list(obj), ['e', 'a', 'd', 'b', 'c'])
+
+    def test_insert_after(self):
+        obj = self._fixture()
+        obj.insert_after('d', 4, 'b')
+        obj.insert_after('e', 5, 'c')
+        self.assertEqual(list(obj), ['a', 'b', 'd', 'c', 'e'])
+
+    def test_neighbours(self):
+        obj = self._fixture()
+        self.assertEqual(obj.neighbours('a'), (None, ('b', 2)))
+        self.assertEqual(obj.neighbours('b'), (('a', 1), ('c', 3)))
+        self.assertEqual(obj.neighbours('c'), (('b', 2), None))
+
+    def test_get_rid(self):
+        obj = self._fixture()
+        self.assertEqual(obj.get_rid('b'), 2)
+        self.assertIsNone(obj.get_rid('404'))
+
+    def test_renumber_when_full(self):
+        obj = self._fixture()
+        obj.spacing = 4
+        obj.renumber()
+        # Keep inserting at the same spot until there's no room left
+        for i in range(10):
+            obj.insert_after(str(i), 10 + i, 'a')
+        self.assertEqual(list(obj), ['a'] + [str(i) for i in reversed(range(10))] + ['b', 'c'])
+        self.assertEqual(len(obj), 13)
+        self.assertEqual(len(obj.name_to_position), 13)
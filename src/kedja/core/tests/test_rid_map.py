@@ -147,3 +147,92 @@ class RIDMapTests(TestCase):
         self.assertEqual(contained_rids(3), set())
         self.assertEqual(contained_rids(b), {3})
         self.assertEqual(contained_rids(("", "a")), {2, 3})
+
+    def test_contained_rids_similar_names(self):
+        root = self._fixture()
+        a = DummyResource()
+        a.rid = 1
+        b = DummyResource()
+        b.rid = 2
+        ab = DummyResource()
+        ab.rid = 3
+        root['a'] = a
+        a['b'] = b
+        root['ab'] = ab
+        root.rid_map.add(a)
+        root.rid_map.add(ab)
+        contained_rids = root.rid_map.contained_rids
+        self.assertEqual(contained_rids(1), {2})
+        self.assertEqual(contained_rids(3), set())
+
+    def test_iter_contained_paths(self):
+        root = self._fixture()
+        a = DummyResource()
+        a.rid = 1
+        b = DummyResource()
+        b.rid = 2
+        root['a'] = a
+        a['b'] = b
+        root['c'] = c = DummyResource()
+        c.rid = 3
+        root.rid_map.add(a)
+        root.rid_map.add(c)
+        self.assertEqual(list(root.rid_map.iter_contained_paths(("", "a"))), [(("", "a", "b"), 2)])
+
+    def test_add_stores_reference(self):
+        root = self._fixture()
+        root['n'] = new = DummyResource()
+        rid = root.rid_map.add(new)
+        self.assertIs(root.rid_map.rid_to_resource[rid], new)
+
+    def test_delitem_removes_reference(self):
+        root = self._fixture()
+        root['n'] = new = DummyResource()
+        rid = root.rid_map.add(new)
+        del root.rid_map[rid]
+        self.assertNotIn(rid, root.rid_map.rid_to_resource)
+
+    def test_get_resource_without_references(self):
+        root = self._fixture()
+        root['n'] = new = DummyResource()
+        rid = root.rid_map.add(new)
+        root.rid_map.rid_to_resource = None
+        self.assertEqual(new, root.rid_map.get_resource(rid))
+
+    def test_get_resource_broken_reference_uses_traversal(self):
+        root = self._fixture()
+        root['n'] = new = DummyResource()
+        rid = root.rid_map.add(new)
+        root.rid_map.rid_to_resource[rid] = DummyResource()
+        self.assertEqual(new, root.rid_map.get_resource(rid))
+
+    def test_build_references(self):
+        root = self._fixture()
+        root['n'] = new = DummyResource()
+        rid = root.rid_map.add(new)
+        root.rid_map.rid_to_resource = None
+        self.assertEqual(root.rid_map.build_references(), 2)
+        self.assertIs(root.rid_map.rid_to_resource[rid], new)
+
+    def test_move(self):
+        root = self._fixture()
+        root['a'] = a = DummyResource()
+        a.rid = 1
+        a['b'] = b = DummyResource()
+        b.rid = 2
+        root['c'] = c = DummyResource()
+        c.rid = 3
+        root.rid_map.add(a)
+        root.rid_map.add(c)
+        # Move a into c, the same way the folder does it
+        del root['a']
+        c['a'] = a
+        a.__parent__ = c
+        self.assertEqual(root.rid_map.move(a, ("", "a")), 2)
+        self.assertEqual(root.rid_map[1], ("", "c", "a"))
+        self.assertEqual(root.rid_map[2], ("", "c", "a", "b"))
+        self.assertEqual(root.rid_map[3], ("", "c"))
+        self.assertNotIn(("", "a"), root.rid_map)
+        self.assertNotIn(("", "a", "b"), root.rid_map)
+        self.assertEqual(root.rid_map.get_rid(("", "c", "a", "b")), 2)
+        self.assertIs(root.rid_map.get_resource(2), b)
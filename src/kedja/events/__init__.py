@@ -8,6 +8,8 @@ from .resource import ResourceAdded
 from .resource import ResourceWillBeRemoved
 from .resource import ResourceRemoved
 from .resource import ResourceUpdated
+from .resource import ResourceWillBeMoved
+from .resource import ResourceMoved
 
 # SCHEMA
 from .schema import SchemaBound
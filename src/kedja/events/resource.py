@@ -11,6 +11,8 @@ from kedja.interfaces import (
     IResourceWillBeRemoved,
     IResourceRemoved,
     IResourceUpdated,
+    IResourceWillBeMoved,
+    IResourceMoved,
 )
 
 
@@ -89,6 +91,25 @@ class ResourceRemoved(ResourceEvent):
     __doc__ = IResourceRemoved.__doc__
 
 
+class ResourceMoveEvent(ResourceEvent):
+
+    def __init__(self, resource, old_parent=None, old_name: str = None, contained_rids: set = None, **kw):
+        self.old_parent = old_parent
+        self.old_name = old_name
+        self.contained_rids = contained_rids
+        super().__init__(resource, **kw)
+
+
+@implementer(IResourceWillBeMoved)
+class ResourceWillBeMoved(ResourceMoveEvent):
+    __doc__ = IResourceWillBeMoved.__doc__
+
+
+@implementer(IResourceMoved)
+class ResourceMoved(ResourceMoveEvent):
+    __doc__ = IResourceMoved.__doc__
+
+
 @implementer(IResourceUpdated)
 class ResourceUpdated(ResourceEvent):
     __doc__ = IResourceUpdated.__doc__
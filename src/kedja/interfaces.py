@@ -124,6 +124,14 @@ class ISecurityAware(Interface):
             Userids with no roles will be skipped.
         """
 
+    def get_translated_acl(userids, registry=None):
+        """ Return the ACL from this resource only, with roles translated to userids.
+            get_computed_acl caches this per request.
+        """
+
+    def invalidate_acl_cache(request=None):
+        """ Remove any cached ACL parts for this resource within the current request. """
+
     def get_acl(registry=None):
         """ Get the current contexts ACL, if any. """
 
@@ -180,6 +188,23 @@ class IResourceRemoved(IResourceEvent):
     """ A resource was removed. """
 
 
+class IResourceWillBeMoved(IResourceEvent):
+    """ A resource is about to be moved within the resource tree. It keeps its rid and everything it contains.
+        ``parent`` and ``name`` are the new ones, ``old_parent`` and ``old_name`` where it was before.
+        Moving doesn't send any add or remove events.
+    """
+    old_parent = Attribute("The parent the resource is moved from.")
+    old_name = Attribute("The name the resource had before.")
+    contained_rids = Attribute("RIDs of everything contained within the resource.")
+
+
+class IResourceMoved(IResourceEvent):
+    """ A resource was moved. See IResourceWillBeMoved. """
+    old_parent = Attribute("The parent the resource was moved from.")
+    old_name = Attribute("The name the resource had before.")
+    contained_rids = Attribute("RIDs of everything contained within the resource.")
+
+
 class IResourceUpdated(IResourceEvent):
     changed = Attribute("Attributes that have changed.")
 
@@ -3,8 +3,12 @@
 def includeme(config):
     config.include('.auth')
     config.include('.authomatic')
+    config.include('.catalog')
+    config.include('.changes')
     config.include('.credentials')
     config.include('.json')
+    config.include('.memberships')
     config.include('.relations')
+    config.include('.snapshots')
     config.include('.template')
 #    config.include('.cors')
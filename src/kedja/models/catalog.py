@@ -0,0 +1,342 @@
+import re
+
+from BTrees import family64
+from persistent import Persistent
+from pyramid.traversal import find_interface
+
+from kedja.interfaces import ICard
+from kedja.interfaces import ICollection
+from kedja.interfaces import IResourceAdded
+from kedja.interfaces import IResourceMoved
+from kedja.interfaces import IResourceUpdated
+from kedja.interfaces import IResourceWillBeRemoved
+from kedja.interfaces import IRoot
+from kedja.interfaces import IWall
+
+
+WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+# Attributes that are indexed. If an update doesn't touch any of them, there's nothing to reindex.
+INDEXED_ATTRIBUTES = frozenset(['title', 'int_indicator'])
+
+
+def split_words(text:str):
+    """ Lowercase words in text, without duplicates. """
+    return tuple(sorted(set(WORD_PATTERN.findall(text.lower()))))
+
+
+class TextIndex(Persistent):
+    """ Words -> rids. Searching matches words that start with each of the searched words. """
+    family = family64
+
+    def __init__(self):
+        # word -> integer TreeSet of rids
+        self.words = self.family.OO.BTree()
+        # rid -> words
+        self.words_by_rid = self.family.IO.BTree()
+
+    def __len__(self):
+        return len(self.words_by_rid)
+
+    def __contains__(self, rid:int):
+        return rid in self.words_by_rid
+
+    def index(self, rid:int, text:str):
+        words = split_words(text)
+        existing = self.words_by_rid.get(rid, None)
+        if existing == words:
+            return
+        existing = existing or ()
+        for word in set(existing) - set(words):
+            _remove_from(self.words, word, rid)
+        for word in set(words) - set(existing):
+            _add_to(self.words, word, rid)
+        self.words_by_rid[rid] = words
+
+    def unindex(self, rid:int):
+        for word in self.words_by_rid.pop(rid, ()):
+            _remove_from(self.words, word, rid)
+
+    def clear(self):
+        self.words.clear()
+        self.words_by_rid.clear()
+
+    def rids(self):
+        return self.family.II.TreeSet(self.words_by_rid.keys())
+
+    def search(self, text:str):
+        """ Return a sorted integer set with the rids that match all words in text. """
+        words = split_words(text)
+        if not words:
+            return self.family.II.TreeSet()
+        return intersect_all([self._search_word(x) for x in words])
+
+    def matches(self, rid:int, text:str):
+        """ Does the indexed text of rid match all words in text? Same rules as search. """
+        words = split_words(text)
+        indexed = self.words_by_rid.get(rid, ())
+        return bool(words) and all(any(x.startswith(word) for x in indexed) for word in words)
+
+    def _search_word(self, prefix:str):
+        matched = []
+        for (word, rids) in self.words.items(min=prefix):
+            if not word.startswith(prefix):
+                break
+            matched.append(rids)
+        return self.family.II.multiunion(matched)
+
+
+class WallCatalog(Persistent):
+    """ Indexes cards and collections within a wall, so they can be searched without loading the whole wall.
+
+        There's a field index with card int_indicators,
+        and a text index with the words in the titles of cards and collections.
+    """
+    family = family64
+
+    def __init__(self):
+        # int_indicator -> integer TreeSet of rids
+        self.int_indicator = self.family.IO.BTree()
+        # rid -> int_indicator
+        self.int_indicator_by_rid = self.family.II.BTree()
+        self.text = TextIndex()
+
+    def __len__(self):
+        return len(self.text)
+
+    def __contains__(self, rid:int):
+        return rid in self.text
+
+    def index(self, resource):
+        """ Index or reindex a card or a collection. Other resources are ignored. """
+        if ICard.providedBy(resource):
+            self._index_int_indicator(resource.rid, resource.int_indicator)
+        elif not ICollection.providedBy(resource):
+            return
+        self.text.index(resource.rid, resource.title)
+
+    def unindex(self, rid:int):
+        value = self.int_indicator_by_rid.pop(rid, None)
+        if value is not None:
+            _remove_from(self.int_indicator, value, rid)
+        self.text.unindex(rid)
+
+    def clear(self):
+        self.int_indicator.clear()
+        self.int_indicator_by_rid.clear()
+        self.text.clear()
+
+    def search(self, text:str=None, int_indicator:int=None, int_indicator_min:int=None, int_indicator_max:int=None):
+        """ Return a sorted integer set with the rids that match all specified criteria.
+
+            Each word in text matches any indexed word that starts with it.
+            int_indicator is an exact match, the min/max values are inclusive.
+        """
+        found = []
+        if text is not None:
+            found.append(self.text.search(text))
+        if int_indicator is not None:
+            found.append(self.int_indicator.get(int_indicator, self.family.II.TreeSet()))
+        if int_indicator_min is not None or int_indicator_max is not None:
+            found.append(self.family.II.multiunion(
+                list(self.int_indicator.values(min=int_indicator_min, max=int_indicator_max))
+            ))
+        if not found:
+            return self.text.rids()
+        return intersect_all(found)
+
+    def _index_int_indicator(self, rid:int, value:int):
+        existing = self.int_indicator_by_rid.get(rid, None)
+        if existing == value:
+            return
+        if existing is not None:
+            _remove_from(self.int_indicator, existing, rid)
+        _add_to(self.int_indicator, value, rid)
+        self.int_indicator_by_rid[rid] = value
+
+
+class GlobalCatalog(Persistent):
+    """ Instance-wide text index of the titles of walls, collections and cards.
+        It also knows which wall each resource is in, so results can be limited to walls someone may see.
+    """
+    family = family64
+
+    def __init__(self):
+        self.text = TextIndex()
+        # rid -> rid of the wall it's in. Walls point to themselves.
+        self.wall_by_rid = self.family.II.BTree()
+
+    def __len__(self):
+        return len(self.text)
+
+    def index(self, resource, wall):
+        """ Index a wall, collection or card within wall. Other resources are ignored. """
+        if not (IWall.providedBy(resource) or ICollection.providedBy(resource) or ICard.providedBy(resource)):
+            return
+        self.text.index(resource.rid, resource.title)
+        if self.wall_by_rid.get(resource.rid, None) != wall.rid:
+            self.wall_by_rid[resource.rid] = wall.rid
+
+    def unindex(self, rid:int):
+        self.text.unindex(rid)
+        self.wall_by_rid.pop(rid, None)
+
+    def clear(self):
+        self.text.clear()
+        self.wall_by_rid.clear()
+
+    def search(self, text:str, walls, cursor:int=None):
+        """ Return a sorted integer set with the rids that match text within walls, and the walls that match.
+            Only the catalogs of those walls are searched, so the cost depends on what's in them
+            rather than on everything that's indexed. Start after the rid 'cursor' if specified.
+        """
+        found = []
+        matching_walls = []
+        for wall in walls:
+            if wall.catalog is not None:
+                found.append(wall.catalog.text.search(text))
+            if self.text.matches(wall.rid, text):
+                matching_walls.append(wall.rid)
+        found.append(self.family.II.TreeSet(matching_walls))
+        result = self.family.II.multiunion(found)
+        if cursor is not None:
+            return result.keys(min=cursor, excludemin=True)
+        return result
+
+
+def intersect_all(sets):
+    """ Intersect integer sets, starting with the smallest ones. """
+    intersection = family64.II.intersection
+    sets = sorted(sets, key=len)
+    result = sets[0]
+    for other in sets[1:]:
+        if not result:
+            break
+        result = intersection(result, other)
+    return result
+
+
+def _add_to(index, key, rid:int):
+    if key not in index:
+        index[key] = family64.II.TreeSet()
+    index[key].add(rid)
+
+
+def _remove_from(index, key, rid:int):
+    rids = index.get(key, None)
+    if rids is not None and rid in rids:
+        rids.remove(rid)
+        if not rids:
+            del index[key]
+
+
+def iter_contained(resource):
+    for obj in resource.values():
+        yield obj
+        yield from iter_contained(obj)
+
+
+def reindex_wall(wall):
+    """ Index everything within wall from scratch, creating the catalog if needed.
+        Returns the number of indexed resources.
+    """
+    if wall.catalog is None:
+        wall.catalog = WallCatalog()
+    catalog = wall.catalog
+    catalog.clear()
+    for obj in iter_contained(wall):
+        catalog.index(obj)
+    return len(catalog)
+
+
+def reindex_root(root):
+    """ Index all walls and their content in the global catalog from scratch, creating it if needed.
+        Returns the number of indexed resources.
+    """
+    if root.catalog is None:
+        root.catalog = GlobalCatalog()
+    catalog = root.catalog
+    catalog.clear()
+    for wall in root.values():
+        if IWall.providedBy(wall):
+            catalog.index(wall, wall)
+            for obj in iter_contained(wall):
+                catalog.index(obj, wall)
+    return len(catalog)
+
+
+def _catalogs(resource, wall):
+    """ The wall catalog and the global catalog. Either may be None if the migration scripts haven't run,
+        and then there's no point in indexing anything since they'll be built from scratch later.
+    """
+    root = find_interface(resource, IRoot)
+    return wall.catalog, getattr(root, 'catalog', None)
+
+
+def _index(resource, wall, include_contained=False):
+    wall_catalog, root_catalog = _catalogs(wall, wall)
+    objs = [resource]
+    if include_contained:
+        objs.extend(iter_contained(resource))
+    for obj in objs:
+        if wall_catalog is not None:
+            wall_catalog.index(obj)
+        if root_catalog is not None:
+            root_catalog.index(obj, wall)
+
+
+def _unindex(resource, wall, rids, wall_removed=False):
+    wall_catalog, root_catalog = _catalogs(resource, wall)
+    if wall_removed:
+        # The catalog of a removed wall is removed with it
+        wall_catalog = None
+    for rid in rids:
+        if wall_catalog is not None:
+            wall_catalog.unindex(rid)
+        if root_catalog is not None:
+            root_catalog.unindex(rid)
+
+
+def index_resources(event):
+    """ Index added or updated resources. Added resources may already contain other resources. """
+    resource = event.resource
+    wall = find_interface(resource, IWall)
+    if wall is None:
+        return
+    if IResourceUpdated.providedBy(event):
+        if event.changed and not event.changed & INDEXED_ATTRIBUTES:
+            return
+        _index(resource, wall)
+    else:
+        _index(resource, wall, include_contained=True)
+
+
+def unindex_resources(event):
+    resource = event.resource
+    wall = find_interface(resource, IWall)
+    if wall is None:
+        return
+    rids = [resource.rid]
+    rids.extend(event.contained_rids or ())
+    _unindex(resource, wall, rids, wall_removed=resource is wall)
+
+
+def reindex_moved_resources(event):
+    """ Resources moved to another wall should only be found in the new one. """
+    resource = event.resource
+    old_wall = find_interface(event.old_parent, IWall)
+    new_wall = find_interface(resource, IWall)
+    if old_wall is new_wall:
+        return
+    if old_wall is not None:
+        rids = [resource.rid]
+        rids.extend(event.contained_rids or ())
+        _unindex(event.old_parent, old_wall, rids)
+    if new_wall is not None:
+        _index(resource, new_wall, include_contained=True)
+
+
+def includeme(config):
+    config.add_subscriber(index_resources, IResourceAdded)
+    config.add_subscriber(index_resources, IResourceUpdated)
+    config.add_subscriber(unindex_resources, IResourceWillBeRemoved)
+    config.add_subscriber(reindex_moved_resources, IResourceMoved)
@@ -0,0 +1,108 @@
+from BTrees import family64
+from persistent import Persistent
+from pyramid.traversal import find_interface
+
+from kedja.interfaces import IResourceAdded
+from kedja.interfaces import IResourceMoved
+from kedja.interfaces import IResourceUpdated
+from kedja.interfaces import IResourceWillBeRemoved
+from kedja.interfaces import IWall
+
+
+# Kinds of things that are tracked
+RESOURCE = 'resource'
+RELATION = 'relation'
+
+
+class ChangeLog(Persistent):
+    """ Keeps track of what changed within a wall, so clients can fetch only what changed since their last sync.
+
+        Each change increases the sequence number. Only the latest 'max_entries' changes are kept,
+        anything older than that requires the client to reload the whole wall.
+    """
+    family = family64
+    max_entries = 1000
+
+    def __init__(self):
+        self.seq = 0
+        # seq -> (kind, id, removed)
+        self.entries = self.family.IO.BTree()
+
+    def add(self, kind:str, id:int, removed:bool=False):
+        """ Register a change and return the new sequence number. """
+        assert kind in (RESOURCE, RELATION)
+        self.seq += 1
+        self.entries[self.seq] = (kind, id, removed)
+        # Since one entry is added at a time, there's at most one to remove
+        self.entries.pop(self.seq - self.max_entries, None)
+        return self.seq
+
+    def add_resource(self, rid:int, removed:bool=False):
+        return self.add(RESOURCE, rid, removed=removed)
+
+    def add_relation(self, relation_id:int, removed:bool=False):
+        return self.add(RELATION, relation_id, removed=removed)
+
+    def can_sync(self, since:int):
+        """ Are all changes after 'since' still kept? """
+        return 0 <= since <= self.seq and since >= self.seq - self.max_entries
+
+    def changed_since(self, since:int):
+        """ Return a dict with the kinds as keys. The values are dicts with ids as keys,
+            and a bool that's true if it was removed. The latest change to something wins.
+
+            Returns None if the changes are too old to be synced.
+        """
+        if not self.can_sync(since):
+            return
+        result = {RESOURCE: {}, RELATION: {}}
+        for (kind, id, removed) in self.entries.values(min=since, excludemin=True):
+            result[kind][id] = removed
+        return result
+
+
+def get_change_log(wall):
+    """ Return the change log of wall. Walls created before change tracking existed get one here,
+        so only use this when something is changed anyway.
+    """
+    if wall.changes is None:
+        wall.changes = ChangeLog()
+    return wall.changes
+
+
+def track_resource_changes(event):
+    """ Register any added, updated or removed resources, including contained ones, within the wall.
+    """
+    resource = event.resource
+    wall = find_interface(resource, IWall)
+    if wall is None:
+        return
+    removed = IResourceWillBeRemoved.providedBy(event)
+    changes = get_change_log(wall)
+    changes.add_resource(resource.rid, removed=removed)
+    for rid in getattr(event, 'contained_rids', None) or ():
+        changes.add_resource(rid, removed=removed)
+
+
+def track_moved_resources(event):
+    """ Moved resources are changed within the wall they were moved to.
+        If they were moved from another wall, they're removed from that one.
+    """
+    resource = event.resource
+    rids = [resource.rid]
+    rids.extend(event.contained_rids or ())
+    old_wall = find_interface(event.old_parent, IWall)
+    new_wall = find_interface(resource, IWall)
+    if old_wall is not None and old_wall is not new_wall:
+        for rid in rids:
+            get_change_log(old_wall).add_resource(rid, removed=True)
+    if new_wall is not None:
+        for rid in rids:
+            get_change_log(new_wall).add_resource(rid)
+
+
+def includeme(config):
+    config.add_subscriber(track_resource_changes, IResourceAdded)
+    config.add_subscriber(track_resource_changes, IResourceUpdated)
+    config.add_subscriber(track_resource_changes, IResourceWillBeRemoved)
+    config.add_subscriber(track_moved_resources, IResourceMoved)
@@ -1,10 +1,13 @@
 import base64
 import json
+from collections import OrderedDict
 from collections import UserDict
 from datetime import timedelta
 from logging import getLogger
 from random import choice
 from string import ascii_letters, digits
+from threading import Lock
+from time import monotonic
 
 from pyramid.decorator import reify
 from pyramid.threadlocal import get_current_registry
@@ -16,9 +19,81 @@ from kedja import _
 
 
 _DEFAULT = int(timedelta(days=7).total_seconds())
+# Don't push the sliding expiry forward more often than this (seconds)
+_REFRESH_INTERVAL = 60
+# The local cache is disabled unless a size is set
+_CACHE_TTL = 10
 logger = getLogger(__name__)
 
 
+def _get_setting(registry, name, default):
+    settings = getattr(registry, 'settings', None) or {}
+    return int(settings.get(name, default))
+
+
+class CredentialsCache(object):
+    """ A small in-process cache for credentials that have been verified against redis.
+
+        Entries are kept for 'ttl' seconds, and at most 'maxsize' entries are kept.
+        The least recently used ones are dropped first.
+        Note that credentials removed in another process may still be valid here until they expire from the cache.
+    """
+    clock = staticmethod(monotonic)
+
+    def __init__(self, maxsize=1000, ttl=_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> [cached_at, refreshed_at, data]
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key:str):
+        """ Return the entry as a list with [cached_at, refreshed_at, data], or None """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            if self.clock() - entry[0] >= self.ttl:
+                del self._entries[key]
+                return
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key:str, data:dict, refreshed_at=None):
+        now = self.clock()
+        if refreshed_at is None:
+            refreshed_at = now
+        with self._lock:
+            self._entries[key] = [now, refreshed_at, data]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key:str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def get_credentials_cache(registry=None):
+    """ Return the local credentials cache, or None if it isn't enabled.
+        Enable it by setting 'kedja.auth_cache_size', the TTL is set with 'kedja.auth_cache_ttl'.
+    """
+    if registry is None:
+        registry = get_current_registry()
+    try:
+        return registry.credentials_cache
+    except AttributeError:
+        cache = None
+        maxsize = _get_setting(registry, 'kedja.auth_cache_size', 0)
+        if maxsize > 0:
+            cache = CredentialsCache(maxsize, ttl=_get_setting(registry, 'kedja.auth_cache_ttl', _CACHE_TTL))
+        registry.credentials_cache = cache
+        return cache
+
+
 def _generate_token(length=50):
     out = ""
     for i in range(length):
@@ -29,6 +104,7 @@ def _generate_token(length=50):
 @implementer(ICredentials)
 class Credentials(UserDict):
     prefix = 'cred'
+    _ttl = None
 
     def __init__(self, userid:str, token:str=None, expires:int=_DEFAULT, registry=None, **kw):
         assert isinstance(userid, str), "Must be a string"
@@ -40,7 +116,11 @@ class Credentials(UserDict):
         super().__init__(userid=userid, token=token, expires=expires, **kw)
 
     def get_key(self):
-        return "{}.{}.{}".format(self.prefix, self.userid, self.token)
+        return self.make_key(self.userid, self.token)
+
+    @classmethod
+    def make_key(cls, userid, token):
+        return "{}.{}.{}".format(cls.prefix, userid, token)
 
     @reify
     def _conn(self):
@@ -54,32 +134,74 @@ class Credentials(UserDict):
             self._conn.setex(key, expires, payload)
         else:
             self._conn.set(key, payload)
+        self._ttl = None
+        cache = get_credentials_cache(self.registry)
+        if cache is not None:
+            cache.pop(key)
 
     def reset_expire(self):
         expires = self.get('expires', None)
         if expires:
             self._conn.expire(self.get_key(), expires)
+            self._ttl = expires
             return expires
 
     def valid_until(self):
+        if self._ttl is not None:
+            return self._ttl
         return self._conn.ttl(self.get_key())
 
     @classmethod
     def load(cls, userid, token, registry=None):
+        """ Load credentials and push the expiry forward.
+            The expiry is refreshed at most once every 'kedja.auth_refresh_interval' seconds.
+
+            Fetching the credentials and their TTL is done in a single round trip to redis.
+            If the local cache is enabled, redis will only be asked when the expiry needs a refresh
+            or when the cached entry is too old.
+        """
         if registry is None:
             registry = get_current_registry()
-        key =  "{}.{}.{}".format(cls.prefix, userid, token)
+        key = cls.make_key(userid, token)
+        refresh_interval = _get_setting(registry, 'kedja.auth_refresh_interval', _REFRESH_INTERVAL)
+        cache = get_credentials_cache(registry)
+        if cache is not None:
+            entry = cache.get(key)
+            if entry is not None:
+                inst = cls(registry=registry, **entry[2])
+                now = cache.clock()
+                if now - entry[1] >= refresh_interval:
+                    inst.reset_expire()
+                    entry[1] = now
+                return inst
         conn = get_redis_conn(registry)
-        payload = conn.get(key)
+        pipe = conn.pipeline(transaction=False)
+        pipe.get(key)
+        pipe.ttl(key)
+        payload, ttl = pipe.execute()
         if payload:
             payload = payload.decode()
             data = json.loads(payload)
             inst = cls(registry=registry, **data)
-            inst.reset_expire()
+            expires = inst.get('expires', None)
+            # Seconds since the expiry was last refreshed
+            elapsed = 0
+            if expires and (ttl < 0 or expires - ttl >= refresh_interval):
+                inst.reset_expire()
+            else:
+                inst._ttl = ttl
+                if expires:
+                    elapsed = expires - ttl
+            if cache is not None:
+                cache.set(key, data, refreshed_at=cache.clock() - elapsed)
             return inst
 
     def clear(self):
-        self._conn.delete(self.get_key())
+        key = self.get_key()
+        self._conn.delete(key)
+        cache = get_credentials_cache(self.registry)
+        if cache is not None:
+            cache.pop(key)
 
     def header(self):
         merged = "%s:%s" % (self.userid, self.token)
@@ -0,0 +1,184 @@
+""" Serialization of export appstructs, see kedja.models.export_import.export_appstruct.
+
+    - yaml: the default, and what templates are stored as. Uses LibYAML when PyYAML was built with it.
+    - jsonl: JSON lines. The first line has everything except the export itself,
+      followed by one line per resource in depth-first order. Each resource has the rid of its parent,
+      or None for the exported resource. Much faster than YAML for large walls.
+    - msgpack: the same structure as yaml, but binary. Requires the msgpack package.
+
+    Any of them may be compressed with gzip, or with zstd if the zstandard package is installed.
+"""
+import gzip
+import json
+from datetime import date
+
+import yaml
+
+try:
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeDumper
+    from yaml import SafeLoader
+
+
+# name -> (content type, file extension)
+EXPORT_FORMATS = {
+    'yaml': ('text/yaml', 'yaml'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'msgpack': ('application/x-msgpack', 'msgpack'),
+}
+# name -> (content type, file extension)
+COMPRESSIONS = {
+    'gzip': ('application/gzip', 'gz'),
+    'zstd': ('application/zstd', 'zst'),
+}
+
+
+def yaml_dump(data, stream=None):
+    """ Like yaml.safe_dump, but with the C dumper if it's available. """
+    return yaml.dump(data, stream=stream, Dumper=SafeDumper, default_flow_style=False)
+
+
+def yaml_load(stream):
+    """ Like yaml.safe_load, but with the C loader if it's available. """
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def _default(obj):
+    if isinstance(obj, date):
+        return obj.isoformat()
+    raise TypeError("Can't serialize %r" % obj)
+
+
+def _iter_flat(data, parent=None):
+    item = dict(data)
+    contained = item.pop('contained', ())
+    item['parent'] = parent
+    yield item
+    for x in contained:
+        yield from _iter_flat(x, parent=data['rid'])
+
+
+def dumps_jsonl(appstruct) -> bytes:
+    header = dict(appstruct)
+    export = header.pop('export')
+    lines = [json.dumps(header, default=_default)]
+    lines.extend(json.dumps(x, default=_default) for x in _iter_flat(export))
+    lines.append('')
+    return '\n'.join(lines).encode('utf-8')
+
+
+def loads_jsonl(body:bytes):
+    """ Rebuild the nested appstruct from JSON lines. """
+    lines = [x for x in body.decode('utf-8').splitlines() if x.strip()]
+    if not lines:
+        raise ValueError("No data")
+    appstruct = json.loads(lines[0])
+    by_rid = {}
+    for line in lines[1:]:
+        item = json.loads(line)
+        parent = item.pop('parent', None)
+        by_rid[item['rid']] = item
+        if parent is None:
+            if 'export' in appstruct:
+                raise ValueError("More than one exported resource")
+            appstruct['export'] = item
+        else:
+            try:
+                by_rid[parent].setdefault('contained', []).append(item)
+            except KeyError:
+                raise ValueError("Resource %r appears before its parent %r" % (item['rid'], parent))
+    if 'export' not in appstruct:
+        raise ValueError("No exported resource")
+    return appstruct
+
+
+def dumps_msgpack(appstruct) -> bytes:
+    import msgpack
+    return msgpack.packb(appstruct, default=_default, use_bin_type=True)
+
+
+def loads_msgpack(body:bytes):
+    import msgpack
+    return msgpack.unpackb(body, raw=False)
+
+
+def _dumps_yaml(appstruct) -> bytes:
+    return yaml_dump(appstruct).encode('utf-8')
+
+
+_DUMPERS = {
+    'yaml': _dumps_yaml,
+    'jsonl': dumps_jsonl,
+    'msgpack': dumps_msgpack,
+}
+_LOADERS = {
+    'yaml': yaml_load,
+    'jsonl': loads_jsonl,
+    'msgpack': loads_msgpack,
+}
+
+
+def compress(body:bytes, compression:str) -> bytes:
+    if compression == 'gzip':
+        return gzip.compress(body)
+    if compression == 'zstd':
+        import zstandard
+        return zstandard.ZstdCompressor().compress(body)
+    raise ValueError("Unknown compression %r" % compression)
+
+
+def decompress(body:bytes, compression:str) -> bytes:
+    if compression == 'gzip':
+        return gzip.decompress(body)
+    if compression == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    raise ValueError("Unknown compression %r" % compression)
+
+
+def _is_installed(module_name):
+    try:
+        __import__(module_name)
+    except ImportError:
+        return False
+    return True
+
+
+def format_available(name:str):
+    """ True if the format exists and what it needs is installed. """
+    if name == 'msgpack':
+        return _is_installed('msgpack')
+    return name in EXPORT_FORMATS
+
+
+def compression_available(name:str):
+    if name == 'zstd':
+        return _is_installed('zstandard')
+    return name in COMPRESSIONS
+
+
+def dumps_export(appstruct, format='yaml', compression=None) -> bytes:
+    """ Serialize an export appstruct. Raises ValueError for unknown formats or compressions,
+        and ImportError if they need something that isn't installed.
+    """
+    try:
+        dumper = _DUMPERS[format]
+    except KeyError:
+        raise ValueError("Unknown export format %r" % format)
+    body = dumper(appstruct)
+    if compression:
+        body = compress(body, compression)
+    return body
+
+
+def loads_export(body:bytes, format='yaml', compression=None):
+    """ The reverse of dumps_export. """
+    try:
+        loader = _LOADERS[format]
+    except KeyError:
+        raise ValueError("Unknown export format %r" % format)
+    if compression:
+        body = decompress(body, compression)
+    return loader(body)
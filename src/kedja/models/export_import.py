@@ -3,6 +3,7 @@ from random import randint
 
 from kedja.core import get_rid_map
 from kedja.core.mutator import Mutator
+from kedja.models.relations import drop_duplicate_relations
 
 from kedja.utils import utcnow, init_schema
 
@@ -17,7 +18,8 @@ def export_structure(context, request, contained=None):
     is_export_root = contained is None
     if contained is None:
         contained = []
-    data = context.__json__(request)
+    # Exports always need everything, regardless of what the request asked for
+    data = context.__json__(request, fields=None)
     if not is_export_root:
         contained.append(data)
     if len(context):
@@ -65,6 +67,10 @@ def import_structure(context, request, data:dict, new_rids=True):
         mapping = set_new_rids(rid_map, data)
         adjust_wall_relations(data, mapping)
         new_rids = False
+    appstruct = data['data']
+    if appstruct.get('relations'):
+        # Exports made before duplicates were checked may contain them
+        appstruct = dict(appstruct, relations=drop_duplicate_relations(appstruct['relations']))
     content = request.registry.content
     new_resource = content(data['type_name'])
     new_resource.rid = data['rid']
@@ -73,7 +79,7 @@ def import_structure(context, request, data:dict, new_rids=True):
     schema_factory = request.get_default_schema(new_resource)
     schema = init_schema(schema_factory, resource=new_resource, registry=request.registry)
     with Mutator(new_resource, schema, registry=request.registry) as m:
-        m.update(data['data'])
+        m.update(appstruct)
 
     for contained_data in data.get('contained', []):
         import_structure(new_resource, request, contained_data, new_rids=new_rids)
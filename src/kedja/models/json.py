@@ -1,6 +1,17 @@
+import json
+from collections import deque
 from datetime import datetime
+from logging import getLogger
 
 from pyramid.interfaces import IRendererFactory
+from pyramid.response import Response
+
+
+# Approximate size in bytes of each chunk written by streaming responses
+CHUNK_SIZE = 64 * 1024
+# Tried in this order when 'kedja.json_backend' is 'auto'
+JSON_BACKENDS = ('orjson', 'ujson', 'json')
+logger = getLogger(__name__)
 
 
 def datetime_adapter(obj, request):
@@ -11,10 +22,144 @@ def roles_adapter(obj, request):
     return str(obj)
 
 
-def includeme(config):
-    """ Include rendering special objects. """
+def get_json_adapters():
+    """ (type, adapter) pairs for objects the json module can't serialize. """
     from kedja.core.acl import Role
+    return (
+        (datetime, datetime_adapter),
+        (Role, roles_adapter),
+    )
+
+
+def _orjson_serializer():
+    import orjson
+    # Let the renderers adapters handle datetimes, and allow the same keys as the json module
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj, default=None, **kw):
+        # Other keyword arguments are meant for the json module
+        return orjson.dumps(obj, default=default, option=options).decode('utf-8')
+
+    return dumps
+
+
+def _ujson_serializer():
+    import ujson
+
+    def dumps(obj, default=None, **kw):
+        return ujson.dumps(obj, default=default, ensure_ascii=False, escape_forward_slashes=False)
+
+    return dumps
+
+
+def _json_serializer():
+    return json.dumps
+
+
+_SERIALIZER_FACTORIES = {
+    'orjson': _orjson_serializer,
+    'ujson': _ujson_serializer,
+    'json': _json_serializer,
+}
+
+
+def get_json_serializer(backend='auto'):
+    """ Return (name, serializer) for the JSON backend. The serializer works like json.dumps
+        with a 'default' argument, so it can be used by Pyramids json renderer.
 
+        'auto' picks the first installed backend in JSON_BACKENDS.
+        If the requested backend isn't installed, the json module is used instead.
+    """
+    names = JSON_BACKENDS if backend == 'auto' else (backend, 'json')
+    for name in names:
+        try:
+            factory = _SERIALIZER_FACTORIES[name]
+        except KeyError:
+            raise ValueError("Unknown JSON backend %r" % name)
+        try:
+            return name, factory()
+        except ImportError:
+            if backend != 'auto':
+                logger.warning("JSON backend %r isn't installed, using the json module", name)
+
+
+def json_dumps_factory(request):
+    """ Return a function that serializes a single object the same way Pyramids json renderer would.
+        That includes __json__ methods and the adapters from get_json_adapters.
+    """
+    renderer_factory = request.registry.getUtility(IRendererFactory, name='json')
+    serializer = renderer_factory.serializer
+    kw = renderer_factory.kw
+    adapters = get_json_adapters()
+
+    # Pyramid builds the same thing in a private method
+    def default(obj):
+        if hasattr(obj, '__json__'):
+            return obj.__json__(request)
+        for type_, adapter in adapters:
+            if isinstance(obj, type_):
+                return adapter(obj, request)
+        raise TypeError('%r is not JSON serializable' % (obj,))
+
+    def dumps(obj):
+        return serializer(obj, default=default, **kw)
+
+    return dumps
+
+
+def iter_chunks(fragments, chunk_size=CHUNK_SIZE):
+    """ Join JSON text fragments and yield them as encoded chunks of roughly chunk_size bytes. """
+    buffer = []
+    size = 0
+    for fragment in fragments:
+        buffer.append(fragment)
+        size += len(fragment)
+        if size >= chunk_size:
+            yield "".join(buffer).encode('utf-8')
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode('utf-8')
+
+
+class StreamingAppIter(object):
+    """ An app_iter that runs the requests finished callbacks when the server is done with it,
+        rather than when Pyramid is done with the request.
+        Callbacks like closing the ZODB connection must wait until all resources have been read.
+    """
+
+    def __init__(self, request, iterable):
+        self.request = request
+        self.iterable = iterable
+        self.finished_callbacks = deque(getattr(request, 'finished_callbacks', ()))
+        if self.finished_callbacks:
+            request.finished_callbacks.clear()
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def close(self):
+        close = getattr(self.iterable, 'close', None)
+        if close is not None:
+            close()
+        while self.finished_callbacks:
+            callback = self.finished_callbacks.popleft()
+            callback(self.request)
+
+
+def json_stream_response(request, fragments, chunk_size=CHUNK_SIZE):
+    """ Return a response that writes JSON text fragments while they're being produced,
+        instead of rendering the whole document first.
+    """
+    app_iter = StreamingAppIter(request, iter_chunks(fragments, chunk_size=chunk_size))
+    return Response(app_iter=app_iter, content_type='application/json', charset='utf-8')
+
+
+def includeme(config):
+    """ Include rendering special objects. """
     json_renderer = config.registry.getUtility(IRendererFactory, name="json")
-    json_renderer.add_adapter(datetime, datetime_adapter)
-    json_renderer.add_adapter(Role, roles_adapter)
+    backend = config.registry.settings.get('kedja.json_backend', 'auto')
+    name, json_renderer.serializer = get_json_serializer(backend)
+    logger.debug("Rendering JSON with %s", name)
+    for type_, adapter in get_json_adapters():
+        json_renderer.add_adapter(type_, adapter)
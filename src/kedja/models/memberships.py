@@ -0,0 +1,107 @@
+from BTrees import family64
+from persistent import Persistent
+from pyramid.traversal import find_interface
+
+from kedja.interfaces import IResourceAdded
+from kedja.interfaces import IResourceWillBeRemoved
+from kedja.interfaces import IRoot
+from kedja.interfaces import IWall
+
+
+class WallMemberships(Persistent):
+    """ Keeps track of which walls each user has any roles in, so they can be found without waking every wall.
+        Stored on the root. Updated when roles change on a wall, and when walls are added or removed.
+    """
+    family = family64
+
+    def __init__(self):
+        # userid -> integer TreeSet of wall rids
+        self.user_to_walls = self.family.IO.BTree()
+
+    def __len__(self):
+        return len(self.user_to_walls)
+
+    def add(self, userid, wall_rid:int):
+        userid = int(userid)
+        if userid not in self.user_to_walls:
+            self.user_to_walls[userid] = self.family.II.TreeSet()
+        self.user_to_walls[userid].add(wall_rid)
+
+    def remove(self, userid, wall_rid:int):
+        userid = int(userid)
+        walls = self.user_to_walls.get(userid, None)
+        if walls is not None and wall_rid in walls:
+            walls.remove(wall_rid)
+            if not walls:
+                del self.user_to_walls[userid]
+
+    def get_walls(self, userid):
+        """ Sorted integer set with the rids of the walls the user has roles in. """
+        if userid:
+            walls = self.user_to_walls.get(int(userid), None)
+            if walls is not None:
+                return walls
+        return self.family.II.TreeSet()
+
+    def update_wall(self, wall, userid):
+        """ Make sure the index reflects the roles userid currently has in wall. """
+        if wall.get_roles(userid):
+            self.add(userid, wall.rid)
+        else:
+            self.remove(userid, wall.rid)
+
+    def index_wall(self, wall):
+        for userid in wall._rolesdata.keys():
+            self.add(userid, wall.rid)
+
+    def unindex_wall(self, wall):
+        for userid in wall._rolesdata.keys():
+            self.remove(userid, wall.rid)
+
+    def clear(self):
+        self.user_to_walls.clear()
+
+
+def reindex_memberships(root):
+    """ Rebuild the index from scratch, creating it if needed. Returns the number of users with any walls. """
+    if root.wall_memberships is None:
+        root.wall_memberships = WallMemberships()
+    memberships = root.wall_memberships
+    memberships.clear()
+    for obj in root.values():
+        if IWall.providedBy(obj):
+            memberships.index_wall(obj)
+    return len(memberships)
+
+
+def _get_memberships(resource):
+    """ The index, or None if it's not there or hasn't been built yet. It will be built from scratch
+        by scripts/migrate_search_indexes.py, so changes before that don't matter.
+    """
+    root = find_interface(resource, IRoot)
+    return getattr(root, 'wall_memberships', None)
+
+
+def wall_roles_changed(wall, userid):
+    """ Called by walls when roles for userid changed. """
+    memberships = _get_memberships(wall)
+    if memberships is not None:
+        memberships.update_wall(wall, userid)
+
+
+def index_wall_memberships(event):
+    """ Walls may have roles before they're added. """
+    memberships = _get_memberships(event.resource)
+    if memberships is not None:
+        memberships.index_wall(event.resource)
+
+
+def unindex_wall_memberships(event):
+    memberships = _get_memberships(event.resource)
+    if memberships is not None:
+        memberships.unindex_wall(event.resource)
+
+
+def includeme(config):
+    config.add_subscriber(index_wall_memberships, IResourceAdded, context=IWall)
+    config.add_subscriber(unindex_wall_memberships, IResourceWillBeRemoved, context=IWall)
@@ -1,7 +1,7 @@
 from random import randrange
 
 from BTrees import family64
-from BTrees.OOBTree import OOSet
+from kedja.interfaces import IResourceMoved
 from kedja.interfaces import IResourceWillBeRemoved
 from persistent import Persistent
 from pyramid.traversal import find_interface
@@ -9,6 +9,7 @@ from pyramid.traversal import find_interface
 from kedja.interfaces import ICard
 from kedja.interfaces import ICollection
 from kedja.interfaces import IWall
+from kedja.models.changes import get_change_log
 
 
 def relation_dict(relation_id:int, members:list=()):
@@ -17,10 +18,14 @@ def relation_dict(relation_id:int, members:list=()):
 
 class RelationMap(Persistent):
     family = family64
+    __parent__ = None  # The wall, if any
 
     def __init__(self):
+        # rid -> integer TreeSet of relation ids
         self.rid_to_relations = self.family.IO.BTree()
         self.relation_to_rids = self.family.IO.BTree()
+        # canonical members (see members_key) -> relation_id
+        self.members_to_relation = self.family.OI.BTree()
 
     def __getitem__(self, relation_id:int):
         return self.relation_to_rids[relation_id]
@@ -32,44 +37,64 @@ class RelationMap(Persistent):
                 linked.remove(relation_id)
                 if not linked:
                     del self.rid_to_relations[x]
-        del self.relation_to_rids[relation_id]
+        members = self.relation_to_rids.pop(relation_id)
+        key = self.members_key(members)
+        if self.members_to_relation.get(key, None) == relation_id:
+            del self.members_to_relation[key]
+        self._track_change(relation_id, removed=True)
 
     def __setitem__(self, relation_id, rids):
         assert isinstance(relation_id, int)
-        self.can_create_relation(rids)
+        self.can_create_relation(rids, relation_id=relation_id)
         if relation_id in self:
             del self[relation_id]
+        self._add(relation_id, rids)
+
+    def _add(self, relation_id:int, rids):
+        """ Add to all indexes without any checks. """
         for x in rids:
             assert isinstance(x, int)
             if x not in self.rid_to_relations:
-                self.rid_to_relations[x] = OOSet()
+                self.rid_to_relations[x] = self.family.II.TreeSet()
             self.rid_to_relations[x].add(relation_id)
         self.relation_to_rids[relation_id] = tuple(rids)
+        self.members_to_relation[self.members_key(rids)] = relation_id
+        self._track_change(relation_id)
 
     def __contains__(self, relation_id:int):
         return relation_id in self.relation_to_rids
 
     def clear(self):
         """ Clear all relations. """
+        for relation_id in self.keys():
+            self._track_change(relation_id, removed=True)
         self.rid_to_relations.clear()
         self.relation_to_rids.clear()
+        self.members_to_relation.clear()
 
     def create(self, rids):
         relation_id = self.new_relation_id()
         self[relation_id] = rids
         return relation_id
 
-    def can_create_relation(self, rids):
-        """ Make sure a relation don't exist between these rids already"""
-        if len(rids) < 2:
+    @staticmethod
+    def members_key(rids):
+        """ The same members in any order give the same key. """
+        return tuple(sorted(set(rids)))
+
+    def find_duplicate(self, rids):
+        """ Return the relation_id of a relation with exactly these members, or None. """
+        return self.members_to_relation.get(self.members_key(rids), None)
+
+    def can_create_relation(self, rids, relation_id=None):
+        """ Make sure a relation don't exist between these rids already.
+            If relation_id is specified, that relation may already have these members.
+        """
+        if len(set(rids)) < 2:
             raise ValueError("It takes at least 2 to tango!")
-        rids = tuple(rids)
-        existing = self.find_relations(rids[0], *rids[1:])
-        if existing:
-            cmp_set = set(rids)
-            for rel_id in existing:
-                if self.get(rel_id) == cmp_set:
-                    raise ValueError("Already has relations: %s" % ", ".join(existing))
+        existing = self.find_duplicate(rids)
+        if existing is not None and existing != relation_id:
+            raise ValueError("Already has relation: %s" % existing)
 
     def get(self, relation_id, default=None):
         return self.relation_to_rids.get(relation_id, default)
@@ -86,15 +111,42 @@ class RelationMap(Persistent):
 
     def set_all_from_json(self, value:list):
         """ Set all relations at once, probably from an import.
-            Will clear existing relations!
+            Will remove any existing relations that aren't part of value!
 
             value must be a list with dicts that have the same structure as returned via 'get_as_json'.
+            Only relations that were added, changed or removed are touched.
+            Everything is validated before anything is changed.
+
+            Returns a tuple with sets of (added or changed, removed) relation ids.
         """
-        self.clear()
+        wanted = {}
+        seen_members = {}
         for item in value:
             relation_id = item['relation_id']
-            members = item['members']
-            self[relation_id] = members
+            members = tuple(item['members'])
+            assert isinstance(relation_id, int)
+            assert all(isinstance(x, int) for x in members)
+            key = self.members_key(members)
+            if len(key) < 2:
+                raise ValueError("It takes at least 2 to tango!")
+            if key in seen_members and seen_members[key] != relation_id:
+                raise ValueError("Relations %s and %s have the same members" % (seen_members[key], relation_id))
+            seen_members[key] = relation_id
+            wanted[relation_id] = members
+        removed = set()
+        changed = set()
+        for (relation_id, members) in self.relation_to_rids.items():
+            if relation_id not in wanted:
+                removed.add(relation_id)
+            elif wanted[relation_id] != members:
+                changed.add(relation_id)
+        for relation_id in removed | changed:
+            del self[relation_id]
+        for (relation_id, members) in wanted.items():
+            if relation_id in changed or relation_id not in self.relation_to_rids:
+                changed.add(relation_id)
+                self._add(relation_id, members)
+        return changed, removed
 
     def new_relation_id(self):
         """ Get an unused ID. It's not reserved in any way, so make sure to use it within the current transaction.
@@ -111,24 +163,93 @@ class RelationMap(Persistent):
     def find_relations(self, rid:int, *rids):
         """ Get relations that has one or more rids in them. All RIDs specified will be required for a match.
         """
-        first = set(self.rid_to_relations.get(rid, ()))
-        if rids:
-            return first.intersection(*[self.rid_to_relations.get(x, set()) for x in rids])
-        return first
+        return set(self._find_relations(rid, *rids))
+
+    def _find_relations(self, rid:int, *rids):
+        """ Same as find_relations, but returns an integer set. """
+        intersection = self.family.II.intersection
+        # Start with the smallest sets, so the result shrinks as fast as possible
+        found = sorted((self.rid_to_relations.get(x, None) for x in (rid,) + rids),
+                       key=lambda x: x is not None and len(x))
+        result = found[0]
+        if result is None:
+            return self.family.II.TreeSet()
+        for other in found[1:]:
+            if not result:
+                break
+            result = intersection(result, other)
+        return result
 
     def find_relevant_relation_ids(self, rids):
         """ Return all relation_ids that have anything to do with any of the specified rids.
         """
+        return set(self._find_relevant_relation_ids(rids))
+
+    def _find_relevant_relation_ids(self, rids):
+        """ Same as find_relevant_relation_ids, but returns a sorted integer set. """
         if isinstance(rids, int):
             rids = [rids]
-        found = set()
-        for x in rids:
-            found.update(self.find_relations(x))
-        return found
+        rid_to_relations = self.rid_to_relations
+        return self.family.II.multiunion([rid_to_relations[x] for x in rids if x in rid_to_relations])
+
+    def iter_relations(self, rids=None, cursor:int=None, limit:int=None):
+        """ Yield relations as json, sorted by relation_id. Only relations touching any of rids if specified.
+            Start after the relation_id 'cursor'. Returns at most 'limit' items if specified.
+        """
+        if rids is None:
+            relation_ids = self.relation_to_rids.keys(min=cursor, excludemin=cursor is not None)
+        else:
+            relation_ids = self._find_relevant_relation_ids(rids)
+            if cursor is not None:
+                relation_ids = relation_ids.keys(min=cursor, excludemin=True)
+        for (i, relation_id) in enumerate(relation_ids):
+            if limit is not None and i >= limit:
+                break
+            yield self.get_as_json(relation_id)
+
+    def merge_duplicates(self):
+        """ Remove relations with the same members as another relation, keeping the one with the lowest relation_id.
+            Data saved before duplicates were checked may contain them. Only the relations themselves are changed,
+            so run rebuild_index afterwards. (It does this itself too.)
+
+            Returns a dict with removed relation_id -> the relation_id that was kept.
+        """
+        kept = {}
+        duplicates = {}
+        for (relation_id, rids) in self.relation_to_rids.items():
+            key = self.members_key(rids)
+            if key in kept:
+                duplicates[relation_id] = kept[key]
+            else:
+                kept[key] = relation_id
+        for relation_id in duplicates:
+            del self.relation_to_rids[relation_id]
+            self._track_change(relation_id, removed=True)
+        return duplicates
+
+    def rebuild_index(self):
+        """ Rebuild the rid -> relations and members -> relation indexes, for instance when upgrading.
+            Any duplicates are removed first, see merge_duplicates.
+            Returns number of relations.
+        """
+        self.merge_duplicates()
+        self.rid_to_relations = self.family.IO.BTree()
+        self.members_to_relation = self.family.OI.BTree()
+        for (relation_id, rids) in self.relation_to_rids.items():
+            self.members_to_relation[self.members_key(rids)] = relation_id
+            for x in rids:
+                if x not in self.rid_to_relations:
+                    self.rid_to_relations[x] = self.family.II.TreeSet()
+                self.rid_to_relations[x].add(relation_id)
+        return len(self.relation_to_rids)
 
     def keys(self):
         return self.relation_to_rids.keys()
 
+    def _track_change(self, relation_id, removed=False):
+        if self.__parent__ is not None:
+            get_change_log(self.__parent__).add_relation(relation_id, removed=removed)
+
     def __len__(self):
         return len(self.relation_to_rids)
 
@@ -136,6 +257,20 @@ class RelationMap(Persistent):
         return self.relation_to_rids.iteritems()
 
 
+def drop_duplicate_relations(relations:list):
+    """ Return relations as json without the ones that have the same members as an earlier one.
+        For imports of walls exported before duplicates were checked.
+    """
+    seen = set()
+    results = []
+    for item in relations:
+        key = RelationMap.members_key(item['members'])
+        if key not in seen:
+            seen.add(key)
+            results.append(item)
+    return results
+
+
 def remove_contained_cards_relations(event):
     """ If a collection is removed, cleanup all relevant relations to/from cards that will be removed.
     """
@@ -155,6 +290,20 @@ def remove_card_relations(event):
         del wall.relations_map[relation_id]
 
 
+def remove_relations_moved_from_wall(event):
+    """ Relations only exist within a wall. Moving within the wall keeps them,
+        but if something is moved to another wall they're removed.
+    """
+    old_wall = find_interface(event.old_parent, IWall)
+    if old_wall is None or old_wall is find_interface(event.resource, IWall):
+        return
+    rids = [event.resource.rid]
+    rids.extend(event.contained_rids or ())
+    for relation_id in old_wall.relations_map.find_relevant_relation_ids(rids):
+        del old_wall.relations_map[relation_id]
+
+
 def includeme(config):
     config.add_subscriber(remove_contained_cards_relations, IResourceWillBeRemoved, context=ICollection)
     config.add_subscriber(remove_card_relations, IResourceWillBeRemoved, context=ICard)
+    config.add_subscriber(remove_relations_moved_from_wall, IResourceMoved)
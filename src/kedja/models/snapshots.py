@@ -0,0 +1,119 @@
+from collections import OrderedDict
+from threading import Lock
+
+import transaction
+from pyramid.threadlocal import get_current_registry
+from pyramid.traversal import find_interface
+
+from kedja.interfaces import IResourceAdded
+from kedja.interfaces import IResourceMoved
+from kedja.interfaces import IResourceUpdated
+from kedja.interfaces import IResourceWillBeRemoved
+from kedja.interfaces import IWall
+
+
+class WallSnapshotCache(object):
+    """ An in-process cache of serialized wall content, so walls that are read often don't need to be
+        serialized on each request.
+
+        Entries are stored per wall rid, together with a change token. An entry is only valid
+        as long as the token matches, so stale data is never returned even if another process changed the wall.
+        At most 'maxsize' walls are kept, the least recently used ones are dropped first.
+    """
+
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        # rid -> (token, data)
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, rid:int, token):
+        """ Return the cached data if it exists and the token matches, otherwise None. """
+        with self._lock:
+            entry = self._entries.get(rid)
+            if entry is None:
+                return
+            if entry[0] != token:
+                del self._entries[rid]
+                return
+            self._entries.move_to_end(rid)
+            return entry[1]
+
+    def set(self, rid:int, token, data:bytes):
+        with self._lock:
+            self._entries[rid] = (token, data)
+            self._entries.move_to_end(rid)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, rid:int):
+        with self._lock:
+            self._entries.pop(rid, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, rid:int):
+        return rid in self._entries
+
+
+def get_snapshot_cache(registry=None):
+    """ Return the wall snapshot cache, or None if it isn't enabled.
+        Enable it by setting 'kedja.wall_cache_size' to the number of walls to keep.
+    """
+    if registry is None:
+        registry = get_current_registry()
+    try:
+        return registry.wall_snapshot_cache
+    except AttributeError:
+        cache = None
+        settings = getattr(registry, 'settings', None) or {}
+        maxsize = int(settings.get('kedja.wall_cache_size', 0))
+        if maxsize > 0:
+            cache = WallSnapshotCache(maxsize)
+        registry.wall_snapshot_cache = cache
+        return cache
+
+
+def _invalidate_after_commit(status, cache, rids):
+    # Regardless of status - if the commit failed, the next request will simply build the snapshot again
+    for rid in rids:
+        cache.pop(rid)
+
+
+def _get_transaction(request):
+    """ The transaction of the request. Pyramid runs with an explicit transaction manager,
+        so the thread-local one is only used when there's no request, for instance in scripts.
+    """
+    tm = getattr(request, 'tm', None)
+    if tm is None:
+        return transaction.get()
+    return tm.get()
+
+
+def invalidate_wall_snapshot(event):
+    """ Drop the snapshot of any wall where something was added, updated, removed or moved,
+        once the transaction has been committed.
+    """
+    cache = get_snapshot_cache(event.registry)
+    if cache is None:
+        return
+    walls = [find_interface(event.resource, IWall)]
+    old_parent = getattr(event, 'old_parent', None)
+    if old_parent is not None:
+        walls.append(find_interface(old_parent, IWall))
+    txn = _get_transaction(event.request)
+    try:
+        rids = txn.data(cache)
+    except KeyError:
+        rids = set()
+        txn.set_data(cache, rids)
+        txn.addAfterCommitHook(_invalidate_after_commit, args=(cache, rids))
+    rids.update(x.rid for x in walls if x is not None)
+
+
+def includeme(config):
+    config.add_subscriber(invalidate_wall_snapshot, IResourceAdded)
+    config.add_subscriber(invalidate_wall_snapshot, IResourceUpdated)
+    config.add_subscriber(invalidate_wall_snapshot, IResourceWillBeRemoved)
+    config.add_subscriber(invalidate_wall_snapshot, IResourceMoved)
@@ -3,10 +3,11 @@ from logging import getLogger
 from pathlib import Path
 
 from kedja.interfaces import ITemplateFileUtil
+from kedja.models.export_formats import yaml_dump
+from kedja.models.export_formats import yaml_load
 from kedja.models.export_import import EXPORT_VERSION
 # from kedja.utils import utcnow
 from pyramid.exceptions import ConfigurationError
-from yaml import safe_dump, safe_load
 from zope.interface import implementer
 
 
@@ -24,7 +25,7 @@ class TemplateFileUtil(object):
     def read_appstruct(self, file_stem):
         fp = self._fp(file_stem)
         with open(fp, 'r') as stream:
-            result = safe_load(stream)
+            result = yaml_load(stream)
         return result
 
     def remove(self, file_stem):
@@ -39,7 +40,7 @@ class TemplateFileUtil(object):
         file_stem = str(appstruct['id'])
         fp = self._fp(file_stem)
         with open(fp, 'w') as fb:
-            safe_dump(appstruct, stream=fb, default_flow_style=False)
+            yaml_dump(appstruct, stream=fb)
         return file_stem
 
     def get_all_appstructs(self):
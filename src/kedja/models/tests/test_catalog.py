@@ -0,0 +1,214 @@
+from unittest import TestCase
+
+from pyramid import testing
+
+
+class WallCatalogTests(TestCase):
+
+    @property
+    def _cut(self):
+        from kedja.models.catalog import WallCatalog
+        return WallCatalog
+
+    def _card(self, rid, title='', int_indicator=-1):
+        from kedja.resources.card import Card
+        return Card(rid=rid, title=title, int_indicator=int_indicator)
+
+    def test_split_words(self):
+        from kedja.models.catalog import split_words
+        self.assertEqual(('hello', 'world'), split_words("Hello, world! hello"))
+
+    def test_index_and_search(self):
+        obj = self._cut()
+        obj.index(self._card(1, "Buy milk", 2))
+        obj.index(self._card(2, "Buy bread", 3))
+        obj.index(self._card(3, "Sell milk", 3))
+        self.assertEqual([1, 3], list(obj.search(text="milk")))
+        self.assertEqual([1], list(obj.search(text="MILK bu")))
+        self.assertEqual([2, 3], list(obj.search(int_indicator=3)))
+        self.assertEqual([3], list(obj.search(text="milk", int_indicator=3)))
+        self.assertEqual([2], list(obj.search(int_indicator_min=3, text="buy b")))
+
+    def test_search_range(self):
+        obj = self._cut()
+        for i in range(1, 6):
+            obj.index(self._card(i, int_indicator=i * 10))
+        self.assertEqual([2, 3, 4], list(obj.search(int_indicator_min=20, int_indicator_max=40)))
+        self.assertEqual([4, 5], list(obj.search(int_indicator_min=35)))
+
+    def test_search_nothing(self):
+        obj = self._cut()
+        obj.index(self._card(1, "Buy milk"))
+        self.assertEqual([], list(obj.search(text="cheese")))
+        self.assertEqual([], list(obj.search(text="!!")))
+        self.assertEqual([], list(obj.search(int_indicator=404)))
+        self.assertEqual([1], list(obj.search()))
+
+    def test_reindex(self):
+        obj = self._cut()
+        card = self._card(1, "Buy milk", 2)
+        obj.index(card)
+        card.title = "Buy cheese"
+        card.int_indicator = 5
+        obj.index(card)
+        self.assertEqual([], list(obj.search(text="milk")))
+        self.assertEqual([1], list(obj.search(text="cheese")))
+        self.assertEqual([], list(obj.search(int_indicator=2)))
+        self.assertNotIn('milk', obj.text.words)
+        self.assertNotIn(2, obj.int_indicator)
+
+    def test_unindex(self):
+        obj = self._cut()
+        obj.index(self._card(1, "Buy milk", 2))
+        obj.unindex(1)
+        obj.unindex(404)
+        self.assertEqual(0, len(obj))
+        self.assertFalse(len(obj.text.words))
+        self.assertFalse(len(obj.int_indicator))
+
+    def test_collections_have_no_indicator(self):
+        from kedja.resources.collection import Collection
+        obj = self._cut()
+        obj.index(Collection(rid=1, title="Todo"))
+        self.assertEqual([1], list(obj.search(text="todo")))
+        self.assertFalse(len(obj.int_indicator))
+
+
+class CatalogIntegrationTests(TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp()
+        self.config.include('kedja.testing.minimal')
+        self.config.include('kedja.resources')
+        self.config.include('kedja.models.catalog')
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def _fixture(self):
+        from kedja.resources.root import Root
+        from kedja.resources.wall import Wall
+        from kedja.resources.collection import Collection
+        from kedja.resources.card import Card
+        root = Root()
+        root['wall'] = wall = Wall(rid=2)
+        wall['collection'] = collection = Collection(rid=10, title="Todo")
+        collection['card'] = Card(rid=11, title="Buy milk", int_indicator=1)
+        collection['other'] = Card(rid=12, title="Sell bread")
+        return wall
+
+    def test_added(self):
+        wall = self._fixture()
+        self.assertEqual([10, 11, 12], list(wall.catalog.search()))
+        self.assertEqual([11], list(wall.catalog.search(text="milk")))
+
+    def test_updated(self):
+        from kedja.core.mutator import Mutator
+        from kedja.resources.card import CardSchema
+        wall = self._fixture()
+        with Mutator(wall['collection']['card'], CardSchema()) as m:
+            m.update({'title': 'Buy cheese', 'int_indicator': 3})
+        self.assertEqual([11], list(wall.catalog.search(text="cheese", int_indicator=3)))
+        self.assertEqual([], list(wall.catalog.search(text="milk")))
+
+    def test_removed_with_contained(self):
+        wall = self._fixture()
+        del wall['collection']
+        self.assertEqual(0, len(wall.catalog))
+
+    def test_moved_to_other_wall(self):
+        from kedja.resources.wall import Wall
+        wall = self._fixture()
+        wall.__parent__['other'] = other = Wall(rid=3)
+        wall.move('collection', other)
+        self.assertEqual(0, len(wall.catalog))
+        self.assertEqual([10, 11, 12], list(other.catalog.search()))
+
+    def test_reindex_wall(self):
+        from kedja.models.catalog import reindex_wall
+        wall = self._fixture()
+        wall.catalog.clear()
+        self.assertEqual(3, reindex_wall(wall))
+        self.assertEqual([10], list(wall.catalog.search(text="todo")))
+
+    def test_legacy_wall(self):
+        from kedja.models.catalog import reindex_wall
+        from kedja.resources.card import Card
+        wall = self._fixture()
+        del wall.catalog
+        wall['collection']['new'] = Card(rid=13)
+        del wall['collection']['other']
+        self.assertIsNone(wall.catalog)
+        self.assertEqual(3, reindex_wall(wall))
+        self.assertEqual([10, 11, 13], list(wall.catalog.search()))
+
+
+class GlobalCatalogTests(TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp()
+        self.config.include('kedja.testing.minimal')
+        self.config.include('kedja.resources')
+        self.config.include('kedja.models.catalog')
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def _fixture(self):
+        from kedja.resources.root import Root
+        from kedja.resources.wall import Wall
+        from kedja.resources.collection import Collection
+        from kedja.resources.card import Card
+        root = Root()
+        root['wall'] = wall = Wall(rid=2, title="Groceries")
+        wall['collection'] = collection = Collection(rid=10, title="Todo")
+        collection['card'] = Card(rid=11, title="Buy milk")
+        root['other'] = other = Wall(rid=3, title="Other todo")
+        other['collection'] = Collection(rid=20, title="Milk")
+        return root
+
+    def test_added(self):
+        root = self._fixture()
+        self.assertEqual([3, 10], list(root.catalog.search("todo", [root['wall'], root['other']])))
+        self.assertEqual([10], list(root.catalog.search("todo", [root['wall']])))
+        self.assertEqual([11, 20], list(root.catalog.search("milk", [root['wall'], root['other']])))
+        self.assertEqual([20], list(root.catalog.search("milk", [root['wall'], root['other']], cursor=11)))
+        self.assertEqual(3, root.catalog.wall_by_rid[3])
+        self.assertEqual(2, root.catalog.wall_by_rid[11])
+
+    def test_removed_wall(self):
+        root = self._fixture()
+        del root['wall']
+        self.assertEqual([3, 20], sorted(root.catalog.wall_by_rid.keys()))
+        self.assertEqual([], list(root.catalog.search("groceries", [root['other']])))
+
+    def test_removed_wall_catalog_untouched(self):
+        root = self._fixture()
+        wall = root['wall']
+        del root['wall']
+        # No point in writing to a catalog that's removed anyway
+        self.assertEqual([10, 11], list(wall.catalog.search()))
+
+    def test_moved_to_other_wall(self):
+        root = self._fixture()
+        root['wall'].move('collection', root['other'], newname='moved')
+        self.assertEqual([3, 10], list(root.catalog.search("todo", [root['other']])))
+        self.assertEqual(3, root.catalog.wall_by_rid[11])
+
+    def test_reindex_root(self):
+        from kedja.models.catalog import reindex_root
+        root = self._fixture()
+        root.catalog.clear()
+        self.assertEqual(5, reindex_root(root))
+        self.assertEqual([11], list(root.catalog.search("buy", [root['wall']])))
+        self.assertEqual([2], list(root.catalog.search("groc", [root['wall']])))
+
+    def test_legacy_root(self):
+        from kedja.models.catalog import reindex_root
+        from kedja.resources.card import Card
+        root = self._fixture()
+        del root.catalog
+        root['wall']['collection']['new'] = Card(rid=12, title="Buy bread")
+        self.assertIsNone(root.catalog)
+        self.assertEqual(6, reindex_root(root))
+        self.assertEqual([11, 12], list(root.catalog.search("buy", [root['wall']])))
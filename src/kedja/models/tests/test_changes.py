@@ -0,0 +1,127 @@
+from unittest import TestCase
+
+from pyramid import testing
+
+from kedja.models.changes import RELATION
+from kedja.models.changes import RESOURCE
+
+
+class ChangeLogTests(TestCase):
+
+    @property
+    def _cut(self):
+        from kedja.models.changes import ChangeLog
+        return ChangeLog
+
+    def test_add(self):
+        obj = self._cut()
+        self.assertEqual(obj.add_resource(10), 1)
+        self.assertEqual(obj.add_relation(20, removed=True), 2)
+        self.assertEqual(obj.seq, 2)
+        self.assertEqual(dict(obj.entries), {1: (RESOURCE, 10, False), 2: (RELATION, 20, True)})
+
+    def test_bounded(self):
+        obj = self._cut()
+        obj.max_entries = 3
+        for i in range(10):
+            obj.add_resource(i)
+        self.assertEqual(list(obj.entries.keys()), [8, 9, 10])
+
+    def test_changed_since(self):
+        obj = self._cut()
+        obj.add_resource(10)
+        obj.add_resource(11)
+        obj.add_resource(10, removed=True)
+        obj.add_relation(1)
+        self.assertEqual(obj.changed_since(1), {RESOURCE: {10: True, 11: False}, RELATION: {1: False}})
+        self.assertEqual(obj.changed_since(4), {RESOURCE: {}, RELATION: {}})
+
+    def test_changed_since_too_old(self):
+        obj = self._cut()
+        obj.max_entries = 3
+        for i in range(10):
+            obj.add_resource(i)
+        self.assertIsNone(obj.changed_since(6))
+        self.assertEqual(obj.changed_since(7), {RESOURCE: {7: False, 8: False, 9: False}, RELATION: {}})
+        self.assertIsNone(obj.changed_since(11))
+        self.assertIsNone(obj.changed_since(-1))
+
+
+class ChangeTrackingIntegrationTests(TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp()
+        self.config.include('kedja.testing.minimal')
+        self.config.include('kedja.resources')
+        self.config.include('kedja.models.changes')
+        self.config.include('kedja.models.relations')
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def _fixture(self):
+        from kedja.resources.root import Root
+        from kedja.resources.wall import Wall
+        from kedja.resources.collection import Collection
+        from kedja.resources.card import Card
+        root = Root()
+        root['wall'] = wall = Wall(rid=2)
+        wall['collection'] = collection = Collection(rid=10)
+        collection['card'] = Card(rid=11)
+        collection['other'] = Card(rid=12)
+        return wall
+
+    def test_added(self):
+        wall = self._fixture()
+        self.assertEqual(wall.changes.changed_since(0)[RESOURCE], {2: False, 10: False, 11: False, 12: False})
+
+    def test_updated(self):
+        from kedja.core.mutator import Mutator
+        from kedja.resources.card import CardSchema
+        wall = self._fixture()
+        seq = wall.changes.seq
+        card = wall['collection']['card']
+        with Mutator(card, CardSchema()) as m:
+            m.update({'title': 'Hello'})
+        self.assertEqual(wall.changes.changed_since(seq)[RESOURCE], {11: False})
+
+    def test_legacy_wall_gets_change_log(self):
+        from kedja.core.mutator import Mutator
+        from kedja.resources.card import CardSchema
+        wall = self._fixture()
+        del wall.changes
+        self.assertIsNone(wall.changes)
+        with Mutator(wall['collection']['card'], CardSchema()) as m:
+            m.update({'title': 'Hello'})
+        self.assertEqual(wall.changes.changed_since(0)[RESOURCE], {11: False})
+
+    def test_removed_with_contained(self):
+        wall = self._fixture()
+        seq = wall.changes.seq
+        del wall['collection']
+        self.assertEqual(wall.changes.changed_since(seq)[RESOURCE], {10: True, 11: True, 12: True})
+
+    def test_relations(self):
+        wall = self._fixture()
+        seq = wall.changes.seq
+        wall.relations_map[1] = [11, 12]
+        self.assertEqual(wall.changes.changed_since(seq)[RELATION], {1: False})
+        del wall['collection']['card']
+        self.assertEqual(wall.changes.changed_since(seq)[RELATION], {1: True})
+        self.assertEqual(wall.changes.changed_since(seq)[RESOURCE], {11: True})
+
+    def test_moved(self):
+        wall = self._fixture()
+        seq = wall.changes.seq
+        wall['collection'].move('card', wall, newname='card')
+        self.assertEqual(wall.changes.changed_since(seq)[RESOURCE], {11: False})
+
+    def test_moved_to_other_wall(self):
+        from kedja.resources.wall import Wall
+        wall = self._fixture()
+        wall.__parent__['other'] = other = Wall(rid=3)
+        seq = wall.changes.seq
+        other_seq = other.changes.seq
+        wall.move('collection', other)
+        self.assertEqual(wall.changes.changed_since(seq)[RESOURCE], {10: True, 11: True, 12: True})
+        self.assertEqual(other.changes.changed_since(other_seq)[RESOURCE], {10: False, 11: False, 12: False})
@@ -56,3 +56,118 @@ class CredentialsTests(TestCase):
     def test_iface(self):
         obj = self._cut('1', token="123")
         self.assertTrue(verifyObject(ICredentials, obj))
+
+    def test_load(self):
+        obj = self._cut('1', token="123", expires=100)
+        obj.save()
+        loaded = self._cut.load('1', '123')
+        self.assertEqual(loaded, obj)
+        self.assertAlmostEqual(loaded.valid_until(), 100, delta=1)
+        self.assertIsNone(self._cut.load('1', '404'))
+
+    def test_load_refreshes_expire_with_interval(self):
+        from kedja.utils import get_redis_conn
+        obj = self._cut('1', token="123", expires=100)
+        obj.save()
+        conn = get_redis_conn()
+        conn.expire(obj.get_key(), 90)
+        # Within the refresh interval
+        self.config.registry.settings['kedja.auth_refresh_interval'] = 20
+        self.assertAlmostEqual(self._cut.load('1', '123').valid_until(), 90, delta=1)
+        self.assertAlmostEqual(conn.ttl(obj.get_key()), 90, delta=1)
+        self.config.registry.settings['kedja.auth_refresh_interval'] = 10
+        self.assertEqual(self._cut.load('1', '123').valid_until(), 100)
+        self.assertAlmostEqual(conn.ttl(obj.get_key()), 100, delta=1)
+
+    def test_load_with_local_cache(self):
+        from kedja.utils import get_redis_conn
+        self.config.registry.settings['kedja.auth_cache_size'] = 10
+        obj = self._cut('1', token="123", expires=100)
+        obj.save()
+        self.assertEqual(self._cut.load('1', '123'), obj)
+        # Still there, even though redis doesn't have it any longer
+        get_redis_conn().delete(obj.get_key())
+        self.assertEqual(self._cut.load('1', '123'), obj)
+        obj.clear()
+        self.assertIsNone(self._cut.load('1', '123'))
+
+    def test_load_with_local_cache_refreshes_expire(self):
+        from kedja.models.credentials import get_credentials_cache
+        from kedja.utils import get_redis_conn
+        self.config.registry.settings['kedja.auth_cache_size'] = 10
+        self.config.registry.settings['kedja.auth_refresh_interval'] = 5
+        obj = self._cut('1', token="123", expires=100)
+        obj.save()
+        self._cut.load('1', '123')
+        conn = get_redis_conn()
+        conn.expire(obj.get_key(), 50)
+        cache = get_credentials_cache()
+        entry = cache.get(obj.get_key())
+        self._cut.load('1', '123')
+        self.assertAlmostEqual(conn.ttl(obj.get_key()), 50, delta=1)
+        entry[1] -= 5
+        self._cut.load('1', '123')
+        self.assertAlmostEqual(conn.ttl(obj.get_key()), 100, delta=1)
+
+
+class CredentialsCacheTests(TestCase):
+
+    @property
+    def _cut(self):
+        from kedja.models.credentials import CredentialsCache
+        return CredentialsCache
+
+    def test_maxsize(self):
+        obj = self._cut(maxsize=2)
+        obj.set('a', {})
+        obj.set('b', {})
+        obj.get('a')
+        obj.set('c', {})
+        self.assertEqual(len(obj), 2)
+        self.assertIsNotNone(obj.get('a'))
+        self.assertIsNone(obj.get('b'))
+
+    def test_ttl(self):
+        obj = self._cut(ttl=10)
+        now = [100]
+        obj.clock = lambda: now[0]
+        obj.set('a', {'userid': '1'})
+        now[0] = 109
+        self.assertEqual(obj.get('a')[2], {'userid': '1'})
+        now[0] = 110
+        self.assertIsNone(obj.get('a'))
+        self.assertEqual(len(obj), 0)
+
+    def test_pop(self):
+        obj = self._cut()
+        obj.set('a', {})
+        obj.pop('a')
+        obj.pop('404')
+        self.assertIsNone(obj.get('a'))
+
+
+class GetCredentialsCacheTests(TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp()
+
+    def tearDown(self):
+        testing.tearDown()
+
+    @property
+    def _fut(self):
+        from kedja.models.credentials import get_credentials_cache
+        return get_credentials_cache
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(self._fut(self.config.registry))
+
+    def test_enabled(self):
+        from kedja.models.credentials import CredentialsCache
+        self.config.registry.settings['kedja.auth_cache_size'] = '5'
+        self.config.registry.settings['kedja.auth_cache_ttl'] = '3'
+        cache = self._fut(self.config.registry)
+        self.assertIsInstance(cache, CredentialsCache)
+        self.assertEqual(cache.maxsize, 5)
+        self.assertEqual(cache.ttl, 3)
+        self.assertIs(cache, self._fut(self.config.registry))
@@ -0,0 +1,93 @@
+from datetime import datetime
+from unittest import TestCase
+from unittest import skipUnless
+
+from kedja.models.export_formats import format_available
+
+
+_appstruct = {
+    'version': 1,
+    'title': "Hello",
+    'id': 123,
+    'created': datetime(2020, 1, 2, 3, 4, 5),
+    'export': {
+        'type_name': 'Wall',
+        'rid': 2,
+        'data': {'title': "Hello", 'relations': [{'relation_id': 1, 'members': [4, 5]}]},
+        'contained': [
+            {
+                'type_name': 'Collection',
+                'rid': 3,
+                'data': {'title': "Collection"},
+                'contained': [
+                    {'type_name': 'Card', 'rid': 4, 'data': {'title': "Card", 'int_indicator': -1}},
+                    {'type_name': 'Card', 'rid': 5, 'data': {'title': "Other", 'int_indicator': 2}},
+                ]
+            },
+        ]
+    },
+}
+
+
+def _expected():
+    expected = dict(_appstruct)
+    expected['created'] = '2020-01-02T03:04:05'
+    return expected
+
+
+class ExportFormatsTests(TestCase):
+
+    def _dumps(self, *args, **kw):
+        from kedja.models.export_formats import dumps_export
+        return dumps_export(*args, **kw)
+
+    def _loads(self, *args, **kw):
+        from kedja.models.export_formats import loads_export
+        return loads_export(*args, **kw)
+
+    def test_yaml(self):
+        body = self._dumps(_appstruct)
+        self.assertIsInstance(body, bytes)
+        self.assertEqual(_appstruct, self._loads(body))
+
+    def test_jsonl(self):
+        body = self._dumps(_appstruct, format='jsonl')
+        # Header and each resource
+        self.assertEqual(5, len(body.splitlines()))
+        self.assertEqual(_expected(), self._loads(body, format='jsonl'))
+
+    def test_jsonl_gzip(self):
+        body = self._dumps(_appstruct, format='jsonl', compression='gzip')
+        self.assertEqual(b'\x1f\x8b', body[:2])
+        self.assertEqual(_expected(), self._loads(body, format='jsonl', compression='gzip'))
+
+    def test_jsonl_parent_missing(self):
+        body = self._dumps(_appstruct, format='jsonl')
+        lines = body.splitlines()
+        del lines[2]  # The collection
+        self.assertRaises(ValueError, self._loads, b'\n'.join(lines), format='jsonl')
+
+    def test_jsonl_no_export(self):
+        body = self._dumps(_appstruct, format='jsonl')
+        self.assertRaises(ValueError, self._loads, body.splitlines()[0], format='jsonl')
+        self.assertRaises(ValueError, self._loads, b'', format='jsonl')
+
+    @skipUnless(format_available('msgpack'), "msgpack isn't installed")
+    def test_msgpack(self):
+        body = self._dumps(_appstruct, format='msgpack')
+        self.assertEqual(_expected(), self._loads(body, format='msgpack'))
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, self._dumps, _appstruct, format='xml')
+        self.assertRaises(ValueError, self._loads, b'', format='xml')
+        self.assertRaises(ValueError, self._dumps, _appstruct, compression='rar')
+
+    def test_format_available(self):
+        self.assertTrue(format_available('yaml'))
+        self.assertTrue(format_available('jsonl'))
+        self.assertFalse(format_available('xml'))
+
+    def test_yaml_dump_matches_safe_dump(self):
+        from yaml import safe_dump
+        from kedja.models.export_formats import yaml_dump
+        self.assertEqual(safe_dump(_appstruct, default_flow_style=False), yaml_dump(_appstruct))
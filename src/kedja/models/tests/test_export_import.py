@@ -89,6 +89,22 @@ class ImporterTests(TestCase):
         self._fut(root, request, _data, new_rids=False)
         self.assertEqual(root["2"]["3"]["4"].title, "Hello from Card")
 
+    def test_import_drops_duplicate_relations(self):
+        from copy import deepcopy
+        root = _import_fixture(self.config)
+        request = testing.DummyRequest()
+        apply_request_extensions(request)
+        self.config.begin(request)
+        data = deepcopy(_data)
+        data["data"]["relations"] = [
+            {"relation_id": 1, "members": [4, 5]},
+            {"relation_id": 2, "members": [5, 4]},
+        ]
+        self._fut(root, request, data, new_rids=False)
+        self.assertEqual([1], list(root["2"].relations_map.keys()))
+        # The data itself isn't changed
+        self.assertEqual(2, len(data["data"]["relations"]))
+
     def test_dual_import_breaks(self):
         root = _import_fixture(self.config)
         request = testing.DummyRequest()
@@ -1,5 +1,11 @@
+import sys
 from datetime import datetime
+from importlib.util import find_spec
+from json import dumps
+from json import loads
 from unittest import TestCase
+from unittest import skipUnless
+from unittest.mock import patch
 
 from pyramid import testing
 from pyramid.renderers import render
@@ -21,4 +27,101 @@ class JSONAdapterTests(TestCase):
         testing.tearDown()
 
     def test_render_json(self):
-        self.assertEqual('{"hello_date": "1970-01-01T12:00:00+00:00"}', render('json', fixture_data))
+        self.assertEqual({"hello_date": "1970-01-01T12:00:00+00:00"}, loads(render('json', fixture_data)))
+
+    def test_dumps_factory_same_as_renderer(self):
+        from kedja.core.acl import Role
+        from kedja.models.json import json_dumps_factory
+        request = testing.DummyRequest()
+        data = dict(fixture_data, role=Role('ia'))
+        self.assertEqual(loads(render('json', data, request=request)), loads(json_dumps_factory(request)(data)))
+
+    def test_dumps_factory_unknown_type(self):
+        from kedja.models.json import json_dumps_factory
+        request = testing.DummyRequest()
+        self.assertRaises(TypeError, json_dumps_factory(request), object())
+
+
+class JSONBackendTests(TestCase):
+
+    def tearDown(self):
+        testing.tearDown()
+
+    @property
+    def _fut(self):
+        from kedja.models.json import get_json_serializer
+        return get_json_serializer
+
+    def _render(self, backend):
+        self.config = testing.setUp(settings={'kedja.json_backend': backend})
+        self.config.include('kedja.models.json')
+
+        class Renderable(object):
+            def __json__(self, request):
+                return {'rid': 1}
+
+        data = {'date': datetime(1970, 1, 1, 12, 00, tzinfo=UTC), 'res': [Renderable()], 2: "Två"}
+        return loads(render('json', data))
+
+    def test_json(self):
+        self.assertEqual(('json', dumps), self._fut('json'))
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, self._fut, '404')
+
+    def test_not_installed_falls_back(self):
+        with patch.dict(sys.modules, {'orjson': None, 'ujson': None}):
+            self.assertEqual(('json', dumps), self._fut('orjson'))
+            self.assertEqual(('json', dumps), self._fut('auto'))
+
+    def _check_output(self, backend):
+        expected = {'date': '1970-01-01T12:00:00+00:00', 'res': [{'rid': 1}], '2': "Två"}
+        self.assertEqual(expected, self._render(backend))
+
+    def test_same_output_json(self):
+        self._check_output('json')
+
+    @skipUnless(find_spec('orjson'), "orjson isn't installed")
+    def test_same_output_orjson(self):
+        self._check_output('orjson')
+
+    @skipUnless(find_spec('ujson'), "ujson isn't installed")
+    def test_same_output_ujson(self):
+        self._check_output('ujson')
+
+
+class StreamingAppIterTests(TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp()
+
+    def tearDown(self):
+        testing.tearDown()
+
+    @property
+    def _cut(self):
+        from kedja.models.json import StreamingAppIter
+        return StreamingAppIter
+
+    def test_finished_callbacks_run_on_close(self):
+        from pyramid.request import Request
+        L = []
+        request = Request.blank('/')
+        request.add_finished_callback(L.append)
+        app_iter = self._cut(request, [b'1', b'2'])
+        request._process_finished_callbacks()
+        self.assertEqual(L, [])
+        self.assertEqual(list(app_iter), [b'1', b'2'])
+        app_iter.close()
+        self.assertEqual(L, [request])
+
+
+class IterChunksTests(TestCase):
+
+    @property
+    def _fut(self):
+        from kedja.models.json import iter_chunks
+        return iter_chunks
+
+    def test_chunks(self):
+        self.assertEqual(list(self._fut(['[', '1', ', ', '2', ']'], chunk_size=3)), [b'[1, ', b'2]'])
@@ -0,0 +1,100 @@
+from unittest import TestCase
+
+from pyramid import testing
+
+from kedja.security import COLLABORATOR
+from kedja.security import WALL_OWNER
+
+
+class WallMembershipsTests(TestCase):
+
+    @property
+    def _cut(self):
+        from kedja.models.memberships import WallMemberships
+        return WallMemberships
+
+    def test_add_remove(self):
+        obj = self._cut()
+        obj.add('1', 10)
+        obj.add(1, 20)
+        obj.add(2, 10)
+        self.assertEqual([10, 20], list(obj.get_walls('1')))
+        obj.remove(1, 10)
+        obj.remove(1, 404)
+        obj.remove(404, 10)
+        self.assertEqual([20], list(obj.get_walls(1)))
+        obj.remove(1, 20)
+        self.assertNotIn(1, obj.user_to_walls)
+
+    def test_get_walls_nothing(self):
+        obj = self._cut()
+        self.assertEqual([], list(obj.get_walls(None)))
+        self.assertEqual([], list(obj.get_walls(1)))
+
+
+class MembershipsIntegrationTests(TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp()
+        self.config.include('kedja.testing.minimal')
+        self.config.include('kedja.resources')
+        self.config.include('kedja.security')
+        self.config.include('kedja.models.memberships')
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def _fixture(self):
+        from kedja.resources.root import Root
+        from kedja.resources.wall import Wall
+        root = Root()
+        root['wall'] = Wall(rid=2)
+        root['other'] = Wall(rid=3)
+        return root
+
+    def test_roles_changed(self):
+        root = self._fixture()
+        root['wall'].add_user_roles(100, WALL_OWNER)
+        root['other'].add_user_roles('100', COLLABORATOR)
+        self.assertEqual([2, 3], list(root.wall_memberships.get_walls(100)))
+        root['other'].remove_user_roles(100, COLLABORATOR)
+        self.assertEqual([2], list(root.wall_memberships.get_walls(100)))
+
+    def test_roles_kept_while_any_left(self):
+        root = self._fixture()
+        root['wall'].add_user_roles(100, WALL_OWNER, COLLABORATOR)
+        root['wall'].remove_user_roles(100, COLLABORATOR)
+        self.assertEqual([2], list(root.wall_memberships.get_walls(100)))
+
+    def test_wall_with_roles_added(self):
+        from kedja.resources.wall import Wall
+        root = self._fixture()
+        wall = Wall(rid=4)
+        wall.add_user_roles(100, WALL_OWNER)
+        root['new'] = wall
+        self.assertEqual([4], list(root.wall_memberships.get_walls(100)))
+
+    def test_wall_removed(self):
+        root = self._fixture()
+        root['wall'].add_user_roles(100, WALL_OWNER)
+        del root['wall']
+        self.assertEqual([], list(root.wall_memberships.get_walls(100)))
+
+    def test_reindex_memberships(self):
+        from kedja.models.memberships import reindex_memberships
+        root = self._fixture()
+        root['wall'].add_user_roles(100, WALL_OWNER)
+        root['other'].add_user_roles(200, WALL_OWNER)
+        root.wall_memberships.clear()
+        self.assertEqual(2, reindex_memberships(root))
+        self.assertEqual([3], list(root.wall_memberships.get_walls(200)))
+
+    def test_legacy_root(self):
+        from kedja.models.memberships import reindex_memberships
+        root = self._fixture()
+        del root.wall_memberships
+        root['wall'].add_user_roles(100, WALL_OWNER)
+        del root['other']
+        self.assertIsNone(root.wall_memberships)
+        self.assertEqual(1, reindex_memberships(root))
+        self.assertEqual([2], list(root.wall_memberships.get_walls(100)))
@@ -56,6 +56,144 @@ class RelationsTests(TestCase):
         self.assertEqual(map.find_relations(2, 3), {1, 2})
         self.assertEqual(map.find_relations(1, 2), {1})
 
+    def test_duplicates_not_allowed(self):
+        map = self._cut()
+        map[1] = (1, 2, 3)
+        self.assertRaises(ValueError, map.__setitem__, 2, (3, 1, 2))
+        self.assertRaises(ValueError, map.create, [2, 3, 1])
+        # Subsets are fine
+        map[2] = (1, 2)
+        self.assertEqual(map.find_duplicate((2, 1)), 2)
+        # Setting the same members again on the same relation
+        map[1] = (3, 2, 1)
+        self.assertEqual(map.find_duplicate((1, 2, 3)), 1)
+
+    def test_duplicate_index_cleaned_up(self):
+        map = self._cut()
+        map[1] = (1, 2)
+        map[1] = (2, 3)
+        self.assertIsNone(map.find_duplicate((1, 2)))
+        map[2] = (1, 2)
+        del map[1]
+        self.assertIsNone(map.find_duplicate((2, 3)))
+        self.assertEqual(len(map.members_to_relation), 1)
+        map.clear()
+        self.assertFalse(len(map.members_to_relation))
+
+    def test_too_few_members(self):
+        map = self._cut()
+        self.assertRaises(ValueError, map.create, [1])
+        self.assertRaises(ValueError, map.create, [1, 1])
+
+    def test_set_all_from_json(self):
+        map = self._cut()
+        map[1] = (1, 2)
+        map[2] = (2, 3)
+        map[3] = (3, 4)
+        kept = map.relation_to_rids
+        changed, removed = map.set_all_from_json([
+            {'relation_id': 1, 'members': [1, 2]},
+            {'relation_id': 2, 'members': [2, 5]},
+            {'relation_id': 4, 'members': [3, 4]},
+        ])
+        self.assertEqual({2, 4}, changed)
+        self.assertEqual({3}, removed)
+        self.assertIs(kept, map.relation_to_rids)
+        self.assertEqual([(1, (1, 2)), (2, (2, 5)), (4, (3, 4))], list(map))
+        self.assertEqual(map.find_relations(3), {4})
+        self.assertEqual(map.find_relations(5), {2})
+        self.assertEqual(map.find_duplicate((3, 4)), 4)
+        self.assertIsNone(map.find_duplicate((2, 3)))
+
+    def test_set_all_from_json_validates_first(self):
+        map = self._cut()
+        map[1] = (1, 2)
+        self.assertRaises(ValueError, map.set_all_from_json, [
+            {'relation_id': 2, 'members': [3, 4]},
+            {'relation_id': 3, 'members': [4, 3]},
+        ])
+        self.assertRaises(ValueError, map.set_all_from_json, [{'relation_id': 2, 'members': [3]}])
+        self.assertEqual([(1, (1, 2))], list(map))
+
+    def test_set_all_from_json_swap_members(self):
+        map = self._cut()
+        map[1] = (1, 2)
+        map[2] = (3, 4)
+        map.set_all_from_json([
+            {'relation_id': 1, 'members': [3, 4]},
+            {'relation_id': 2, 'members': [1, 2]},
+        ])
+        self.assertEqual(map.find_duplicate((1, 2)), 2)
+        self.assertEqual(map.find_duplicate((3, 4)), 1)
+
+    def test_find_relation_nothing_found(self):
+        map = self._cut()
+        map[1] = (1, 2, 3)
+        self.assertEqual(map.find_relations(1, 404), set())
+        self.assertEqual(map.find_relations(404), set())
+
+    def test_iter_relations(self):
+        map = self._cut()
+        map[1] = (1, 2)
+        map[2] = (2, 3)
+        map[3] = (3, 4)
+        self.assertEqual([1, 2, 3], [x['relation_id'] for x in map.iter_relations()])
+        self.assertEqual([2, 3], [x['relation_id'] for x in map.iter_relations(rids=[3])])
+        self.assertEqual([3], [x['relation_id'] for x in map.iter_relations(rids=[3], cursor=2)])
+        self.assertEqual([2], [x['relation_id'] for x in map.iter_relations(cursor=1, limit=1)])
+        self.assertEqual([], list(map.iter_relations(rids=[404])))
+
+    def test_rebuild_index(self):
+        map = self._cut()
+        map[1] = (1, 2)
+        map[2] = (2, 3)
+        map.rid_to_relations.clear()
+        map.members_to_relation.clear()
+        self.assertEqual(2, map.rebuild_index())
+        self.assertEqual(map.find_duplicate((3, 2)), 2)
+        self.assertEqual(map.find_relations(2), {1, 2})
+        self.assertEqual(map.find_relations(3), {2})
+
+    def test_rebuild_index_merges_duplicates(self):
+        map = self._cut()
+        map[1] = (1, 2)
+        map[3] = (3, 4)
+        # Possible in data saved before duplicates were checked
+        map.relation_to_rids[2] = (2, 1)
+        map.relation_to_rids[4] = (4, 3, 3)
+        self.assertEqual(2, map.rebuild_index())
+        self.assertEqual([1, 3], list(map.keys()))
+        self.assertEqual(map.find_duplicate((2, 1)), 1)
+        self.assertEqual(map.find_duplicate((3, 4)), 3)
+        self.assertEqual(map.find_relations(2), {1})
+
+    def test_can_create_relation_after_rebuild_with_duplicates(self):
+        map = self._cut()
+        map[1] = (1, 2)
+        map.relation_to_rids[2] = (2, 1)
+        map.members_to_relation[map.members_key((1, 2))] = 2
+        map.rebuild_index()
+        with self.assertRaises(ValueError) as cm:
+            map.can_create_relation((2, 1))
+        self.assertEqual("Already has relation: 1", str(cm.exception))
+        map.can_create_relation((2, 1), relation_id=1)
+
+    def test_merge_duplicates(self):
+        map = self._cut()
+        map[5] = (1, 2)
+        map.relation_to_rids[2] = (2, 1)
+        map.relation_to_rids[9] = (1, 2)
+        self.assertEqual({5: 2, 9: 2}, map.merge_duplicates())
+        self.assertEqual([2], list(map.keys()))
+        self.assertEqual({}, map.merge_duplicates())
+
+    def test_drop_duplicate_relations(self):
+        from kedja.models.relations import drop_duplicate_relations
+        relations = [{'relation_id': 5, 'members': [1, 2]},
+                     {'relation_id': 6, 'members': [2, 1]},
+                     {'relation_id': 7, 'members': [2, 3]}]
+        self.assertEqual([5, 7], [x['relation_id'] for x in drop_duplicate_relations(relations)])
+
     def test_find_relevant_relation_ids(self):
         map = self._cut()
         map[1] = (1, 2, 3)
@@ -107,3 +245,21 @@ class RelationsIntegrationTests(TestCase):
         wall.relations_map[1] = [11, 21]
         del wall['collection1']
         self.assertNotIn(1, wall.relations_map)
+
+    def test_card_moved_within_wall_keeps_relations(self):
+        wall, request = self._fixture()
+        wall.relations_map[1] = [11, 21]
+        wall['collection1'].move('c1', wall['collection2'], newname='c4')
+        self.assertEqual(wall.relations_map[1], (11, 21))
+
+    def test_moved_to_other_wall_removes_relations(self):
+        from kedja.resources.wall import Wall
+        from kedja.resources.collection import Collection
+        wall, request = self._fixture()
+        wall.relations_map[1] = [11, 21]
+        wall.relations_map[2] = [12, 22]
+        wall.__parent__['other'] = other = Wall()
+        other['collection'] = Collection(rid=30)
+        wall.move('collection1', other)
+        self.assertNotIn(1, wall.relations_map)
+        self.assertNotIn(2, wall.relations_map)
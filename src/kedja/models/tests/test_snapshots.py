@@ -0,0 +1,101 @@
+from unittest import TestCase
+
+import transaction
+from pyramid import testing
+
+
+class WallSnapshotCacheTests(TestCase):
+
+    @property
+    def _cut(self):
+        from kedja.models.snapshots import WallSnapshotCache
+        return WallSnapshotCache
+
+    def test_get_set(self):
+        cache = self._cut()
+        self.assertIsNone(cache.get(1, 5))
+        cache.set(1, 5, b'{}')
+        self.assertEqual(b'{}', cache.get(1, 5))
+
+    def test_other_token(self):
+        cache = self._cut()
+        cache.set(1, 5, b'{}')
+        self.assertIsNone(cache.get(1, 6))
+        self.assertNotIn(1, cache)
+
+    def test_lru(self):
+        cache = self._cut(maxsize=2)
+        cache.set(1, 1, b'1')
+        cache.set(2, 1, b'2')
+        cache.get(1, 1)
+        cache.set(3, 1, b'3')
+        self.assertIn(1, cache)
+        self.assertNotIn(2, cache)
+        self.assertIn(3, cache)
+
+    def test_get_snapshot_cache(self):
+        from kedja.models.snapshots import get_snapshot_cache
+        registry = testing.DummyResource(settings={})
+        self.assertIsNone(get_snapshot_cache(registry))
+        registry = testing.DummyResource(settings={'kedja.wall_cache_size': '5'})
+        cache = get_snapshot_cache(registry)
+        self.assertEqual(5, cache.maxsize)
+        self.assertIs(cache, get_snapshot_cache(registry))
+
+
+class SnapshotInvalidationTests(TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp(settings={'kedja.wall_cache_size': '10'})
+        self.config.include('kedja.testing.minimal')
+        self.config.include('kedja.resources')
+        self.config.include('kedja.models.snapshots')
+        transaction.begin()
+
+    def tearDown(self):
+        transaction.abort()
+        testing.tearDown()
+
+    def _fixture(self):
+        from kedja.resources.root import Root
+        from kedja.resources.wall import Wall
+        from kedja.resources.collection import Collection
+        root = Root()
+        root['wall'] = wall = Wall(rid=2)
+        root['other'] = Wall(rid=3)
+        wall['collection'] = Collection(rid=10)
+        return root
+
+    def test_invalidated_after_commit(self):
+        from kedja.models.snapshots import get_snapshot_cache
+        root = self._fixture()
+        transaction.commit()
+        cache = get_snapshot_cache(self.config.registry)
+        cache.set(2, 1, b'{}')
+        cache.set(3, 1, b'{}')
+        del root['wall']['collection']
+        self.assertIn(2, cache)
+        transaction.commit()
+        self.assertNotIn(2, cache)
+        self.assertIn(3, cache)
+
+    def test_not_invalidated_on_abort(self):
+        from kedja.models.snapshots import get_snapshot_cache
+        root = self._fixture()
+        transaction.commit()
+        cache = get_snapshot_cache(self.config.registry)
+        cache.set(2, 1, b'{}')
+        del root['wall']['collection']
+        transaction.abort()
+        self.assertIn(2, cache)
+
+    def test_moved_invalidates_both(self):
+        from kedja.models.snapshots import get_snapshot_cache
+        root = self._fixture()
+        transaction.commit()
+        cache = get_snapshot_cache(self.config.registry)
+        cache.set(2, 1, b'{}')
+        cache.set(3, 1, b'{}')
+        root['wall'].move('collection', root['other'])
+        transaction.commit()
+        self.assertEqual(0, len(cache))
@@ -17,4 +17,7 @@ MANAGE_TEMPLATES = 'ManageTemplates'
 # Manage roles
 MANAGE_ROLES = 'ManageRoles'
 
+# Server status, like connection pool usage
+VIEW_STATUS = 'ViewStatus'
+
 
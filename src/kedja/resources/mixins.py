@@ -1,8 +1,10 @@
 from zope.interface import implementer
 
-from kedja.core.mutator import Mutator
 from kedja.interfaces import IResource
-from kedja.utils import init_schema
+from kedja.utils import get_schema_field_names
+
+
+_MARKER = object()
 
 
 @implementer(IResource)
@@ -28,12 +30,22 @@ class ResourceMixin(object):
 
 class JSONRenderable(object):
 
-    def __json__(self, request):
+    def __json__(self, request, fields=_MARKER):
+        """ Render the schema fields. If fields is specified, only those will be read.
+            It defaults to the fields requested via the querystring, see request.requested_fields.
+            None means everything.
+        """
+        if fields is _MARKER:
+            fields = getattr(request, 'requested_fields', None)
         schema_factory = request.get_default_schema(self)
-        if schema_factory is None:
-            appstruct = {}
-        else:
-            schema = init_schema(schema_factory, registry=request.registry, resource=self)
-            with Mutator(self, schema, registry=request.registry) as m:
-                appstruct = m.appstruct()
+        appstruct = {}
+        if schema_factory is not None:
+            # Same as Mutator.appstruct, but without building a schema for each resource
+            for name in get_schema_field_names(schema_factory, self, registry=request.registry):
+                if fields is not None and name not in fields:
+                    # Things like Wall.relations may be expensive, so don't even touch them
+                    continue
+                val = getattr(self, name, _MARKER)
+                if val is not _MARKER:
+                    appstruct[name] = val
         return {'type_name': self.__class__.__name__, 'rid': self.rid, 'data': appstruct}
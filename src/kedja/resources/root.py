@@ -3,11 +3,14 @@ from kedja.core.folder import Folder
 from kedja.core.rid_map import ResourceIDMap
 from zope.interface import implementer
 
+from kedja.models.catalog import GlobalCatalog
+from kedja.models.memberships import WallMemberships
 from kedja.resources.mixins import JSONRenderable
 from kedja.resources.security import SecurityAwareMixin
 from kedja.interfaces import IRoot
 from kedja.permissions import MANAGE_TEMPLATES
 from kedja.permissions import MANAGE_ROLES
+from kedja.permissions import VIEW_STATUS
 from kedja import _
 from kedja.core.permissions import Permissions
 
@@ -31,14 +34,20 @@ class Root(Folder, JSONRenderable, SecurityAwareMixin):
     acl_name = 'root'
     title = ""
 
+    # Roots created before these existed get them from scripts/migrate_search_indexes.py. Until then, they're None.
+    catalog = None
+    wall_memberships = None
+
     def __init__(self):
         super().__init__()
         self.rid = 1
         self.rid_map = ResourceIDMap(self)
+        self.catalog = GlobalCatalog()
+        self.wall_memberships = WallMemberships()
 
 
 ROOT_PERMISSIONS = Permissions(Root)
-ROOT_PERMISSIONS.add(MANAGE_TEMPLATES, MANAGE_ROLES)
+ROOT_PERMISSIONS.add(MANAGE_TEMPLATES, MANAGE_ROLES, VIEW_STATUS)
 
 
 def includeme(config):
@@ -50,6 +50,8 @@ class SecurityAwareMixin(object):
         if userid not in self._rolesdata:
             self._rolesdata[userid] = OOSet()
         self._rolesdata[userid].update(checked_roles)
+        self.invalidate_acl_cache()
+        self.roles_changed(userid)
 
     def remove_user_roles(self, userid:str, *roles):
         """ See kedja.interfaces.ISecurityAware """
@@ -64,6 +66,11 @@ class SecurityAwareMixin(object):
                 storage.remove(k)
         if not len(storage):
             del self._rolesdata[userid]
+        self.invalidate_acl_cache()
+        self.roles_changed(userid)
+
+    def roles_changed(self, userid:int):
+        """ Called when roles were added or removed for userid. Override to keep indexes up to date. """
 
     def get_roles(self, userid):
         if userid:
@@ -87,21 +94,44 @@ class SecurityAwareMixin(object):
         """ See kedja.interfaces.ISecurityAware """
         if request is None:
             request = get_current_request()
-        if not isinstance(userids, list):
+        if isinstance(userids, list):
+            userids = list(userids)
+        else:
             userids = [userids]
         if request.authenticated_userid and request.authenticated_userid not in userids:
             userids.insert(0, request.authenticated_userid)
         registry = request.registry
+        cache = getattr(request, 'acl_cache', None)
         for resource in lineage(self):
-            if ISecurityAware. providedBy(resource):
-                roles_map = resource.get_roles_map(userids)
-                # Get ACL
-                named_acl = resource.get_acl(registry)
-                if named_acl is not None:
-                    yield from named_acl.get_translated_acl(roles_map)
+            if ISecurityAware.providedBy(resource):
+                if cache is None:
+                    yield from resource.get_translated_acl(userids, registry)
+                else:
+                    # The translated ACL only depends on this resource, so anything contained
+                    # within it may reuse it for the rest of the request.
+                    key = (resource.acl_name, tuple(userids))
+                    resource_cache = cache.setdefault(resource, {})
+                    if key not in resource_cache:
+                        resource_cache[key] = list(resource.get_translated_acl(userids, registry))
+                    yield from resource_cache[key]
         # Finally, the stop bit!
         yield DENY_ALL
 
+    def get_translated_acl(self, userids, registry=None):
+        """ The part of the computed ACL that comes from this resource, with roles translated to userids. """
+        roles_map = self.get_roles_map(userids)
+        named_acl = self.get_acl(registry)
+        if named_acl is not None:
+            yield from named_acl.get_translated_acl(roles_map)
+
+    def invalidate_acl_cache(self, request=None):
+        """ Remove anything cached for this resource within the current request. """
+        if request is None:
+            request = get_current_request()
+        cache = getattr(request, 'acl_cache', None)
+        if cache is not None:
+            cache.pop(self, None)
+
     def get_acl(self, registry=None):
         """ See kedja.interfaces.ISecurityAware """
         if registry is None:
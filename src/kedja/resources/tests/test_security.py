@@ -168,6 +168,47 @@ class SecurityAwareMixinTests(TestCase):
             ]
         )
 
+    def test_get_computed_acl_cached(self):
+        parent = self._fixture()
+        child = parent['c']
+        request = testing.DummyRequest()
+        request.acl_cache = {}
+        expected = [
+            (Allow, '3', ('edit', 'delete')),
+            (Allow, Everyone, ('view',)),
+            (Deny, Everyone, ALL_PERMISSIONS),
+        ]
+        self.assertEqual(list(child.get_computed_acl([3], request)), expected)
+        self.assertIn(child, request.acl_cache)
+        self.assertIn(parent, request.acl_cache)
+        # Cached parts are reused
+        request.acl_cache[parent][('parent', (3,))] = []
+        self.assertEqual(list(child.get_computed_acl([3], request)), [expected[0], expected[2]])
+
+    def test_get_computed_acl_cache_invalidated_by_roles(self):
+        parent = self._fixture()
+        request = testing.DummyRequest()
+        request.acl_cache = {}
+        self.config.begin(request)
+        self.assertEqual(list(parent.get_computed_acl([3], request)),
+                         [(Allow, Everyone, ('view',)), (Deny, Everyone, ALL_PERMISSIONS)])
+        parent.add_user_roles(3, 'User')
+        self.assertEqual(list(parent.get_computed_acl([3], request)),
+                         [(Allow, '3', ('comment',)), (Allow, Everyone, ('view',)), (Deny, Everyone, ALL_PERMISSIONS)])
+        parent.remove_user_roles(3, 'User')
+        self.assertEqual(list(parent.get_computed_acl([3], request)),
+                         [(Allow, Everyone, ('view',)), (Deny, Everyone, ALL_PERMISSIONS)])
+
+    def test_get_computed_acl_cache_acl_name_changed(self):
+        parent = self._fixture()
+        child = parent['c']
+        request = testing.DummyRequest()
+        request.acl_cache = {}
+        self.assertEqual(list(child.get_computed_acl([3], request))[0], (Allow, '3', ('edit', 'delete')))
+        child.acl_name = '404'
+        self.assertEqual(list(child.get_computed_acl([3], request)),
+                         [(Allow, Everyone, ('view',)), (Deny, Everyone, ALL_PERMISSIONS)])
+
     def test_get_roles_map(self):
         parent = self._fixture()
         self.assertEqual({'1': {'Admin'}, '2': {'User'}}, parent.get_roles_map([1, 2, 3]))
@@ -1,8 +1,11 @@
 from unittest import TestCase
+from unittest.mock import PropertyMock
+from unittest.mock import patch
 
 from kedja.security import WALL_OWNER
 from kedja.testing import get_settings
 from pyramid import testing
+from pyramid.request import apply_request_extensions
 from zope.interface.verify import verifyObject
 
 from kedja.interfaces import IWall
@@ -38,6 +41,43 @@ class WallTests(TestCase):
         self.assertEqual(obj.relations, [{'relation_id': 10, 'members': [5,6]}])
 
 
+class WallJSONTests(TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp()
+        self.config.include('kedja.testing.minimal')
+        self.config.include('kedja.resources.wall')
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def _request(self, **params):
+        request = testing.DummyRequest(params=params)
+        apply_request_extensions(request)
+        return request
+
+    def test_json(self):
+        from kedja.resources.wall import Wall
+        wall = Wall(rid=2, title="Hello")
+        self.assertEqual({'rid': 2, 'type_name': 'Wall', 'data': {'title': 'Hello', 'acl_name': 'private_wall', 'relations': []}},
+                         wall.__json__(self._request()))
+
+    def test_json_requested_fields(self):
+        from kedja.resources.wall import Wall
+        wall = Wall(rid=2, title="Hello")
+        with patch.object(Wall, 'relations', new_callable=PropertyMock) as relations:
+            self.assertEqual({'rid': 2, 'type_name': 'Wall', 'data': {'title': 'Hello'}},
+                             wall.__json__(self._request(fields='title, 404')))
+            self.assertFalse(relations.called)
+            self.assertEqual({}, wall.__json__(self._request(fields=''))['data'])
+
+    def test_json_all_fields(self):
+        from kedja.resources.wall import Wall
+        wall = Wall(rid=2, title="Hello")
+        data = wall.__json__(self._request(fields='title'), fields=None)['data']
+        self.assertEqual({'title', 'acl_name', 'relations'}, set(data))
+
+
 class SetRoleFromAuthenticatedTests(TestCase):
 
     def setUp(self):
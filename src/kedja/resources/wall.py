@@ -7,6 +7,9 @@ from zope.interface import implementer
 
 from kedja import _, logger
 from kedja.interfaces import IWall, IResourceAdded
+from kedja.models.catalog import WallCatalog
+from kedja.models.changes import ChangeLog
+from kedja.models.memberships import wall_roles_changed
 from kedja.models.relations import RelationMap
 from kedja.resources.mixins import JSONRenderable
 from kedja.resources.security import SecurityAwareMixin
@@ -52,12 +55,21 @@ class WallSchema(colander.Schema):
 class Wall(Folder, JSONRenderable, SecurityAwareMixin):
     title = ""
     acl_name = "private_wall"
+    # Walls created before these existed get them from the migration scripts. Until then, they're None.
+    changes = None
+    catalog = None
 
     def __init__(self, **kw):
         super().__init__(**kw)
         self.relations_map = RelationMap()
+        self.relations_map.__parent__ = self
+        self.changes = ChangeLog()
+        self.catalog = WallCatalog()
         self.order = ()  # Enable ordering
 
+    def roles_changed(self, userid:int):
+        wall_roles_changed(self, userid)
+
     @property
     def relations(self):
         return list(self.relations_map.get_all_as_json())
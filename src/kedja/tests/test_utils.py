@@ -0,0 +1,184 @@
+from unittest import TestCase
+
+from pyramid import testing
+from pyramid.authorization import ACLAuthorizationPolicy
+from pyramid.request import apply_request_extensions
+from pyramid.security import forget
+
+from kedja.security import WALL_OWNER
+from kedja.testing import TestingAuthenticationPolicy
+
+
+class GetPermittedResourcesTests(TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp()
+        self.config.include('kedja.testing.minimal')
+        self.config.include('kedja.security')
+        self.config.include('kedja.security.default_acl')
+        self.config.include('kedja.models')
+        self.config.include('kedja.resources')
+        self.config.set_authorization_policy(ACLAuthorizationPolicy())
+        self.config.set_authentication_policy(TestingAuthenticationPolicy(userid='10'))
+
+    def tearDown(self):
+        testing.tearDown()
+
+    @property
+    def _fut(self):
+        from kedja.utils import get_permitted_resources
+        return get_permitted_resources
+
+    def _request(self):
+        request = testing.DummyRequest()
+        apply_request_extensions(request)
+        self.config.begin(request)
+        return request
+
+    def _fixture(self):
+        content = self.config.registry.content
+        root = content('Root')
+        root['wall'] = wall = content('Wall', rid=2)
+        for i in range(3):
+            wall[str(i)] = content('Collection', rid=10 + i)
+        return root
+
+    def test_contained(self):
+        request = self._request()
+        root = self._fixture()
+        wall = root['wall']
+        collections = list(wall.values())
+        self.assertEqual(self._fut(request, wall, collections), collections)
+
+    def test_one_check_per_permission(self):
+        request = self._request()
+        root = self._fixture()
+        wall = root['wall']
+        checked = []
+        has_permission = request.has_permission
+
+        def _counting_has_permission(permission, context=None):
+            checked.append(permission)
+            return has_permission(permission, context)
+
+        request.has_permission = _counting_has_permission
+        self._fut(request, wall, wall.values())
+        self.assertEqual(checked, ['Collection:View'])
+
+    def test_unauthenticated(self):
+        request = self._request()
+        forget(request)
+        root = self._fixture()
+        wall = root['wall']
+        self.assertEqual(self._fut(request, wall, wall.values()), [])
+
+    def test_security_aware_checked_individually(self):
+        request = self._request()
+        root = self._fixture()
+        content = self.config.registry.content
+        root['other'] = other = content('Wall', rid=3)
+        other.remove_user_roles(10, WALL_OWNER)
+        self.assertEqual(self._fut(request, root, [root['wall'], root['other']]), [root['wall']])
+
+
+class GetSchemaFieldNamesTests(TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp()
+        self.config.include('kedja.testing.minimal')
+        self.config.include('kedja.resources')
+
+    def tearDown(self):
+        testing.tearDown()
+
+    @property
+    def _fut(self):
+        from kedja.utils import get_schema_field_names
+        return get_schema_field_names
+
+    def test_compiled_once(self):
+        from kedja.resources.card import Card
+        from kedja.resources.card import CardSchema
+        registry = self.config.registry
+        self.assertEqual(self._fut(CardSchema, Card(), registry), ('title', 'int_indicator'))
+        self.assertIn(CardSchema, registry.schema_field_names)
+        registry.schema_field_names[CardSchema] = ('title',)
+        self.assertEqual(self._fut(CardSchema, Card(), registry), ('title',))
+
+    def test_subscribers_fire_for_each_resource(self):
+        from kedja.interfaces import ISchemaCreated
+        from kedja.resources.card import Card
+        from kedja.resources.card import CardSchema
+        L = []
+
+        def subscriber(event):
+            L.append(event.resource)
+            if event.resource.title == 'no indicator':
+                del event.schema['int_indicator']
+
+        self.config.add_subscriber(subscriber, ISchemaCreated)
+        card = Card()
+        other = Card(title='no indicator')
+        self.assertEqual(self._fut(CardSchema, card), ('title', 'int_indicator'))
+        self.assertEqual(self._fut(CardSchema, other), ('title',))
+        self.assertEqual(L, [card, other])
+
+
+class GetRedisConnTests(TestCase):
+
+    def _registry(self, **settings):
+        from pyramid.registry import Registry
+        registry = Registry('kedja')
+        registry.settings = {'kedja.redis_url': 'redis://localhost:6379/0'}
+        registry.settings.update(settings)
+        return registry
+
+    @property
+    def _fut(self):
+        from kedja.utils import get_redis_conn
+        return get_redis_conn
+
+    def test_pool_options(self):
+        from kedja.utils import get_redis_pool_options
+        self.assertEqual(
+            get_redis_pool_options({'kedja.redis_max_connections': '4', 'kedja.redis_pool_timeout': '0.5'}),
+            {'max_connections': 4, 'timeout': 0.5, 'socket_timeout': 5.0,
+             'socket_connect_timeout': 5.0, 'health_check_interval': 30}
+        )
+
+    def test_blocking_pool(self):
+        from redis import BlockingConnectionPool
+        registry = self._registry(**{'kedja.redis_max_connections': '4'})
+        conn = self._fut(registry)
+        self.assertIs(conn, self._fut(registry))
+        pool = conn.connection_pool
+        self.assertIsInstance(pool, BlockingConnectionPool)
+        self.assertEqual(pool.max_connections, 4)
+        self.assertEqual(pool.timeout, 5)
+        self.assertEqual(pool.connection_kwargs['health_check_interval'], 30)
+
+    def test_pool_stats(self):
+        from kedja.utils import get_redis_pool_stats
+        registry = self._registry(**{'kedja.redis_max_connections': '4'})
+        self.assertEqual(
+            get_redis_pool_stats(registry),
+            {'max_connections': 4, 'created': 0, 'available': 0, 'in_use': 0}
+        )
+
+    def test_pool_stats_internals_changed(self):
+        from kedja.utils import get_redis_pool_stats
+        registry = self._registry(**{'kedja.redis_max_connections': '4'})
+        pool = self._fut(registry).connection_pool
+        del pool._connections
+        pool.pool = object()
+        self.assertEqual(
+            get_redis_pool_stats(registry),
+            {'max_connections': 4, 'created': None, 'available': None, 'in_use': None}
+        )
+
+    def test_session_client_shared(self):
+        from kedja.utils import session_redis_client
+        registry = self._registry()
+        request = testing.DummyRequest()
+        request.registry = registry
+        self.assertIs(session_redis_client(request, url='redis://other'), self._fut(registry))
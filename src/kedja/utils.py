@@ -4,19 +4,44 @@ from datetime import datetime
 import pytz
 from pyramid.interfaces import INewRequest
 from pyramid.threadlocal import get_current_registry
+from redis import BlockingConnectionPool
 from redis import StrictRedis
 
 from kedja.events import SchemaCreated
 from kedja.interfaces import INamedACL
+from kedja.interfaces import ISchemaBound
+from kedja.interfaces import ISchemaCreated
 from kedja.interfaces import IResource
 from kedja.interfaces import IRole
+from kedja.permissions import VIEW
 
 
 def utcnow():
     return pytz.utc.localize(datetime.utcnow())
 
 
+# setting name -> (connection pool keyword, type, default)
+REDIS_POOL_SETTINGS = {
+    'kedja.redis_max_connections': ('max_connections', int, 10),
+    'kedja.redis_pool_timeout': ('timeout', float, 5),
+    'kedja.redis_socket_timeout': ('socket_timeout', float, 5),
+    'kedja.redis_socket_connect_timeout': ('socket_connect_timeout', float, 5),
+    'kedja.redis_health_check_interval': ('health_check_interval', int, 30),
+}
+
+
+def get_redis_pool_options(settings):
+    """ Keyword arguments for the connection pool, from the 'kedja.redis_*' settings. """
+    options = {}
+    for (name, (kw, type_, default)) in REDIS_POOL_SETTINGS.items():
+        options[kw] = type_(settings.get(name, default))
+    return options
+
+
 def get_redis_conn(registry=None):
+    """ Return the shared redis client. It's thread safe, and uses a blocking connection pool.
+        A thread waits at most 'kedja.redis_pool_timeout' seconds for a free connection.
+    """
     if registry is None:
         registry = get_current_registry()
     try:
@@ -27,14 +52,50 @@ def get_redis_conn(registry=None):
             from fakeredis import FakeStrictRedis
             registry.redis_conn = connection = FakeStrictRedis()
         else:
-            registry.redis_conn = connection = StrictRedis.from_url(registry.settings['kedja.redis_url'])
+            settings = registry.settings
+            pool = BlockingConnectionPool.from_url(settings['kedja.redis_url'], **get_redis_pool_options(settings))
+            registry.redis_conn = connection = StrictRedis(connection_pool=pool)
     return connection
 
 
+def get_redis_pool_stats(registry=None):
+    """ Return a dict with the usage of the redis connection pool.
+        'created' is the number of open connections, and 'in_use' the ones currently checked out.
+
+        redis-py has no public API for this, so it reads the pools' internals.
+        Anything that can't be read after an upgrade is None instead.
+    """
+    pool = get_redis_conn(registry).connection_pool
+    created = available = None
+    connections = getattr(pool, '_connections', None)
+    if connections is not None:
+        created = len(connections)
+    if isinstance(pool, BlockingConnectionPool):
+        queue = getattr(getattr(pool, 'pool', None), 'queue', None)
+        if queue is not None:
+            # Free slots in the queue are None
+            available = len([x for x in queue if x is not None])
+    else:
+        available_connections = getattr(pool, '_available_connections', None)
+        if available_connections is not None:
+            available = len(available_connections)
+    return {
+        'max_connections': getattr(pool, 'max_connections', None),
+        'created': created,
+        'available': available,
+        'in_use': None if created is None or available is None else created - available,
+    }
+
+
 def _redis_conn_rm(request):
     return get_redis_conn(request.registry)
 
 
+def session_redis_client(request, **redis_options):
+    """ Make pyramid_session_redis use the same client and connection pool. """
+    return get_redis_conn(request.registry)
+
+
 def get_role(name='', registry=None):
     if registry is None:
         registry = get_current_registry()
@@ -81,6 +142,42 @@ def init_schema(SchemaFactory, registry=None, **kw):
     return schema.bind(registry=registry, **kw)
 
 
+def has_schema_subscribers(registry=None):
+    """ Are there any subscribers for ISchemaCreated or ISchemaBound? They may modify schemas per resource. """
+    if registry is None:
+        registry = get_current_registry()
+    for iface in (ISchemaCreated, ISchemaBound):
+        if registry.adapters.subscriptions([iface], None):
+            return True
+    return False
+
+
+def get_schema_field_names(SchemaFactory, resource, registry=None):
+    """ Return the names of the fields within a schema, to be used when rendering resources.
+
+        Without any schema event subscribers the fields can't differ between resources,
+        so they're compiled once per registry and schema. Otherwise the schema is initialized for
+        this resource so the events fire as usual.
+
+        Note that after_bind may only be used for validators and similar, not to change the fields.
+    """
+    if registry is None:
+        registry = get_current_registry()
+    if has_schema_subscribers(registry):
+        schema = init_schema(SchemaFactory, registry=registry, resource=resource)
+        return tuple(x.name for x in schema.children)
+    try:
+        cache = registry.schema_field_names
+    except AttributeError:
+        cache = registry.schema_field_names = {}
+    try:
+        return cache[SchemaFactory]
+    except KeyError:
+        schema = init_schema(SchemaFactory, registry=registry, resource=resource)
+        field_names = cache[SchemaFactory] = tuple(x.name for x in schema.children)
+        return field_names
+
+
 def get_resource_type(resource):
     # This might change later on
     return resource.__class__.__name__
@@ -99,3 +196,40 @@ def get_permission_name(resource:IResource, permission_type:str, registry=None):
     assert content_type in registry.content
     assert content_type in registry.permissions
     return registry.permissions[content_type][permission_type]
+
+
+def get_permitted_resources(request, parent, resources, permission_type:str=VIEW):
+    """ Filter resources contained in parent and only return the ones where the current user has the permission
+        type, for instance 'View' -> 'Card:View'.
+
+        Resources without an ACL of their own inherit it from the same ancestor as parent does,
+        so they're decided with one permission check per permission name.
+        Anything with its own ACL is checked one by one.
+
+    :param request: The current request
+    :param parent: The resource containing all of the resources
+    :param resources: an iterable with resources
+    :param permission_type: what kind of permission to look up
+    :return: list of resources, in the same order
+    """
+    registry = request.registry
+    permission_names = {}
+    decided = {}
+    results = []
+    for resource in resources:
+        assert resource.__parent__ is parent, "%r is not contained in %r" % (resource, parent)
+        content_type = get_resource_type(resource)
+        try:
+            permission = permission_names[content_type]
+        except KeyError:
+            permission = permission_names[content_type] = get_permission_name(resource, permission_type, registry)
+        if hasattr(resource, '__acl__'):
+            allowed = request.has_permission(permission, resource)
+        else:
+            try:
+                allowed = decided[permission]
+            except KeyError:
+                allowed = decided[permission] = bool(request.has_permission(permission, resource))
+        if allowed:
+            results.append(resource)
+    return results
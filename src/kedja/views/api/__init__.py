@@ -2,12 +2,16 @@
 
 def includeme(config):
     config.include('.auth')
+    config.include('.batch')
     config.include('.cards')
     config.include('.collections')
     config.include('.export_import')
+    config.include('.move_copy')
     config.include('.permissions')
     config.include('.relations')
     config.include('.roles')
+    config.include('.search')
+    config.include('.status')
     config.include('.templates')
     config.include('.users')
     config.include('.walls')
@@ -1,18 +1,27 @@
+from hashlib import sha1
 from json import JSONDecodeError
 from logging import getLogger
 
 import colander
 from pyramid.decorator import reify
+from pyramid.httpexceptions import HTTPNotModified
+from pyramid.traversal import find_interface
 from pyramid.traversal import find_root
+from webob.etag import ETagMatcher
 
 from kedja.core.mutator import Mutator
+from kedja.interfaces import IWall
 from kedja.permissions import VIEW
 from kedja.utils import init_schema
-from kedja.utils import get_permission_name
+from kedja.utils import get_permitted_resources
 from kedja.utils import get_resource_type
 
 
 logger = getLogger(__name__)
+# Response header with the cursor to use for the next page, when paginating
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+# Max number of items per page
+MAX_PAGE_SIZE = 1000
 
 
 def add_error(request, msg="Doesn't exist", type='path', status=404):
@@ -58,6 +67,11 @@ class APIBase(object):
             self.error("JSON decode error: %s" % exc, type='body', status=400)
             return
 
+    def bad_payload(self, exc):
+        """ Abort the transaction and report exc as a bad payload. """
+        self.request.tm.doom()
+        self.error(str(exc), type='body', status=400)
+
     def check_type_name(self, resource, type_name=None):
         if type_name is None:
             return True
@@ -66,6 +80,52 @@ class APIBase(object):
         self.error("The fetched resource is not a %r" % type_name, type='path', status=404)
         return False
 
+    def get_etag(self, *resources):
+        """ A strong ETag for the current version of resources.
+            It's built from the ZODB serial of each resource, and the change counter of the wall they're in,
+            so it changes whenever something within the wall is added, updated or removed.
+
+            Returns None for walls without a change log, since changes to their content can't be detected.
+        """
+        parts = [str(self.request.authenticated_userid)]
+        fields = getattr(self.request, 'requested_fields', None)
+        if fields is not None:
+            # Different fields are different representations
+            parts.append(','.join(sorted(fields)))
+        for resource in resources:
+            parts.append(str(resource.rid))
+            parts.append(getattr(resource, '_p_serial', b'').hex())
+            wall = find_interface(resource, IWall)
+            if wall is not None:
+                if wall.changes is None:
+                    return
+                parts.append(str(wall.changes.seq))
+        return sha1(':'.join(parts).encode()).hexdigest()
+
+    def check_etag(self, *resources):
+        """ Set the ETag on the response. If the client already has this version,
+            return a '304 Not Modified' response that the view should return instead.
+        """
+        etag = self.get_etag(*resources)
+        if etag is None:
+            return
+        if_none_match = self.request.headers.get('If-None-Match')
+        if if_none_match and etag in ETagMatcher.parse(if_none_match, strong=False):
+            return HTTPNotModified(etag=etag)
+        self.request.response.etag = etag
+
+    def get_pagination(self, cursor_factory=int):
+        """ Return (cursor, limit) from the querystring, see PaginationQuerySchema. Both may be None. """
+        params = self.request.params
+        cursor = params.get('cursor', None)
+        limit = params.get('limit', None)
+        return (cursor and cursor_factory(cursor), limit and int(limit))
+
+    def set_next_cursor(self, cursor):
+        """ Tell the client where the next page starts. Nothing is set when there are no more pages. """
+        if cursor is not None:
+            self.request.response.headers[NEXT_CURSOR_HEADER] = str(cursor)
+
     def base_get(self, rid, type_name=None):
         """ Get specific resource. Validate type_name if specified. """
         resource = self.get_resource(rid)
@@ -101,8 +161,12 @@ class ResourceAPIBase(APIBase):
         appstruct = self.get_json_appstruct()
         schema_factory = self.request.get_default_schema(resource)
         schema = init_schema(schema_factory, resource=resource, registry=self.request.registry)
-        with Mutator(resource, schema, registry=self.request.registry) as m:
-            changed = m.update(appstruct)
+        try:
+            with Mutator(resource, schema, registry=self.request.registry) as m:
+                changed = m.update(appstruct)
+        except ValueError as exc:
+            # For instance relations with the same members. Don't keep anything that was changed before that.
+            return self.bad_payload(exc)
         # Log changed?
         return resource
 
@@ -114,23 +178,28 @@ class ResourceAPIBase(APIBase):
             parent.remove(resource.__name__)
             return {'removed': int(rid)}
 
-    def base_collection_get(self, parent, type_name=None):
+    def base_collection_get(self, parent, type_name=None, cursor:str=None, limit:int=None):
+        """ Permitted resources within parent. With a limit, only that many are returned
+            and the cursor for the next page is set on the response, see Folder.items_after.
+        """
         if parent is None:
             return
+        try:
+            items = parent.items_after(cursor)
+        except ValueError:
+            self.error("Invalid cursor", type='querystring', status=400)
+            return
         resources = []
-        for x in parent.values():
-            if type_name is None:
-                resources.append(x)
-            elif get_resource_type(x) == type_name:
-                resources.append(x)
-        results = []
-        # FIXME: This is really slow and needs to be cached. At least fetch things that we know could be okay,
-        # and then check
-        for x in resources:
-            view_perm = get_permission_name(x, VIEW)
-            if self.request.has_permission(view_perm, x):
-                results.append(x)
-        return results
+        for (item_cursor, name, x) in items:
+            if type_name is not None and get_resource_type(x) != type_name:
+                continue
+            if limit is not None and len(resources) == limit:
+                # There's at least one more
+                self.set_next_cursor(last_cursor)
+                break
+            resources.append(x)
+            last_cursor = item_cursor
+        return get_permitted_resources(self.request, parent, resources, VIEW)
 
     def base_collection_post(self, type_name, parent_rid=None, parent_type_name=None):
         new_res = self.request.registry.content(type_name)
@@ -166,10 +235,36 @@ class RelationIDPathSchema(RIDPathSchema):
     )
 
 
+class PaginationQuerySchema(colander.Schema):
+    limit = colander.SchemaNode(
+        colander.Int(),
+        title="Max number of items to return",
+        validator=colander.Range(1, MAX_PAGE_SIZE),
+        missing=colander.drop,
+    )
+    cursor = colander.SchemaNode(
+        colander.Int(),
+        title="Return items after this one. Use the value of the '%s' header from the last page." % NEXT_CURSOR_HEADER,
+        missing=colander.drop,
+    )
+
+
 class ResourceAPISchema(colander.Schema):
     path = RIDPathSchema()
 
 
+class FolderPaginationQuerySchema(PaginationQuerySchema):
+    cursor = colander.SchemaNode(
+        colander.String(),
+        title="Return items after this one. Use the value of the '%s' header from the last page." % NEXT_CURSOR_HEADER,
+        missing=colander.drop,
+    )
+
+
+class PaginatedResourceAPISchema(ResourceAPISchema):
+    querystring = FolderPaginationQuerySchema()
+
+
 class SubResourceAPISchema(colander.Schema):
     path = SubRIDPathSchema()
 
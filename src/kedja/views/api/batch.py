@@ -0,0 +1,229 @@
+import colander
+from cornice.resource import resource
+from cornice.resource import view
+from cornice.validators import colander_validator
+from pyramid.traversal import find_interface
+
+from kedja.core.mutator import Mutator
+from kedja.interfaces import IWall
+from kedja.permissions import ADD
+from kedja.permissions import DELETE
+from kedja.permissions import EDIT
+from kedja.utils import get_permission_name
+from kedja.utils import get_resource_type
+from kedja.utils import has_schema_subscribers
+from kedja.utils import init_schema
+from kedja.utils import validate_appstruct
+from kedja.views import validators
+from kedja.views.api.base import ResourceAPIBase
+from kedja.views.api.base import RIDPathSchema
+
+
+CREATE = 'create'
+UPDATE = 'update'
+REMOVE = 'delete'
+MOVE = 'move'
+
+# What can be created within the batch, and what kind of parent it needs
+ALLOWED_PARENTS = {
+    'Collection': 'Wall',
+    'Card': 'Collection',
+}
+
+
+class BatchError(Exception):
+    """ A single operation failed. """
+
+
+class BatchOperationSchema(colander.Schema):
+    op = colander.SchemaNode(
+        colander.String(),
+        validator=colander.OneOf([CREATE, UPDATE, REMOVE, MOVE]),
+    )
+    rid = colander.SchemaNode(
+        colander.Int(),
+        title="Resource to update, delete or move",
+        missing=None,
+    )
+    type_name = colander.SchemaNode(
+        colander.String(),
+        title="Type of resource to create",
+        validator=colander.OneOf(list(ALLOWED_PARENTS)),
+        missing=None,
+    )
+    parent = colander.SchemaNode(
+        colander.Int(),
+        title="Create within this resource",
+        missing=None,
+    )
+    data = colander.SchemaNode(
+        colander.Mapping(unknown='preserve'),
+        missing={},
+    )
+    before = colander.SchemaNode(
+        colander.Int(),
+        title="Move to directly before this resource",
+        missing=None,
+    )
+    after = colander.SchemaNode(
+        colander.Int(),
+        title="Move to directly after this resource",
+        missing=None,
+    )
+
+
+class BatchSchema(colander.Schema):
+    operations = colander.SchemaNode(
+        colander.Sequence(),
+        BatchOperationSchema(),
+        validator=colander.Length(1, 1000),
+    )
+
+
+class BatchAPISchema(colander.Schema):
+    title = "Run several operations at once"
+    path = RIDPathSchema()
+    body = BatchSchema(description="JSON payload")
+
+
+@resource(path='/api/1/walls/{rid}/batch',
+          cors_origins=('*',),
+          tags=['Walls'],
+          factory='kedja.root_factory')
+class BatchAPIView(ResourceAPIBase):
+    """ Create, update, delete and move cards and collections within a wall, within a single transaction.
+        Permissions are checked for each operation.
+    """
+    type_name = 'Wall'
+
+    def __init__(self, request, context=None):
+        super().__init__(request, context=context)
+        self._schemas = {}
+
+    @view(schema=BatchAPISchema(), validators=(colander_validator, validators.VIEW_RESOURCE))
+    def post(self):
+        """ Returns a list with one result per operation, in the same order.
+            Each result has a status that's either 'ok' or 'error'.
+            Operations that fail won't stop the others.
+        """
+        wall = self.base_get(self.request.matchdict['rid'], type_name=self.type_name)
+        if wall is None:
+            return
+        appstruct = self.get_json_appstruct()
+        validated = validate_appstruct(BatchSchema(), appstruct)
+        results = []
+        for operation in validated['operations']:
+            method = getattr(self, 'op_%s' % operation['op'])
+            try:
+                result = method(wall, operation)
+            except BatchError as exc:
+                result = {'status': 'error', 'msg': str(exc)}
+            except colander.Invalid as exc:
+                result = {'status': 'error', 'msg': 'Invalid data',
+                          'errors': exc.asdict(translate=self.request.localizer.translate)}
+            else:
+                result['status'] = 'ok'
+            result['op'] = operation['op']
+            results.append(result)
+        return results
+
+    def get_schema(self, resource):
+        """ Schemas are shared between resources of the same type, unless something may change them per resource. """
+        schema_factory = self.request.get_default_schema(resource)
+        registry = self.request.registry
+        if has_schema_subscribers(registry):
+            return init_schema(schema_factory, resource=resource, registry=registry, request=self.request)
+        try:
+            return self._schemas[schema_factory]
+        except KeyError:
+            schema = self._schemas[schema_factory] = init_schema(
+                schema_factory, registry=registry, request=self.request)
+            return schema
+
+    def get_wall_resource(self, wall, rid, type_name=None):
+        """ Fetch a resource within this wall. Only cards and collections are allowed. """
+        if rid is None:
+            raise BatchError("rid is required")
+        resource = self.root.rid_map.get_resource(rid)
+        if resource is None or find_interface(resource, IWall) is not wall or resource is wall:
+            raise BatchError("No resource with RID %s in this wall" % rid)
+        if type_name is None:
+            type_name = get_resource_type(resource)
+            if type_name not in ALLOWED_PARENTS:
+                raise BatchError("Can't change a %s here" % type_name)
+        elif get_resource_type(resource) != type_name:
+            raise BatchError("The resource with RID %s is not a %s" % (rid, type_name))
+        return resource
+
+    def check_permission(self, resource, permission_type, type_name=None):
+        registry = self.request.registry
+        if type_name is None:
+            permission = get_permission_name(resource, permission_type, registry=registry)
+        else:
+            permission = registry.permissions[type_name][permission_type]
+        if not self.request.has_permission(permission, resource):
+            raise BatchError("You're not allowed to do that")
+
+    def op_create(self, wall, operation):
+        type_name = operation['type_name']
+        if type_name is None:
+            raise BatchError("type_name is required")
+        parent_type_name = ALLOWED_PARENTS[type_name]
+        if parent_type_name == 'Wall' and operation['parent'] in (None, wall.rid):
+            parent = wall
+        else:
+            parent = self.get_wall_resource(wall, operation['parent'], type_name=parent_type_name)
+        self.check_permission(parent, ADD, type_name=type_name)
+        new_res = self.request.registry.content(type_name)
+        schema = self.get_schema(new_res)
+        # Validate before adding, so a failed operation won't leave anything behind
+        validated = validate_appstruct(schema, operation['data'])
+        new_res.rid = self.root.rid_map.new_rid()
+        parent.add(str(new_res.rid), new_res, registry=self.request.registry)
+        with Mutator(new_res, schema, registry=self.request.registry) as m:
+            m.update(validated)
+        return {'rid': new_res.rid, 'parent': parent.rid, 'type_name': type_name}
+
+    def op_update(self, wall, operation):
+        resource = self.get_wall_resource(wall, operation['rid'])
+        self.check_permission(resource, EDIT)
+        schema = self.get_schema(resource)
+        with Mutator(resource, schema, registry=self.request.registry) as m:
+            changed = m.update(operation['data'])
+        return {'rid': resource.rid, 'changed': sorted(changed)}
+
+    def op_delete(self, wall, operation):
+        resource = self.get_wall_resource(wall, operation['rid'])
+        self.check_permission(resource, DELETE)
+        resource.__parent__.remove(resource.__name__, registry=self.request.registry)
+        return {'rid': operation['rid']}
+
+    def op_move(self, wall, operation):
+        """ Move within the same parent, see Folder.move_before """
+        resource = self.get_wall_resource(wall, operation['rid'])
+        parent = resource.__parent__
+        self.check_permission(parent, EDIT)
+        if (operation['before'] is None) == (operation['after'] is None):
+            raise BatchError("Specify either before or after")
+        other_rid = operation['before'] if operation['after'] is None else operation['after']
+        other = self.get_wall_resource(wall, other_rid)
+        if other.__parent__ is not parent:
+            raise BatchError("Both resources must be within the same parent")
+        try:
+            if operation['before'] is not None:
+                previous, following = parent.move_before(
+                    resource.__name__, other.__name__, registry=self.request.registry)
+            else:
+                previous, following = parent.move_after(
+                    resource.__name__, other.__name__, registry=self.request.registry)
+        except ValueError as exc:
+            raise BatchError(str(exc))
+        return {
+            'rid': resource.rid,
+            'previous': previous and previous[1],
+            'next': following and following[1],
+        }
+
+
+def includeme(config):
+    config.scan(__name__)
@@ -6,6 +6,7 @@ from kedja.resources.card import CardSchema
 from kedja.views import validators
 from kedja.views.api.base import ResourceAPIBase
 from kedja.views.api.base import SubResourceAPISchema
+from kedja.views.api.base import PaginatedResourceAPISchema
 from kedja.views.api.base import ResourceAPISchema
 
 
@@ -32,7 +33,9 @@ class ContainedCardsAPI(ResourceAPIBase):
     def get(self):
         collection = self.base_get(self.request.matchdict['rid'], type_name=self.parent_type_name)
         if collection:
-            return self.contained_get(collection, self.request.matchdict['subrid'], type_name=self.type_name)
+            resource = self.contained_get(collection, self.request.matchdict['subrid'], type_name=self.type_name)
+            if resource is not None:
+                return self.check_etag(resource) or resource
 
     @view(schema=UpdateCardAPISchema(), validators=(colander_validator, validators.EDIT_CONTAINED_RESOURCE))
     def put(self):
@@ -42,10 +45,14 @@ class ContainedCardsAPI(ResourceAPIBase):
     def delete(self):
         return self.base_delete(self.request.matchdict['subrid'], type_name=self.type_name)
 
-    @view(schema=ResourceAPISchema(), validators=(colander_validator, validators.VIEW_RESOURCE))
+    @view(schema=PaginatedResourceAPISchema(), validators=(colander_validator, validators.VIEW_RESOURCE))
     def collection_get(self):
+        """ With 'limit', the next page is fetched by passing the 'X-Next-Cursor' header value as 'cursor'. """
         parent = self.base_get(self.request.matchdict['rid'], type_name=self.parent_type_name)
-        return self.base_collection_get(parent, type_name=self.type_name)
+        if parent is not None:
+            cursor, limit = self.get_pagination(cursor_factory=str)
+            return self.check_etag(parent) or self.base_collection_get(
+                parent, type_name=self.type_name, cursor=cursor, limit=limit)
 
     @view(schema=CreateCardSchema(), validators=(colander_validator, validators.ADD_CARD))
     def collection_post(self):
@@ -3,11 +3,13 @@ from cornice.resource import resource
 from cornice.validators import colander_validator
 from cornice.resource import view
 
+from kedja.events import ResourceUpdated
 from kedja.resources.collection import CollectionSchema
 from kedja.utils import validate_appstruct
 from kedja.views import validators
 from kedja.views.api.base import SubResourceAPISchema
 from kedja.views.api.base import ResourceAPIBase
+from kedja.views.api.base import PaginatedResourceAPISchema
 from kedja.views.api.base import ResourceAPISchema
 
 
@@ -42,7 +44,9 @@ class ContainedCollectionsAPI(ResourceAPIBase):
     def get(self):
         wall = self.base_get(self.request.matchdict['rid'], type_name=self.parent_type_name)
         if wall:
-            return self.contained_get(wall, self.request.matchdict['subrid'], type_name=self.type_name)
+            resource = self.contained_get(wall, self.request.matchdict['subrid'], type_name=self.type_name)
+            if resource is not None:
+                return self.check_etag(resource) or resource
 
     @view(schema=UpdateCollectionAPISchema(), validators=(colander_validator, validators.EDIT_CONTAINED_RESOURCE))
     def put(self):
@@ -52,10 +56,14 @@ class ContainedCollectionsAPI(ResourceAPIBase):
     def delete(self):
         return self.base_delete(self.request.matchdict['subrid'], type_name=self.type_name)
 
-    @view(schema=ResourceAPISchema(), validators=(colander_validator, validators.VIEW_RESOURCE))
+    @view(schema=PaginatedResourceAPISchema(), validators=(colander_validator, validators.VIEW_RESOURCE))
     def collection_get(self):
+        """ With 'limit', the next page is fetched by passing the 'X-Next-Cursor' header value as 'cursor'. """
         parent = self.base_get(self.request.matchdict['rid'], type_name=self.parent_type_name)
-        return self.base_collection_get(parent, type_name=self.type_name)
+        if parent is not None:
+            cursor, limit = self.get_pagination(cursor_factory=str)
+            return self.check_etag(parent) or self.base_collection_get(
+                parent, type_name=self.type_name, cursor=cursor, limit=limit)
 
     @view(schema=CreateCollectonSchema(), validators=(colander_validator, validators.ADD_COLLECTION))
     def collection_post(self):
@@ -111,10 +119,84 @@ class CollectionsOrderingAPIView(ResourceAPIBase):
             appstruct = self.get_json_appstruct()
             schema = CardOrderSchema().bind(request=self.request, context=self.context, collection=collection)
             validated = validate_appstruct(schema, appstruct)
-            # FIXME: Fire event?
             collection.order = validated['order']
+            self.request.registry.notify(
+                ResourceUpdated(collection, changed={'order'}, request=self.request, registry=self.request.registry)
+            )
             return self.base_collection_get(collection, type_name='Card')
 
 
+class ValidateCardInCollection(object):
+
+    def __init__(self, node, kw):
+        self.collection = kw['collection']
+
+    def __call__(self, node, value):
+        if str(value) not in self.collection:
+            raise colander.Invalid(node, "No card with that ID in this collection")
+
+
+class CardMoveSchema(colander.Schema):
+    rid = colander.SchemaNode(
+        colander.Int(),
+        title="The card to move",
+    )
+    before = colander.SchemaNode(
+        colander.Int(),
+        title="Place it directly before this card",
+        missing=None,
+    )
+    after = colander.SchemaNode(
+        colander.Int(),
+        title="Place it directly after this card",
+        missing=None,
+    )
+
+    def validator(self, node, value):
+        if (value['before'] is None) == (value['after'] is None):
+            raise colander.Invalid(node, "Specify either before or after")
+        if value['rid'] in (value['before'], value['after']):
+            raise colander.Invalid(node, "Can't move a card in relation to itself")
+
+    def after_bind(self, node, kw):
+        """ Use this instead of deferred, since cornice can't handle schema binding. """
+        for name in ('rid', 'before', 'after'):
+            node[name].validator = ValidateCardInCollection(node, kw)
+
+
+class CollectionCardMoveSchema(ResourceAPISchema):
+    title = "Move a card"
+    body = CardMoveSchema(description="JSON payload")
+
+
+@resource(path='/api/1/collections/{rid}/move',
+          cors_origins=('*',),
+          tags=['Collections'],
+          factory='kedja.root_factory')
+class CollectionsMoveAPIView(ResourceAPIBase):
+    type_name = 'Collection'
+
+    @view(schema=CollectionCardMoveSchema(), validators=(colander_validator, validators.EDIT_RESOURCE))
+    def put(self):
+        """ Move a single card before or after another card, without sending the whole order.
+            Returns the moved card and its new neighbours, null if there is none.
+        """
+        collection = self.base_get(self.request.matchdict['rid'], type_name=self.type_name)
+        if collection is not None:
+            appstruct = self.get_json_appstruct()
+            schema = CardMoveSchema().bind(request=self.request, context=self.context, collection=collection)
+            validated = validate_appstruct(schema, appstruct)
+            name = str(validated['rid'])
+            if validated['before'] is not None:
+                previous, following = collection.move_before(name, str(validated['before']))
+            else:
+                previous, following = collection.move_after(name, str(validated['after']))
+            return {
+                'rid': validated['rid'],
+                'previous': previous and previous[1],
+                'next': following and following[1],
+            }
+
+
 def includeme(config):
     config.scan(__name__)
@@ -1,15 +1,40 @@
+import colander
 from cornice.resource import resource
 from cornice.resource import view
 from cornice.validators import colander_validator
 from pyramid.response import Response
 from slugify import slugify
-from yaml import safe_dump
 
+from kedja.models.export_formats import COMPRESSIONS
+from kedja.models.export_formats import EXPORT_FORMATS
+from kedja.models.export_formats import compression_available
+from kedja.models.export_formats import dumps_export
+from kedja.models.export_formats import format_available
 from kedja.models.export_import import export_appstruct
 from kedja.models.export_import import export_structure
 from kedja.views import validators
 from kedja.views.api.base import ResourceAPIBase
-from kedja.views.api.base import ResourceAPISchema
+from kedja.views.api.base import RIDPathSchema
+
+
+class ExportQuerySchema(colander.Schema):
+    format = colander.SchemaNode(
+        colander.String(),
+        title="Export format. If it's not specified, the Accept header is used, and otherwise yaml.",
+        validator=colander.OneOf(sorted(EXPORT_FORMATS)),
+        missing=colander.drop,
+    )
+    compression = colander.SchemaNode(
+        colander.String(),
+        title="Compress the export",
+        validator=colander.OneOf(sorted(COMPRESSIONS)),
+        missing=colander.drop,
+    )
+
+
+class ExportAPISchema(colander.Schema):
+    path = RIDPathSchema()
+    querystring = ExportQuerySchema()
 
 
 @resource(path='/api/1/export/{rid}',
@@ -21,17 +46,45 @@ class ExportAPIView(ResourceAPIBase):
     """ Export """
     type_name = 'Wall'
 
-    @view(schema=ResourceAPISchema(), validators=(colander_validator, validators.VIEW_RESOURCE))
+    def get_format(self):
+        """ The format from the querystring, or the best match for the Accept header. """
+        format = self.request.params.get('format', None)
+        if format is None:
+            offers = {EXPORT_FORMATS[x][0]: x for x in sorted(EXPORT_FORMATS) if format_available(x)}
+            # yaml first, so it's used when anything goes
+            offered = sorted(offers, key=lambda x: offers[x] != 'yaml')
+            accepted = self.request.accept.acceptable_offers(offered)
+            format = accepted and offers[accepted[0][0]] or 'yaml'
+        if not format_available(format):
+            return self.error("The export format %r isn't available on this server" % format,
+                              type='querystring', status=406)
+        return format
+
+    @view(schema=ExportAPISchema(), validators=(colander_validator, validators.VIEW_RESOURCE))
     def get(self):
         resource = self.base_get(self.request.matchdict['rid'], type_name='Wall')
+        format = self.get_format()
+        compression = self.request.params.get('compression', None)
+        if compression and not compression_available(compression):
+            self.error("The compression %r isn't available on this server" % compression,
+                       type='querystring', status=406)
+        if resource is None or format is None or self.request.errors:
+            return
+        content_type, extension = EXPORT_FORMATS[format]
+        if compression:
+            content_type, compressed_extension = COMPRESSIONS[compression]
+            extension = "%s.%s" % (extension, compressed_extension)
         fname = slugify(resource.title, to_lower=True, max_length=50)
-        headers  = {}
+        headers  = {'Vary': 'Accept'}
         if 'view' not in self.request.params:
-            headers['Content-Disposition'] = "attachment; filename={}.yaml".format(fname)
+            headers['Content-Disposition'] = "attachment; filename={}.{}".format(fname, extension)
         data = export_structure(resource, self.request)
         appstruct = export_appstruct(data)
-        out = safe_dump(appstruct, default_flow_style=False)
-        return Response(body=out, content_type = 'text/yaml', headers=headers)
+        out = dumps_export(appstruct, format=format, compression=compression)
+        response = Response(body=out, headers=headers)
+        # With headers, Response won't set content_type itself
+        response.content_type = content_type
+        return response
 
 
 def includeme(config):
@@ -0,0 +1,96 @@
+import colander
+from cornice.resource import resource
+from cornice.resource import view
+from cornice.validators import colander_validator
+
+from kedja.permissions import ADD
+from kedja.utils import get_resource_type
+from kedja.views import validators
+from kedja.views.api.base import ResourceAPIBase
+from kedja.views.api.base import RIDPathSchema
+from kedja.views.api.batch import ALLOWED_PARENTS
+
+
+class TargetSchema(colander.Schema):
+    parent = colander.SchemaNode(
+        colander.Int(),
+        title="The new parent",
+    )
+
+
+class MoveCopyAPISchema(colander.Schema):
+    path = RIDPathSchema()
+    body = TargetSchema(description="JSON payload")
+
+
+class MoveCopyAPIBase(ResourceAPIBase):
+
+    def get_target(self, resource):
+        """ Return the new parent if it's valid and adding is allowed, otherwise None. """
+        type_name = get_resource_type(resource)
+        if type_name not in ALLOWED_PARENTS:
+            return self.error("Can't move or copy a %s" % type_name, type='path', status=400)
+        appstruct = self.get_json_appstruct()
+        if appstruct is None:
+            return
+        try:
+            parent_rid = TargetSchema().deserialize(appstruct)['parent']
+        except colander.Invalid as exc:
+            return self.error("Invalid payload: %s" % exc, type='body', status=400)
+        parent = self.base_get(parent_rid, type_name=ALLOWED_PARENTS[type_name])
+        if parent is None:
+            return
+        permission = self.request.registry.permissions[type_name][ADD]
+        if not self.request.has_permission(permission, parent):
+            return self.error("You're not allowed to add a %s there" % type_name, type='body', status=403)
+        return parent
+
+
+@resource(path='/api/1/move/{rid}',
+          cors_origins=('*',),
+          tags=['Cards', 'Collections'],
+          factory='kedja.root_factory')
+class MoveAPIView(MoveCopyAPIBase):
+    """ Move cards to another collection, or collections to another wall.
+        The rids stay the same, and relations are kept as long as the resource stays within the same wall.
+    """
+
+    @view(schema=MoveCopyAPISchema(), validators=(colander_validator, validators.DELETE_RESOURCE))
+    def post(self):
+        resource = self.get_resource(self.request.matchdict['rid'])
+        if resource is None:
+            return
+        parent = self.get_target(resource)
+        if parent is None:
+            return
+        if resource.__parent__ is parent:
+            return resource
+        if resource.__name__ in parent:
+            return self.error("The new parent already contains something with the same name",
+                              type='body', status=400)
+        resource.__parent__.move(resource.__name__, parent, registry=self.request.registry)
+        return resource
+
+
+@resource(path='/api/1/copy/{rid}',
+          cors_origins=('*',),
+          tags=['Cards', 'Collections'],
+          factory='kedja.root_factory')
+class CopyAPIView(MoveCopyAPIBase):
+    """ Copy cards or collections. The copy and everything within it will get new rids. Relations aren't copied.
+    """
+
+    @view(schema=MoveCopyAPISchema(), validators=(colander_validator, validators.VIEW_RESOURCE))
+    def post(self):
+        resource = self.get_resource(self.request.matchdict['rid'])
+        if resource is None:
+            return
+        parent = self.get_target(resource)
+        if parent is None:
+            return
+        name = resource.__parent__.copy(resource.__name__, parent, rid_as_name=True, registry=self.request.registry)
+        return parent[name]
+
+
+def includeme(config):
+    config.scan(__name__)
@@ -1,3 +1,5 @@
+import re
+
 import colander
 from cornice.resource import resource
 from cornice.resource import view
@@ -5,6 +7,7 @@ from cornice.validators import colander_validator
 from pyramid.decorator import reify
 
 from kedja.views import validators
+from kedja.views.api.base import PaginationQuerySchema
 from kedja.views.api.base import RIDPathSchema
 from kedja.views.api.base import RelationAPISchema
 from kedja.views.api.base import RelationIDPathSchema
@@ -12,6 +15,10 @@ from kedja.views.api.base import ResourceAPIBase
 from kedja.views.api.base import ResourceAPISchema
 
 
+# Rids may be negative
+RIDS_PATTERN = re.compile(r'^-?\d+(,-?\d+)*$')
+
+
 class RelationSchema(colander.Schema):
     members = colander.SchemaNode(
         colander.Sequence(),
@@ -22,6 +29,24 @@ class RelationSchema(colander.Schema):
     )
 
 
+def comma_separated_ints(node, value):
+    if not RIDS_PATTERN.match(value):
+        raise colander.Invalid(node, "Must be a comma-separated list of integers")
+
+
+class RelationsQuerySchema(PaginationQuerySchema):
+    rids = colander.SchemaNode(
+        colander.String(),
+        title="Only relations that have any of these rids as members, separated by comma",
+        validator=comma_separated_ints,
+        missing=colander.drop,
+    )
+
+
+class RelationsCollectionAPISchema(ResourceAPISchema):
+    querystring = RelationsQuerySchema()
+
+
 class CreateRelationAPISchema(colander.Schema):
     path = RIDPathSchema()
     body = RelationSchema()
@@ -66,7 +91,10 @@ class RelationsAPIView(ResourceAPIBase):
         relation_id = self.get_relation_id()
         appstruct = self.get_json_appstruct()
         if self.wall:
-            self.wall.relations_map[relation_id] = appstruct['members']
+            try:
+                self.wall.relations_map[relation_id] = appstruct['members']
+            except ValueError as exc:
+                return self.error(str(exc), type='body', status=400)
             return self.wall.relations_map.get_as_json(relation_id)
 
     @view(schema=RelationAPISchema(),
@@ -79,17 +107,34 @@ class RelationsAPIView(ResourceAPIBase):
                 return {'removed': relation_id}
             self.error("No relation with relation_id %r" % relation_id)
 
-    @view(schema=ResourceAPISchema(), validators=(colander_validator, validators.VIEW_RESOURCE))
+    @view(schema=RelationsCollectionAPISchema(), validators=(colander_validator, validators.VIEW_RESOURCE))
     def collection_get(self):
+        """ Relations sorted by relation_id. Use 'rids' to only get the ones that touch any of those resources.
+            With 'limit', the next page is fetched by passing the 'X-Next-Cursor' header value as 'cursor'.
+        """
         if self.wall:
-            return list(self.wall.relations_map.get_all_as_json())
+            rids = self.request.params.get('rids', None)
+            if rids is not None:
+                rids = [int(x) for x in rids.split(',')]
+            cursor, limit = self.get_pagination()
+            if limit is None:
+                return list(self.wall.relations_map.iter_relations(rids=rids, cursor=cursor))
+            # Fetch one more to know if there's another page
+            results = list(self.wall.relations_map.iter_relations(rids=rids, cursor=cursor, limit=limit + 1))
+            if len(results) > limit:
+                results = results[:limit]
+                self.set_next_cursor(results[-1]['relation_id'])
+            return results
 
     @view(schema=CreateRelationAPISchema(), validators=(colander_validator, validators.EDIT_RESOURCE))
     def collection_post(self):
         if self.wall:
             appstruct = self.get_json_appstruct()
             # The members part
-            relation_id = self.wall.relations_map.create(appstruct['members'])
+            try:
+                relation_id = self.wall.relations_map.create(appstruct['members'])
+            except ValueError as exc:
+                return self.error(str(exc), type='body', status=400)
             return self.wall.relations_map.get_as_json(relation_id)
 
 
@@ -0,0 +1,85 @@
+from itertools import islice
+
+import colander
+from cornice.resource import resource
+from cornice.resource import view
+from cornice.validators import colander_validator
+
+from kedja.permissions import VIEW
+from kedja.resources.wall import WALL_PERMISSIONS
+from kedja.utils import get_resource_type
+from kedja.views.api.base import APIBase
+from kedja.views.api.base import PaginationQuerySchema
+
+
+# Results per page if no limit is specified
+DEFAULT_LIMIT = 100
+
+
+class SearchQuerySchema(PaginationQuerySchema):
+    text = colander.SchemaNode(
+        colander.String(),
+        title="Words in the title. Each word matches the beginning of words.",
+        validator=colander.Length(min=1),
+    )
+
+
+class SearchAPISchema(colander.Schema):
+    querystring = SearchQuerySchema()
+
+
+@resource(path='/api/1/search',
+          cors_origins=('*',),
+          tags=['Search'],
+          factory='kedja.root_factory')
+class SearchAPIView(APIBase):
+    """ Search the titles of walls, collections and cards in all walls the current user may view. """
+
+    def get_visible_walls(self):
+        """ Walls the current user has roles in, and that they may view with those roles. """
+        walls = []
+        if self.root.wall_memberships is None:
+            # Not indexed yet, see scripts/migrate_search_indexes.py
+            return walls
+        get_resource = self.root.rid_map.get_resource
+        permission = WALL_PERMISSIONS[VIEW]
+        for rid in self.root.wall_memberships.get_walls(self.request.authenticated_userid):
+            wall = get_resource(rid)
+            if wall is not None and self.request.has_permission(permission, wall):
+                walls.append(wall)
+        return walls
+
+    @view(schema=SearchAPISchema(), validators=(colander_validator,))
+    def get(self):
+        """ Results are sorted by rid. If there are more results, the 'X-Next-Cursor' header
+            contains the cursor to use for the next page.
+        """
+        cursor, limit = self.get_pagination()
+        if limit is None:
+            limit = DEFAULT_LIMIT
+        walls = self.get_visible_walls()
+        if not walls or self.root.catalog is None:
+            return []
+        found = self.root.catalog.search(self.request.params['text'], walls, cursor=cursor)
+        # Fetch one more to know if there's another page
+        rids = list(islice(found, limit + 1))
+        if len(rids) > limit:
+            rids = rids[:limit]
+            self.set_next_cursor(rids[-1])
+        results = []
+        wall_by_rid = self.root.catalog.wall_by_rid
+        for rid in rids:
+            resource = self.root.rid_map.get_resource(rid)
+            if resource is None:  # pragma: no cover
+                continue
+            results.append({
+                'rid': rid,
+                'type_name': get_resource_type(resource),
+                'title': resource.title,
+                'wall': wall_by_rid[rid],
+            })
+        return results
+
+
+def includeme(config):
+    config.scan(__name__)
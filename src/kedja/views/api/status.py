@@ -0,0 +1,27 @@
+from cornice.resource import resource
+from cornice.resource import view
+from pyramid.settings import asbool
+
+from kedja.utils import get_redis_pool_stats
+from kedja.views import validators
+from kedja.views.api.base import APIBase
+
+
+@resource(path='/api/1/status/redis',
+          cors_origins=('*',),
+          tags=['Status'],
+          factory='kedja.root_factory')
+class RedisStatusAPIView(APIBase):
+    """ Usage of the redis connection pool. Useful when sizing 'kedja.redis_max_connections'
+        against the number of threads.
+    """
+
+    @view(validators=(validators.VIEW_STATUS,))
+    def get(self):
+        return get_redis_pool_stats(self.request.registry)
+
+
+def includeme(config):
+    # Only exposed when enabled in the settings
+    if asbool(config.registry.settings.get('kedja.redis_pool_stats', False)):
+        config.scan(__name__)
@@ -49,8 +49,10 @@ class TemplatesAPIView(APIBase):
     def post(self):
         template_id = self.request.matchdict['template_id']
         appstruct = self.tpl_util.read_appstruct(template_id)
-        new_resource = import_structure(self.root, self.request, appstruct['export'])
-        return new_resource
+        try:
+            return import_structure(self.root, self.request, appstruct['export'])
+        except ValueError as exc:
+            return self.bad_payload(exc)
 
 # Maybe later...
 #    @view(schema=None)
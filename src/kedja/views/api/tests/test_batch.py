@@ -0,0 +1,108 @@
+from json import dumps
+from unittest import TestCase
+
+from pyramid import testing
+from pyramid.authorization import ACLAuthorizationPolicy
+from pyramid.request import apply_request_extensions
+from transaction import commit
+from webtest import TestApp
+
+from kedja.security import WALL_OWNER
+from kedja.testing import get_settings
+from kedja.testing import TestingAuthenticationPolicy
+
+
+class FunctionalBatchAPIViewTests(TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp(settings=get_settings())
+        self.config.include('kedja.testing')
+        self.config.include('pyramid_tm')
+        self.config.include('kedja.views.api.batch')
+        self.config.include('kedja.views.exceptions')
+        self.config.include('kedja.security.default_acl')
+        self.config.set_authorization_policy(ACLAuthorizationPolicy())
+        self.config.set_authentication_policy(TestingAuthenticationPolicy(userid='100'))
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def _fixture(self):
+        from kedja import root_factory
+        request = testing.DummyRequest()
+        apply_request_extensions(request)
+        self.config.begin(request)
+        root = root_factory(request)
+        content = self.config.registry.content
+        root['wall'] = wall = content('Wall', rid=2)
+        wall.add_user_roles('100', WALL_OWNER)
+        wall['col'] = collection = content('Collection', rid=10)
+        collection['11'] = content('Card', rid=11)
+        collection['12'] = content('Card', rid=12)
+        root['other'] = other = content('Wall', rid=3)
+        other.add_user_roles('100', WALL_OWNER)
+        other['col'] = content('Collection', rid=20)
+        commit()
+        return root
+
+    def _post(self, app, operations, status=200):
+        return app.post('/api/1/walls/2/batch', params=dumps({'operations': operations}), status=status)
+
+    def test_create_update_delete_move(self):
+        app = TestApp(self.config.make_wsgi_app())
+        root = self._fixture()
+        response = self._post(app, [
+            {'op': 'create', 'type_name': 'Card', 'parent': 10, 'data': {'title': 'New'}},
+            {'op': 'update', 'rid': 11, 'data': {'title': 'Changed'}},
+            {'op': 'move', 'rid': 11, 'after': 12},
+            {'op': 'delete', 'rid': 12},
+            {'op': 'create', 'type_name': 'Collection', 'data': {'title': 'Col'}},
+        ])
+        results = response.json_body
+        self.assertEqual([x['status'] for x in results], ['ok'] * 5)
+        self.assertEqual(results[1]['changed'], ['title'])
+        collection = root['wall']['col']
+        new_rid = results[0]['rid']
+        self.assertEqual(collection[str(new_rid)].title, 'New')
+        self.assertEqual(collection['11'].title, 'Changed')
+        self.assertNotIn('12', collection)
+        self.assertEqual(collection.get_order_rids(), (11, new_rid))
+        self.assertEqual(results[4]['parent'], 2)
+        self.assertEqual(root['wall'][str(results[4]['rid'])].title, 'Col')
+
+    def test_move(self):
+        app = TestApp(self.config.make_wsgi_app())
+        root = self._fixture()
+        response = self._post(app, [{'op': 'move', 'rid': 12, 'before': 11}])
+        self.assertEqual(response.json_body, [{'op': 'move', 'status': 'ok', 'rid': 12, 'previous': None, 'next': 11}])
+        self.assertEqual(root['wall']['col'].get_order_rids(), (12, 11))
+
+    def test_errors_dont_stop_others(self):
+        app = TestApp(self.config.make_wsgi_app())
+        root = self._fixture()
+        response = self._post(app, [
+            {'op': 'update', 'rid': 404, 'data': {'title': 'Nope'}},
+            {'op': 'update', 'rid': 20, 'data': {'title': 'Other wall'}},
+            {'op': 'update', 'rid': 11, 'data': {'int_indicator': 'abc'}},
+            {'op': 'create', 'type_name': 'Card', 'parent': 2},
+            {'op': 'move', 'rid': 11},
+            {'op': 'update', 'rid': 12, 'data': {'title': 'Works'}},
+        ])
+        results = response.json_body
+        self.assertEqual([x['status'] for x in results], ['error'] * 5 + ['ok'])
+        self.assertIn('int_indicator', results[2]['errors'])
+        self.assertEqual(root['wall']['col']['12'].title, 'Works')
+        self.assertEqual(root['other']['col'].title, '')
+
+    def test_not_allowed(self):
+        app = TestApp(self.config.make_wsgi_app())
+        self._fixture()
+        self.config.set_authentication_policy(TestingAuthenticationPolicy(userid='200'))
+        app = TestApp(self.config.make_wsgi_app())
+        self._post(app, [{'op': 'delete', 'rid': 11}], status=403)
+
+    def test_bad_payload(self):
+        app = TestApp(self.config.make_wsgi_app())
+        self._fixture()
+        self._post(app, [], status=400)
+        self._post(app, [{'op': 'explode'}], status=400)
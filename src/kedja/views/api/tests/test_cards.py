@@ -133,6 +133,16 @@ class FunctionalCardsAPITests(TestCase):
         res_data.pop('data')  # To make testing easier
         self.assertEqual(res_data, {'rid': 4, 'type_name': 'Card'})
 
+    def test_get_not_modified(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = self._request()
+        self._fixture(request)
+        etag = app.get('/api/1/collections/3/cards/4', status=200).headers['ETag']
+        app.get('/api/1/collections/3/cards/4', headers={'If-None-Match': etag}, status=304)
+        app.put('/api/1/collections/3/cards/4', params=dumps({'title': 'Hello world!'}), status=200)
+        app.get('/api/1/collections/3/cards/4', headers={'If-None-Match': etag}, status=200)
+
     def test_get_404_parent(self):
         wsgiapp = self.config.make_wsgi_app()
         app = TestApp(wsgiapp)
@@ -186,6 +196,36 @@ class FunctionalCardsAPITests(TestCase):
         response = app.get('/api/1/collections/3/cards', status=200)
         self.assertEqual([{'data': {'int_indicator': -1, 'title': ''}, 'rid': 4, 'type_name': 'Card'}], response.json_body)
 
+    def test_collection_get_paginated(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = self._request()
+        root = self._fixture(request)
+        from kedja.resources.card import Card
+        collection = root['wall']['collection']
+        collection['5'] = Card(rid=5)
+        collection['6'] = Card(rid=6)
+        commit()
+        response = app.get('/api/1/collections/3/cards', params={'limit': 2}, status=200)
+        self.assertEqual([4, 5], [x['rid'] for x in response.json_body])
+        cursor = response.headers['X-Next-Cursor']
+        response = app.get('/api/1/collections/3/cards', params={'limit': 2, 'cursor': cursor}, status=200)
+        self.assertEqual([6], [x['rid'] for x in response.json_body])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+        app.get('/api/1/collections/3/cards', params={'cursor': 'abc'}, status=400)
+        app.get('/api/1/collections/3/cards', params={'limit': 0}, status=400)
+
+    def test_collection_get_not_modified(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = self._request()
+        self._fixture(request)
+        etag = app.get('/api/1/collections/3/cards', status=200).headers['ETag']
+        app.get('/api/1/collections/3/cards', headers={'If-None-Match': etag}, status=304)
+        app.post('/api/1/collections/3/cards', params=dumps({'title': 'New'}), status=200)
+        response = app.get('/api/1/collections/3/cards', headers={'If-None-Match': etag}, status=200)
+        self.assertEqual(len(response.json_body), 2)
+
     def test_collection_post(self):
         wsgiapp = self.config.make_wsgi_app()
         app = TestApp(wsgiapp)
@@ -186,6 +186,21 @@ class FunctionalCollectionsAPITests(TestCase):
         response = app.get('/api/1/walls/2/collections', status=200)
         self.assertEqual([{'data': {'title': ''}, 'rid': 3, 'type_name': 'Collection'}], response.json_body)
 
+    def test_collection_get_paginated(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = self._request()
+        root = self._fixture(request)
+        from kedja.resources.collection import Collection
+        root['wall']['4'] = Collection(rid=4)
+        commit()
+        response = app.get('/api/1/walls/2/collections', params={'limit': 1}, status=200)
+        self.assertEqual([3], [x['rid'] for x in response.json_body])
+        cursor = response.headers['X-Next-Cursor']
+        response = app.get('/api/1/walls/2/collections', params={'limit': 1, 'cursor': cursor}, status=200)
+        self.assertEqual([4], [x['rid'] for x in response.json_body])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
     def test_collection_get_404(self):
         wsgiapp = self.config.make_wsgi_app()
         app = TestApp(wsgiapp)
@@ -274,6 +289,22 @@ class FunctionalCollectionsOrderAPITests(TestCase):
         ordering = [x['rid'] for x in response.json_body]
         self.assertEqual([30, 20, 10], ordering)
 
+    def test_put_changes_wall_structure(self):
+        self.config.include('kedja.views.api.walls')
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = self._request()
+        self._fixture(request)
+        etag = app.get('/api/1/walls/2/structure', status=200).headers['ETag']
+        app.get('/api/1/walls/2/structure', headers={'If-None-Match': etag}, status=304)
+        app.put('/api/1/collections/3/order', params=dumps({'order': [30, 20, 10]}), status=200)
+        response = app.get('/api/1/walls/2/structure', headers={'If-None-Match': etag}, status=200)
+        self.assertNotEqual(etag, response.headers['ETag'])
+        self.assertEqual([[3, [[30, []], [20, []], [10, []]]]], response.json_body)
+        # Clients syncing the wall will also see it
+        response = app.get('/api/1/walls/2/changes', params={'since': 0}, status=200)
+        self.assertIn('3', response.json_body['resources'])
+
     def test_put_too_many_names(self):
         wsgiapp = self.config.make_wsgi_app()
         app = TestApp(wsgiapp)
@@ -287,3 +318,59 @@ class FunctionalCollectionsOrderAPITests(TestCase):
         request = self._request()
         self._fixture(request)
         app.put('/api/1/collections/3/order', params=dumps({'order': [10, 20]}), status=400)
+
+
+class FunctionalCollectionsMoveAPITests(TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp(settings=get_settings())
+        self.config.include('pyramid_tm')
+        self.config.include('kedja.testing')
+        self.config.include('kedja.views.api.collections')
+        self.config.include('kedja.views.exceptions')
+        self.config.include('kedja.security.default_acl')
+        self.config.set_authorization_policy(ACLAuthorizationPolicy())
+        self.config.set_authentication_policy(TestingAuthenticationPolicy(userid='100'))
+
+    def _fixture(self, request):
+        from kedja import root_factory
+        from kedja.resources.wall import Wall
+        from kedja.resources.collection import Collection
+        from kedja.resources.card import Card
+        root = root_factory(request)
+        root['wall'] = Wall(rid=2)
+        root['wall']['collection'] = collection = Collection(rid=3)
+        collection['10'] = Card(rid=10)
+        collection['20'] = Card(rid=20)
+        collection['30'] = Card(rid=30)
+        commit()
+        return root
+
+    def _request(self):
+        request = testing.DummyRequest()
+        apply_request_extensions(request)
+        self.config.begin(request)
+        return request
+
+    def test_put_before(self):
+        app = TestApp(self.config.make_wsgi_app())
+        root = self._fixture(self._request())
+        response = app.put('/api/1/collections/3/move', params=dumps({'rid': 30, 'before': 10}), status=200)
+        self.assertEqual({'rid': 30, 'previous': None, 'next': 10}, response.json_body)
+        self.assertEqual(root['wall']['collection'].get_order_rids(), (30, 10, 20))
+
+    def test_put_after(self):
+        app = TestApp(self.config.make_wsgi_app())
+        root = self._fixture(self._request())
+        response = app.put('/api/1/collections/3/move', params=dumps({'rid': 10, 'after': 20}), status=200)
+        self.assertEqual({'rid': 10, 'previous': 20, 'next': 30}, response.json_body)
+        self.assertEqual(root['wall']['collection'].get_order_rids(), (20, 10, 30))
+
+    def test_put_bad_data(self):
+        app = TestApp(self.config.make_wsgi_app())
+        self._fixture(self._request())
+        app.put('/api/1/collections/3/move', params=dumps({'rid': 10}), status=400)
+        app.put('/api/1/collections/3/move', params=dumps({'rid': 10, 'before': 20, 'after': 30}), status=400)
+        app.put('/api/1/collections/3/move', params=dumps({'rid': 10, 'before': 10}), status=400)
+        app.put('/api/1/collections/3/move', params=dumps({'rid': 40, 'before': 10}), status=400)
+        app.put('/api/1/collections/3/move', params=dumps({'rid': 10, 'after': 40}), status=400)
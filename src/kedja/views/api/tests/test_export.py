@@ -49,3 +49,53 @@ class FunctionalWallExportAPIViewTests(TestCase):
         self.assertEqual("Hello wall", data['title'])
         self.assertEqual('Wall', data['export']['type_name'])  # The wall
         self.assertEqual(3, len(data['export']['contained']))  # The collections
+
+    def test_get_ignores_fields(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = testing.DummyRequest()
+        apply_request_extensions(request)
+        self.config.begin(request)
+        self._fixture(request)
+        response = app.get('/api/1/export/2', params={'fields': 'title'}, status=200)
+        data = safe_load(response.body)
+        self.assertIn('relations', data['export']['data'])
+
+    def _get(self, **kw):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = testing.DummyRequest()
+        apply_request_extensions(request)
+        self.config.begin(request)
+        self._fixture(request)
+        return app.get('/api/1/export/2', **kw)
+
+    def test_get_jsonl(self):
+        from kedja.models.export_formats import loads_export
+        response = self._get(params={'format': 'jsonl'}, status=200)
+        self.assertEqual('application/x-ndjson', response.content_type)
+        self.assertIn('hello-wall.jsonl', response.headers['Content-Disposition'])
+        # Header, wall, 3 collections with 3 cards each
+        self.assertEqual(14, len(response.body.splitlines()))
+        data = loads_export(response.body, format='jsonl')
+        self.assertEqual("Hello wall", data['title'])
+        self.assertEqual(3, len(data['export']['contained']))
+
+    def test_get_accept_header(self):
+        response = self._get(headers={'Accept': 'application/x-ndjson'}, status=200)
+        self.assertEqual('application/x-ndjson', response.content_type)
+
+    def test_get_default_is_yaml(self):
+        response = self._get(headers={'Accept': '*/*'}, status=200)
+        self.assertEqual('text/yaml', response.content_type)
+
+    def test_get_gzip(self):
+        from kedja.models.export_formats import loads_export
+        response = self._get(params={'format': 'jsonl', 'compression': 'gzip'}, status=200)
+        self.assertEqual('application/gzip', response.content_type)
+        self.assertIn('hello-wall.jsonl.gz', response.headers['Content-Disposition'])
+        data = loads_export(response.body, format='jsonl', compression='gzip')
+        self.assertEqual('Wall', data['export']['type_name'])
+
+    def test_get_bad_format(self):
+        self._get(params={'format': 'xml'}, status=400)
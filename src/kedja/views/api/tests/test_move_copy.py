@@ -0,0 +1,116 @@
+from json import dumps
+from unittest import TestCase
+
+from pyramid import testing
+from pyramid.authorization import ACLAuthorizationPolicy
+from pyramid.request import apply_request_extensions
+from transaction import commit
+from webtest import TestApp
+
+from kedja.security import WALL_OWNER
+from kedja.testing import get_settings
+from kedja.testing import TestingAuthenticationPolicy
+
+
+class _FunctionalBase(TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp(settings=get_settings())
+        self.config.include('kedja.testing')
+        self.config.include('pyramid_tm')
+        self.config.include('kedja.views.api.move_copy')
+        self.config.include('kedja.security.default_acl')
+        self.config.set_authorization_policy(ACLAuthorizationPolicy())
+        self.config.set_authentication_policy(TestingAuthenticationPolicy(userid='100'))
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def _fixture(self):
+        from kedja import root_factory
+        request = testing.DummyRequest()
+        apply_request_extensions(request)
+        self.config.begin(request)
+        root = root_factory(request)
+        content = self.config.registry.content
+        root['wall'] = wall = content('Wall', rid=2)
+        wall.add_user_roles('100', WALL_OWNER)
+        wall['10'] = collection = content('Collection', rid=10)
+        collection['11'] = content('Card', rid=11, title='Eleven')
+        collection['12'] = content('Card', rid=12)
+        wall['20'] = content('Collection', rid=20)
+        wall.relations_map[1] = [11, 12]
+        root['other'] = other = content('Wall', rid=3)
+        other['30'] = content('Collection', rid=30)
+        other.remove_user_roles('100', WALL_OWNER)
+        commit()
+        return root
+
+
+class FunctionalMoveAPIViewTests(_FunctionalBase):
+
+    def test_move_card(self):
+        app = TestApp(self.config.make_wsgi_app())
+        root = self._fixture()
+        response = app.post('/api/1/move/11', params=dumps({'parent': 20}), status=200)
+        self.assertEqual(response.json_body['rid'], 11)
+        wall = root['wall']
+        self.assertIn('11', wall['20'])
+        self.assertNotIn('11', wall['10'])
+        self.assertEqual(root.rid_map[11], ('', 'wall', '20', '11'))
+        # Same wall, so the relation stays
+        self.assertEqual(wall.relations_map[1], (11, 12))
+
+    def test_move_wrong_parent_type(self):
+        app = TestApp(self.config.make_wsgi_app())
+        self._fixture()
+        app.post('/api/1/move/11', params=dumps({'parent': 2}), status=404)
+        app.post('/api/1/move/2', params=dumps({'parent': 1}), status=400)
+
+    def test_move_not_allowed_in_target(self):
+        app = TestApp(self.config.make_wsgi_app())
+        root = self._fixture()
+        app.post('/api/1/move/11', params=dumps({'parent': 30}), status=403)
+        self.assertIn('11', root['wall']['10'])
+
+    def test_move_bad_payload(self):
+        app = TestApp(self.config.make_wsgi_app())
+        self._fixture()
+        app.post('/api/1/move/11', params=dumps({'parent': 'abc'}), status=400)
+
+
+class FunctionalCopyAPIViewTests(_FunctionalBase):
+
+    def test_copy_card(self):
+        app = TestApp(self.config.make_wsgi_app())
+        root = self._fixture()
+        response = app.post('/api/1/copy/11', params=dumps({'parent': 20}), status=200)
+        new_rid = response.json_body['rid']
+        self.assertNotEqual(new_rid, 11)
+        self.assertEqual(response.json_body['data']['title'], 'Eleven')
+        self.assertEqual(root['wall']['20'][str(new_rid)].title, 'Eleven')
+        self.assertIn('11', root['wall']['10'])
+
+    def test_copy_collection(self):
+        app = TestApp(self.config.make_wsgi_app())
+        root = self._fixture()
+        response = app.post('/api/1/copy/10', params=dumps({'parent': 2}), status=200)
+        clone = root['wall'][str(response.json_body['rid'])]
+        self.assertEqual(len(clone), 2)
+        self.assertEqual(clone.get_order_rids(), tuple(x.rid for x in clone.values()))
+        self.assertFalse({11, 12} & set(clone.get_order_rids()))
+        self.assertEqual(list(clone.keys()), [str(x) for x in clone.get_order_rids()])
+
+    def test_copy_collection_contents_can_be_moved_and_reordered(self):
+        self.config.include('kedja.views.api.collections')
+        app = TestApp(self.config.make_wsgi_app())
+        root = self._fixture()
+        response = app.post('/api/1/copy/10', params=dumps({'parent': 2}), status=200)
+        clone_rid = response.json_body['rid']
+        first, second = root['wall'][str(clone_rid)].get_order_rids()
+        response = app.put('/api/1/collections/%s/order' % clone_rid,
+                           params=dumps({'order': [second, first]}), status=200)
+        self.assertEqual([second, first], [x['rid'] for x in response.json_body])
+        app.put('/api/1/collections/%s/move' % clone_rid,
+                params=dumps({'rid': first, 'before': second}), status=200)
+        self.assertEqual((first, second), root['wall'][str(clone_rid)].get_order_rids())
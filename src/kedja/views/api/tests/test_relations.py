@@ -184,6 +184,50 @@ class FunctionalCollectionsAPITests(TestCase):
         response = app.get('/api/1/walls/2/relations', status=200)
         self.assertEqual([{'members': [10, 20], 'relation_id': 1}], response.json_body)
 
+    def test_collection_get_by_rids(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = self._request()
+        root = self._fixture(request)
+        root['wall'].relations_map[2] = [20, 30]
+        commit()
+        response = app.get('/api/1/walls/2/relations?rids=30', status=200)
+        self.assertEqual([{'members': [20, 30], 'relation_id': 2}], response.json_body)
+        response = app.get('/api/1/walls/2/relations?rids=10,30', status=200)
+        self.assertEqual([1, 2], [x['relation_id'] for x in response.json_body])
+        app.get('/api/1/walls/2/relations?rids=10,abc', status=400)
+        app.get('/api/1/walls/2/relations?rids=10,-', status=400)
+
+    def test_collection_get_by_negative_rids(self):
+        from kedja.resources.card import Card
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = self._request()
+        root = self._fixture(request)
+        root['wall']['collection']['-103'] = Card(rid=-103)
+        root['wall'].relations_map[2] = [20, -103]
+        commit()
+        response = app.get('/api/1/walls/2/relations?rids=-103', status=200)
+        self.assertEqual([{'members': [20, -103], 'relation_id': 2}], response.json_body)
+        response = app.get('/api/1/walls/2/relations?rids=10,-103', status=200)
+        self.assertEqual([1, 2], [x['relation_id'] for x in response.json_body])
+
+    def test_collection_get_paginated(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = self._request()
+        root = self._fixture(request)
+        root['wall'].relations_map[2] = [20, 30]
+        root['wall'].relations_map[3] = [10, 30]
+        commit()
+        response = app.get('/api/1/walls/2/relations?limit=2', status=200)
+        self.assertEqual([1, 2], [x['relation_id'] for x in response.json_body])
+        self.assertEqual('2', response.headers['X-Next-Cursor'])
+        response = app.get('/api/1/walls/2/relations?limit=2&cursor=2', status=200)
+        self.assertEqual([3], [x['relation_id'] for x in response.json_body])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+        app.get('/api/1/walls/2/relations?limit=0', status=400)
+
     def test_collection_get_404(self):
         wsgiapp = self.config.make_wsgi_app()
         app = TestApp(wsgiapp)
@@ -212,6 +256,13 @@ class FunctionalCollectionsAPITests(TestCase):
         self._fixture(request)
         app.post('/api/1/walls/2/relations', params=dumps({'members': "Johan och ett par till"}), status=400)
 
+    def test_collection_post_duplicate(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = self._request()
+        self._fixture(request)
+        app.post('/api/1/walls/2/relations', params=dumps({'members': [20, 10]}), status=400)
+
     def test_collection_options(self):
         wsgiapp = self.config.make_wsgi_app()
         app = TestApp(wsgiapp)
@@ -0,0 +1,97 @@
+from unittest import TestCase
+
+from pyramid import testing
+from pyramid.authorization import ACLAuthorizationPolicy
+from pyramid.request import apply_request_extensions
+from transaction import commit
+from webtest import TestApp
+
+from kedja.security import WALL_OWNER
+from kedja.testing import get_settings
+from kedja.testing import TestingAuthenticationPolicy
+
+
+class FunctionalSearchAPIViewTests(TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp(settings=get_settings())
+        self.config.include('kedja.testing')
+        self.config.include('pyramid_tm')
+        self.config.include('kedja.views.api.search')
+        self.config.include('kedja.security.default_acl')
+        self.config.set_authorization_policy(ACLAuthorizationPolicy())
+        self.config.set_authentication_policy(TestingAuthenticationPolicy(userid='100'))
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def _fixture(self, request):
+        from kedja import root_factory
+        root = root_factory(request)
+        content = self.config.registry.content
+        root['wall'] = wall = content('Wall', rid=2, title="Groceries")
+        wall['col'] = collection = content('Collection', rid=10, title="Todo")
+        collection['card'] = content('Card', rid=11, title="Buy milk")
+        collection['other'] = content('Card', rid=12, title="Buy bread")
+        root['hidden'] = hidden = content('Wall', rid=3, title="Hidden")
+        hidden['col'] = content('Collection', rid=20, title="Buy secrets")
+        hidden.remove_user_roles('100', WALL_OWNER)
+        commit()
+        return root
+
+    def _request(self):
+        request = testing.DummyRequest()
+        apply_request_extensions(request)
+        self.config.begin(request)
+        return request
+
+    def test_get(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        self._fixture(self._request())
+        response = app.get('/api/1/search', params={'text': 'buy'}, status=200)
+        self.assertEqual([
+            {'rid': 11, 'type_name': 'Card', 'title': 'Buy milk', 'wall': 2},
+            {'rid': 12, 'type_name': 'Card', 'title': 'Buy bread', 'wall': 2},
+        ], response.json_body)
+        response = app.get('/api/1/search', params={'text': 'groc'}, status=200)
+        self.assertEqual([2], [x['rid'] for x in response.json_body])
+
+    def test_get_without_view_permission(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        root = self._fixture(self._request())
+        # Still has roles, but the ACL doesn't let anyone view it
+        root['wall'].acl_name = ''
+        commit()
+        response = app.get('/api/1/search', params={'text': 'buy'}, status=200)
+        self.assertEqual([], response.json_body)
+
+    def test_get_paginated(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        self._fixture(self._request())
+        response = app.get('/api/1/search', params={'text': 'buy', 'limit': 1}, status=200)
+        self.assertEqual([11], [x['rid'] for x in response.json_body])
+        self.assertEqual('11', response.headers['X-Next-Cursor'])
+        response = app.get('/api/1/search', params={'text': 'buy', 'limit': 1, 'cursor': 11}, status=200)
+        self.assertEqual([12], [x['rid'] for x in response.json_body])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+    def test_get_no_walls(self):
+        self.config.set_authentication_policy(TestingAuthenticationPolicy(userid='404'))
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        root = self._fixture(self._request())
+        # Owner roles were given to the authenticated user when the walls were added
+        root['wall'].remove_user_roles('404', WALL_OWNER)
+        root['hidden'].remove_user_roles('404', WALL_OWNER)
+        commit()
+        response = app.get('/api/1/search', params={'text': 'buy'}, status=200)
+        self.assertEqual([], response.json_body)
+
+    def test_get_text_required(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        self._fixture(self._request())
+        app.get('/api/1/search', status=400)
@@ -0,0 +1,53 @@
+from unittest import TestCase
+
+from pyramid import testing
+from pyramid.authorization import ACLAuthorizationPolicy
+from pyramid.request import apply_request_extensions
+from transaction import commit
+from webtest import TestApp
+
+from kedja.security import INSTANCE_ADMIN
+from kedja.testing import get_settings, TestingAuthenticationPolicy
+
+
+class FunctionalRedisStatusAPIViewTests(TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp(settings=get_settings())
+        self.config.include('kedja.testing')
+        self.config.include('pyramid_tm')
+        self.config.include('kedja.security.default_acl')
+        self.config.set_authorization_policy(ACLAuthorizationPolicy())
+        self.config.set_authentication_policy(TestingAuthenticationPolicy(userid='100'))
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def _fixture(self):
+        from kedja import root_factory
+        request = testing.DummyRequest()
+        apply_request_extensions(request)
+        self.config.begin(request)
+        return root_factory(request)
+
+    def test_get(self):
+        self.config.registry.settings['kedja.redis_pool_stats'] = 'true'
+        self.config.include('kedja.views.api.status')
+        app = TestApp(self.config.make_wsgi_app())
+        root = self._fixture()
+        root.add_user_roles('100', INSTANCE_ADMIN)
+        commit()
+        response = app.get('/api/1/status/redis', status=200)
+        self.assertEqual({'max_connections', 'created', 'available', 'in_use'}, set(response.json_body))
+
+    def test_get_not_admin(self):
+        self.config.registry.settings['kedja.redis_pool_stats'] = 'true'
+        self.config.include('kedja.views.api.status')
+        app = TestApp(self.config.make_wsgi_app())
+        self._fixture()
+        app.get('/api/1/status/redis', status=403)
+
+    def test_disabled_by_default(self):
+        self.config.include('kedja.views.api.status')
+        app = TestApp(self.config.make_wsgi_app())
+        app.get('/api/1/status/redis', status=404)
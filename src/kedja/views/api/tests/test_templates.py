@@ -87,6 +87,26 @@ class FunctionalTemplatesAPIViewTests(TestCase):
         wall = root[str(data['rid'])]
         self.assertEqual('En annan', wall.title)
 
+    def test_post_bad_relations(self):
+        from kedja.models.export_formats import yaml_dump
+        from kedja.models.export_formats import yaml_load
+        with open(get_dummy_structure_fp()) as f:
+            appstruct = yaml_load(f)
+        relation = appstruct['export']['data']['relations'][0]
+        relation['members'] = relation['members'][:1]
+        with open(os.path.join(self.tmpdir.name, '456.yaml'), 'w') as f:
+            yaml_dump(appstruct, stream=f)
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = testing.DummyRequest()
+        apply_request_extensions(request)
+        self.config.begin(request)
+        root = self._fixture(request)
+        response = app.post('/api/1/templates/456', status=400)
+        self.assertEqual(response.json_body.get('status'), 'error')
+        # Nothing was imported
+        self.assertEqual(['users'], list(root.keys()))
+
     def test_collection_get(self):
         wsgiapp = self.config.make_wsgi_app()
         app = TestApp(wsgiapp)
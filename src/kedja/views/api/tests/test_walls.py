@@ -144,7 +144,7 @@ class WallsStructureAPIViewTests(TestCase):
                 [103, []], [203, []], [303, []]
             ]]
         ]
-        self.assertEqual(response, expected)
+        self.assertEqual(loads(response.body), expected)
 
 
 class WallsContentAPIViewTests(TestCase):
@@ -181,7 +181,21 @@ class WallsContentAPIViewTests(TestCase):
         request.matchdict['rid'] = 2
         inst = self._cut(request, context=root)
         response = inst.get()
-        self.assertEqual(response, {'resources': resources})
+        expected = loads(render('json', {'resources': resources}, request=request))
+        self.assertEqual(loads(response.body), expected)
+
+    def test_get_streamed_in_chunks(self):
+        from kedja.models.json import json_stream_response
+        root, resources = self._fixture()
+        request = testing.DummyRequest()
+        apply_request_extensions(request)
+        request.matchdict['rid'] = 2
+        inst = self._cut(request, context=root)
+        response = json_stream_response(request, inst.iter_content(root['wall']), chunk_size=100)
+        chunks = list(response.app_iter)
+        self.assertGreater(len(chunks), 1)
+        expected = loads(render('json', {'resources': resources}, request=request))
+        self.assertEqual(loads(b"".join(chunks)), expected)
 
 
 class FunctionalWallsAPITests(TestCase):
@@ -217,6 +231,31 @@ class FunctionalWallsAPITests(TestCase):
         self.assertEqual(response.json_body,
                          {'data': {'title': '', 'acl_name': 'private_wall', 'relations': [],}, 'rid': 2, 'type_name': 'Wall'})
 
+    def test_get_fields(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = self._request()
+        self._fixture(request)
+        response = app.get('/api/1/walls/2', params={'fields': 'title'}, status=200)
+        self.assertEqual(response.json_body, {'data': {'title': ''}, 'rid': 2, 'type_name': 'Wall'})
+        full_response = app.get('/api/1/walls/2', status=200)
+        self.assertNotEqual(response.headers['ETag'], full_response.headers['ETag'])
+
+    def test_get_not_modified(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = self._request()
+        self._fixture(request)
+        response = app.get('/api/1/walls/2', status=200)
+        etag = response.headers['ETag']
+        response = app.get('/api/1/walls/2', headers={'If-None-Match': etag}, status=304)
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertEqual(response.body, b'')
+        app.put('/api/1/walls/2', params=dumps({'title': 'Changed'}), status=200)
+        response = app.get('/api/1/walls/2', headers={'If-None-Match': etag}, status=200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(response.json_body['data']['title'], 'Changed')
+
     def test_get_404(self):
         wsgiapp = self.config.make_wsgi_app()
         app = TestApp(wsgiapp)
@@ -243,6 +282,37 @@ class FunctionalWallsAPITests(TestCase):
         response = app.put('/api/1/walls/2', params=dumps({'title': 100}), status=400)
         self.assertEqual(response.json_body.get('status'), 'error')
 
+    def test_put_duplicate_relations(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = self._request()
+        root = self._fixture(request)
+        relations = [{'relation_id': 5, 'members': [10, 20]}, {'relation_id': 6, 'members': [20, 10]}]
+        response = app.put('/api/1/walls/2', params=dumps({'title': 'Changed', 'relations': relations}), status=400)
+        self.assertEqual(response.json_body.get('status'), 'error')
+        # Nothing was saved
+        self.assertEqual(app.get('/api/1/walls/2', status=200).json_body['data']['title'], '')
+
+    def test_put_legacy_duplicate_relations_after_rebuild(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = self._request()
+        root = self._fixture(request)
+        relations_map = root['wall'].relations_map
+        relations_map[1] = [10, 20]
+        relations_map[3] = [20, 30]
+        # Saved before duplicates were checked, with the members index pointing to the last one
+        relations_map.relation_to_rids[2] = (20, 10)
+        relations_map.members_to_relation[relations_map.members_key((10, 20))] = 2
+        relations_map.rebuild_index()
+        commit()
+        self.assertEqual(relations_map.find_duplicate((10, 20)), 1)
+        data = app.get('/api/1/walls/2', status=200).json_body['data']
+        self.assertEqual([1, 3], [x['relation_id'] for x in data['relations']])
+        data['title'] = 'Changed'
+        response = app.put('/api/1/walls/2', params=dumps(data), status=200)
+        self.assertEqual(data, response.json_body['data'])
+
     def test_delete(self):
         wsgiapp = self.config.make_wsgi_app()
         app = TestApp(wsgiapp)
@@ -268,6 +338,61 @@ class FunctionalWallsAPITests(TestCase):
         self.assertEqual([{'data': {'acl_name': 'private_wall', 'relations': [], 'title': ''}, 'rid': 2, 'type_name': 'Wall'}],
                          response.json_body)
 
+    def test_collection_get_only_walls_with_roles(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = self._request()
+        root = self._fixture(request)
+        root['other'] = Wall(rid=3)
+        root['other'].remove_user_roles('100', WALL_OWNER)
+        commit()
+        response = app.get('/api/1/walls', status=200)
+        self.assertEqual([2], [x['rid'] for x in response.json_body])
+
+    def test_collection_get_paginated(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = self._request()
+        root = self._fixture(request)
+        root['b'] = Wall(rid=3)
+        root['c'] = Wall(rid=4)
+        commit()
+        response = app.get('/api/1/walls', params={'limit': 2}, status=200)
+        self.assertEqual([2, 3], [x['rid'] for x in response.json_body])
+        self.assertEqual('3', response.headers['X-Next-Cursor'])
+        response = app.get('/api/1/walls', params={'limit': 2, 'cursor': 3}, status=200)
+        self.assertEqual([4], [x['rid'] for x in response.json_body])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+        app.get('/api/1/walls', params={'limit': 'abc'}, status=400)
+
+    def test_collection_get_paginated_without_view_permission(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = self._request()
+        root = self._fixture(request)
+        root['b'] = Wall(rid=3)
+        root['c'] = Wall(rid=4)
+        # Roles but no ACL that grants them anything
+        root['b'].acl_name = 'no_such_acl'
+        commit()
+        response = app.get('/api/1/walls', params={'limit': 2}, status=200)
+        self.assertEqual([2, 4], [x['rid'] for x in response.json_body])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+        response = app.get('/api/1/walls', params={'limit': 1}, status=200)
+        self.assertEqual([2], [x['rid'] for x in response.json_body])
+        response = app.get('/api/1/walls', params={'limit': 1, 'cursor': 2}, status=200)
+        self.assertEqual([4], [x['rid'] for x in response.json_body])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+    def test_collection_get_after_delete(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = self._request()
+        self._fixture(request)
+        app.delete('/api/1/walls/2', status=200)
+        response = app.get('/api/1/walls', status=200)
+        self.assertEqual([], response.json_body)
+
     def test_collection_post(self):
         wsgiapp = self.config.make_wsgi_app()
         app = TestApp(wsgiapp)
@@ -395,6 +520,301 @@ class FunctionalWallContentAPIViewTests(TestCase):
         expected = loads(converted)
         self.assertEqual(response.json_body, expected)
 
+    def test_get_not_modified(self):
+        self.config.include('kedja.views.api.cards')
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = testing.DummyRequest()
+        apply_request_extensions(request)
+        self.config.begin(request)
+        self._fixture(request)
+        etag = app.get('/api/1/walls/2/content', status=200).headers['ETag']
+        app.get('/api/1/walls/2/content', headers={'If-None-Match': etag}, status=304)
+        app.put('/api/1/collections/10/cards/101', params=dumps({'title': 'Changed'}), status=200)
+        response = app.get('/api/1/walls/2/content', headers={'If-None-Match': etag}, status=200)
+        self.assertEqual(response.json_body['resources']['101']['data']['title'], 'Changed')
+
+
+class FunctionalWallContentCacheTests(TestCase):
+
+    def setUp(self):
+        settings = get_settings()
+        settings['kedja.wall_cache_size'] = '10'
+        self.config = testing.setUp(settings=settings)
+        self.config.include('kedja.testing')
+        self.config.include('pyramid_tm')
+        self.config.include('kedja.views.api.walls')
+        self.config.include('kedja.views.api.cards')
+        self.config.include('kedja.security.default_acl')
+        self.config.set_authorization_policy(ACLAuthorizationPolicy())
+        self.config.set_authentication_policy(TestingAuthenticationPolicy(userid='100'))
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def _fixture(self, request):
+        from kedja import root_factory
+        root = root_factory(request)
+        content = self.config.registry.content
+        root['wall'] = wall = content('Wall', rid=2)
+        wall.add_user_roles('100', WALL_OWNER)
+        wall['col'] = collection = content('Collection', rid=10)
+        collection['card'] = content('Card', rid=101)
+        commit()
+        return root
+
+    def test_get_cached(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = testing.DummyRequest()
+        apply_request_extensions(request)
+        self.config.begin(request)
+        self._fixture(request)
+        cache = self.config.registry.wall_snapshot_cache
+        response = app.get('/api/1/walls/2/content', status=200)
+        self.assertIn(2, cache)
+        self.assertEqual(response.body, app.get('/api/1/walls/2/content', status=200).body)
+        app.put('/api/1/collections/10/cards/101', params=dumps({'title': 'Changed'}), status=200)
+        # Invalidated when the transaction was committed
+        self.assertNotIn(2, cache)
+        response = app.get('/api/1/walls/2/content', status=200)
+        self.assertEqual(response.json_body['resources']['101']['data']['title'], 'Changed')
+
+    def test_get_fields_not_cached(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = testing.DummyRequest()
+        apply_request_extensions(request)
+        self.config.begin(request)
+        self._fixture(request)
+        response = app.get('/api/1/walls/2/content', params={'fields': 'title'}, status=200)
+        self.assertEqual({'title': ''}, response.json_body['resources']['101']['data'])
+        self.assertEqual(0, len(self.config.registry.wall_snapshot_cache))
+
+
+class FunctionalWallContentCacheExplicitManagerTests(FunctionalWallContentCacheTests):
+    """ Like production, where each request has its own transaction manager. """
+
+    def setUp(self):
+        settings = get_settings()
+        settings['kedja.wall_cache_size'] = '10'
+        settings['tm.manager_hook'] = 'pyramid_tm.explicit_manager'
+        self.config = testing.setUp(settings=settings)
+        self.config.include('kedja.testing')
+        self.config.include('pyramid_tm')
+        self.config.include('kedja.views.api.walls')
+        self.config.include('kedja.views.api.cards')
+        self.config.include('kedja.security.default_acl')
+        self.config.set_authorization_policy(ACLAuthorizationPolicy())
+        self.config.set_authentication_policy(TestingAuthenticationPolicy(userid='100'))
+
+    def _fixture(self, request):
+        from kedja import root_factory
+        request.tm.begin()
+        root = root_factory(request)
+        content = self.config.registry.content
+        root['wall'] = wall = content('Wall', rid=2)
+        wall.add_user_roles('100', WALL_OWNER)
+        wall['col'] = collection = content('Collection', rid=10)
+        collection['card'] = content('Card', rid=101)
+        request.tm.commit()
+        return root
+
+    def test_global_transaction_unused(self):
+        import transaction
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        request = testing.DummyRequest()
+        apply_request_extensions(request)
+        self.config.begin(request)
+        self._fixture(request)
+        transaction.begin()
+        app.get('/api/1/walls/2/content', status=200)
+        app.put('/api/1/collections/10/cards/101', params=dumps({'title': 'Changed'}), status=200)
+        self.assertRaises(KeyError, transaction.get().data, self.config.registry.wall_snapshot_cache)
+        transaction.abort()
+
+
+class FunctionalWallChangesAPIViewTests(TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp(settings=get_settings())
+        self.config.include('kedja.testing')
+        self.config.include('pyramid_tm')
+        self.config.include('kedja.views.api.walls')
+        self.config.include('kedja.security.default_acl')
+        self.config.set_authorization_policy(ACLAuthorizationPolicy())
+        self.config.set_authentication_policy(TestingAuthenticationPolicy(userid='100'))
+
+    def _fixture(self, request):
+        from kedja import root_factory
+        root = root_factory(request)
+        content = self.config.registry.content
+        root['wall'] = wall = content('Wall', rid=2)
+        wall.add_user_roles('100', WALL_OWNER)
+        wall['col'] = collection = content('Collection', rid=10)
+        collection['card'] = content('Card', rid=11)
+        commit()
+        return root
+
+    def _request(self):
+        request = testing.DummyRequest()
+        apply_request_extensions(request)
+        self.config.begin(request)
+        return request
+
+    def test_get_without_since(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        self._fixture(self._request())
+        response = app.get('/api/1/walls/2/changes', status=200)
+        self.assertEqual(response.json_body['seq'], 3)
+        self.assertTrue(response.json_body['reset'])
+
+    def test_get(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        root = self._fixture(self._request())
+        wall = root['wall']
+        wall['col'].remove('card')
+        wall['col']['new'] = Card(rid=12)
+        wall.relations_map[5] = [10, 12]
+        commit()
+        response = app.get('/api/1/walls/2/changes', params={'since': 3}, status=200)
+        self.assertEqual(response.json_body, {
+            'seq': 6,
+            'reset': False,
+            'resources': {'12': {'type_name': 'Card', 'rid': 12, 'data': {'title': '', 'int_indicator': -1}}},
+            'removed': [11],
+            'relations': [{'relation_id': 5, 'members': [10, 12]}],
+            'removed_relations': [],
+        })
+
+    def test_get_bad_since(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        self._fixture(self._request())
+        app.get('/api/1/walls/2/changes', params={'since': 'abc'}, status=400)
+
+
+class FunctionalWallSearchAPIViewTests(TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp(settings=get_settings())
+        self.config.include('kedja.testing')
+        self.config.include('pyramid_tm')
+        self.config.include('kedja.views.api.walls')
+        self.config.include('kedja.security.default_acl')
+        self.config.set_authorization_policy(ACLAuthorizationPolicy())
+        self.config.set_authentication_policy(TestingAuthenticationPolicy(userid='100'))
+
+    def _fixture(self, request):
+        from kedja import root_factory
+        root = root_factory(request)
+        content = self.config.registry.content
+        root['wall'] = wall = content('Wall', rid=2)
+        wall.add_user_roles('100', WALL_OWNER)
+        wall['col'] = collection = content('Collection', rid=10, title="Todo")
+        collection['card'] = content('Card', rid=11, title="Buy milk", int_indicator=1)
+        collection['other'] = content('Card', rid=12, title="Buy bread", int_indicator=2)
+        commit()
+        return root
+
+    def _request(self):
+        request = testing.DummyRequest()
+        apply_request_extensions(request)
+        self.config.begin(request)
+        return request
+
+    def test_get(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        self._fixture(self._request())
+        response = app.get('/api/1/walls/2/search', params={'text': 'buy'}, status=200)
+        self.assertEqual([11, 12], response.json_body)
+        response = app.get('/api/1/walls/2/search', params={'text': 'buy', 'int_indicator': 2}, status=200)
+        self.assertEqual([12], response.json_body)
+        response = app.get('/api/1/walls/2/search', params={'int_indicator_min': 2}, status=200)
+        self.assertEqual([12], response.json_body)
+        response = app.get('/api/1/walls/2/search', params={'text': 'tod'}, status=200)
+        self.assertEqual([10], response.json_body)
+
+    def test_get_bad_params(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        self._fixture(self._request())
+        app.get('/api/1/walls/2/search', params={'int_indicator': 'abc'}, status=400)
+
+    def test_get_404(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        self._fixture(self._request())
+        app.get('/api/1/walls/404/search', status=404)
+
+
+class FunctionalLegacyWallTests(TestCase):
+    """ Data created before change logs and catalogs existed, and before the migration scripts have run. """
+
+    def setUp(self):
+        self.config = testing.setUp(settings=get_settings())
+        self.config.include('kedja.testing')
+        self.config.include('pyramid_tm')
+        self.config.include('kedja.views.api.walls')
+        self.config.include('kedja.views.api.search')
+        self.config.include('kedja.views.api.cards')
+        self.config.include('kedja.security.default_acl')
+        self.config.set_authorization_policy(ACLAuthorizationPolicy())
+        self.config.set_authentication_policy(TestingAuthenticationPolicy(userid='100'))
+
+    def _fixture(self, request):
+        from kedja import root_factory
+        root = root_factory(request)
+        content = self.config.registry.content
+        root['wall'] = wall = content('Wall', rid=2, title="Groceries")
+        wall.add_user_roles('100', WALL_OWNER)
+        wall['col'] = collection = content('Collection', rid=10)
+        collection['card'] = content('Card', rid=11, title="Buy milk")
+        del wall.changes
+        del wall.catalog
+        del root.catalog
+        del root.wall_memberships
+        commit()
+        return root
+
+    def _request(self):
+        request = testing.DummyRequest()
+        apply_request_extensions(request)
+        self.config.begin(request)
+        return request
+
+    def test_reads_dont_write(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        root = self._fixture(self._request())
+        serials = (root._p_serial, root['wall']._p_serial)
+        response = app.get('/api/1/walls/2/changes', params={'since': 0}, status=200)
+        self.assertEqual(0, response.json_body['seq'])
+        self.assertTrue(response.json_body['reset'])
+        self.assertEqual([], app.get('/api/1/walls/2/search', params={'text': 'milk'}, status=200).json_body)
+        self.assertEqual([], app.get('/api/1/search', params={'text': 'milk'}, status=200).json_body)
+        self.assertEqual([], app.get('/api/1/walls', status=200).json_body)
+        response = app.get('/api/1/walls/2/structure', status=200)
+        self.assertNotIn('ETag', response.headers)
+        commit()
+        self.assertEqual(serials, (root._p_serial, root['wall']._p_serial))
+        self.assertIsNone(root['wall'].changes)
+        self.assertIsNone(root.catalog)
+
+    def test_changes_tracked_after_write(self):
+        wsgiapp = self.config.make_wsgi_app()
+        app = TestApp(wsgiapp)
+        root = self._fixture(self._request())
+        app.put('/api/1/collections/10/cards/11', params=dumps({'title': 'Changed'}), status=200)
+        response = app.get('/api/1/walls/2/changes', params={'since': 0}, status=200)
+        self.assertEqual([11], [int(x) for x in response.json_body['resources']])
+        # Catalogs are only built by the migration scripts
+        self.assertIsNone(root['wall'].catalog)
+
 
 class FunctionalACLAPIViewTests(TestCase):
 
@@ -2,12 +2,22 @@ import colander
 from cornice.resource import resource
 from cornice.resource import view
 from cornice.validators import colander_validator
+from pyramid.response import Response
+from pyramid.traversal import find_interface
 from kedja.interfaces import IWall
+from kedja.models.changes import RELATION
+from kedja.models.changes import RESOURCE
+from kedja.models.json import json_dumps_factory
+from kedja.models.json import iter_chunks
+from kedja.models.json import json_stream_response
+from kedja.models.snapshots import get_snapshot_cache
 from kedja.permissions import VIEW
 
-from kedja.resources.wall import WallSchema, WALL_PERMISSIONS
+from kedja.resources.wall import WALL_PERMISSIONS
+from kedja.resources.wall import WallSchema
 from kedja.utils import get_valid_acls
 from kedja.views.api.base import BaseResponseAPISchema
+from kedja.views.api.base import PaginationQuerySchema
 from kedja.views.api.base import ResourceAPISchema
 from kedja.views.api.base import ResourceAPIBase
 from kedja.views import validators
@@ -28,6 +38,10 @@ class CreateWallSchema(colander.Schema):
     body = WallSchema(description="JSON payload")
 
 
+class WallsCollectionAPISchema(colander.Schema):
+    querystring = PaginationQuerySchema()
+
+
 class UpdateWallAPISchema(ResourceAPISchema, CreateWallSchema):
     title = "Update a specific wall"
 
@@ -53,7 +67,9 @@ class WallsAPIView(ResourceAPIBase):
 
     @view(schema=ResourceAPISchema(), validators=(colander_validator, validators.VIEW_RESOURCE))
     def get(self):
-        return self.base_get(self.request.matchdict['rid'], type_name='Wall')
+        wall = self.base_get(self.request.matchdict['rid'], type_name='Wall')
+        if wall:
+            return self.check_etag(wall) or wall
 
     @view(schema=UpdateWallAPISchema(), validators=(colander_validator,  validators.EDIT_RESOURCE))
     def put(self):
@@ -64,14 +80,40 @@ class WallsAPIView(ResourceAPIBase):
         return self.base_delete(self.request.matchdict['rid'], type_name='Wall')
 
     def _get_walls(self):
-        for obj in self.context.values():
-            if IWall.providedBy(obj) and \
-                bool(obj.get_roles(self.request.authenticated_userid)) and \
-                    self.request.has_permission(WALL_PERMISSIONS[VIEW], obj):
-                yield obj
-
-    @view(schema=None)
+        """ Walls the current user has any roles in, sorted by rid.
+            Only those walls are loaded, see kedja.models.memberships.
+        """
+        userid = self.request.authenticated_userid
+        cursor, limit = self.get_pagination()
+        if self.root.wall_memberships is None:
+            # Not indexed yet, see scripts/migrate_search_indexes.py
+            return []
+        wall_rids = self.root.wall_memberships.get_walls(userid)
+        if cursor is not None:
+            wall_rids = wall_rids.keys(min=cursor, excludemin=True)
+        walls = []
+        rid_map = self.root.rid_map
+        permission = WALL_PERMISSIONS[VIEW]
+        for rid in wall_rids:
+            obj = rid_map.get_resource(rid)
+            if obj is None or not IWall.providedBy(obj):  # pragma: no cover
+                continue
+            # Roles don't always mean view permission, and the page should only count what's returned
+            if not self.request.has_permission(permission, obj):
+                continue
+            walls.append(obj)
+            # Fetch one more to know if there's another page
+            if limit is not None and len(walls) > limit:
+                walls = walls[:limit]
+                self.set_next_cursor(walls[-1].rid)
+                break
+        return walls
+
+    @view(schema=WallsCollectionAPISchema(), validators=(colander_validator,))
     def collection_get(self):
+        """ Walls the current user has roles in. With 'limit', the next page is fetched
+            by passing the 'X-Next-Cursor' header value as 'cursor'.
+        """
         return list(self._get_walls())
 
     @view(schema=CreateWallSchema(), validators=(colander_validator, validators.ADD_WALL))
@@ -107,15 +149,23 @@ class WallStructureAPIView(ResourceAPIBase):
         """
         wall = self.base_get(self.request.matchdict['rid'], type_name='Wall')
         if wall:
-            results = []
-            self.get_structure(wall, results)
-            return results
-
-    def get_structure(self, context, data):
-        for v in context.values():
-            contained_data = []
-            data.append([v.rid, contained_data])
-            self.get_structure(v, contained_data)
+            not_modified = self.check_etag(wall)
+            if not_modified is not None:
+                return not_modified
+            response = json_stream_response(self.request, self.get_structure(wall))
+            response.etag = self.request.response.etag
+            return response
+
+    def get_structure(self, context):
+        """ Yield the structure as JSON text, while traversing. """
+        yield '['
+        for (i, v) in enumerate(context.values()):
+            if i:
+                yield ', '
+            yield '[%d, ' % v.rid
+            yield from self.get_structure(v)
+            yield ']'
+        yield ']'
 
 
 @resource(path='/api/1/walls/{rid}/content',
@@ -129,18 +179,163 @@ class WallContentAPIView(ResourceAPIBase):
     def get(self):
         """ Get a structure with all of the content within this wall.
             It returns a dict where the resource ID is the key.
+
+            If 'kedja.wall_cache_size' is set, the serialized content is kept
+            until something within the wall changes.
         """
         wall = self.base_get(self.request.matchdict['rid'], type_name='Wall')
         if wall:
-            results = {}
-            self.get_content(wall, results)
-            # Load relations etc too
-            return {'resources': results}
-
-    def get_content(self, context, data):
+            not_modified = self.check_etag(wall)
+            if not_modified is not None:
+                return not_modified
+            cache = get_snapshot_cache(self.request.registry)
+            if cache is None or self.request.requested_fields is not None or wall.changes is None:
+                response = json_stream_response(self.request, self.iter_content(wall))
+            else:
+                token = wall.changes.seq
+                body = cache.get(wall.rid, token)
+                if body is None:
+                    body = b''.join(iter_chunks(self.iter_content(wall)))
+                    cache.set(wall.rid, token, body)
+                response = Response(body=body, content_type='application/json', charset='utf-8')
+            response.etag = self.request.response.etag
+            return response
+
+    def iter_content(self, wall):
+        """ Yield the content as JSON text, one resource at a time. """
+        dumps = json_dumps_factory(self.request)
+        yield '{"resources": {'
+        for (i, (rid, resource)) in enumerate(self.get_content(wall)):
+            if i:
+                yield ', '
+            yield dumps(str(rid))
+            yield ': '
+            yield dumps(resource)
+        yield '}}'
+
+    def get_content(self, context):
         for v in context.values():
-            data[v.rid] = v
-            self.get_content(v, data)
+            yield v.rid, v
+            yield from self.get_content(v)
+
+
+class WallChangesQuerySchema(colander.Schema):
+    since = colander.SchemaNode(
+        colander.Int(),
+        title=_("Sequence number of the last sync"),
+        missing=colander.drop,
+    )
+
+
+class WallChangesAPISchema(ResourceAPISchema):
+    querystring = WallChangesQuerySchema()
+
+
+@resource(path='/api/1/walls/{rid}/changes',
+          cors_origins=('*',),
+          tags=['Walls'],
+          factory='kedja.root_factory')
+class WallChangesAPIView(ResourceAPIBase):
+    type_name = 'Wall'
+
+    @view(schema=WallChangesAPISchema(), validators=(colander_validator, validators.VIEW_RESOURCE))
+    def get(self):
+        """ Get everything that changed within the wall after the sequence number 'since'.
+
+            Fetch this without 'since' before loading the wall content, and use the returned 'seq'
+            for the next request. If 'reset' is true, the changes can't be synced and the client
+            must reload the whole wall.
+
+            Changed resources and relations are returned with their current data.
+        """
+        wall = self.base_get(self.request.matchdict['rid'], type_name='Wall')
+        if wall:
+            changes = wall.changes
+            results = {
+                'seq': 0 if changes is None else changes.seq,
+                'reset': True,
+                'resources': {},
+                'removed': [],
+                'relations': [],
+                'removed_relations': [],
+            }
+            since = self.request.params.get('since', None)
+            if since is None or changes is None:
+                return results
+            changed = changes.changed_since(int(since))
+            if changed is None:
+                return results
+            results['reset'] = False
+            rid_map = self.root.rid_map
+            for (rid, removed) in changed[RESOURCE].items():
+                resource = None
+                if not removed:
+                    resource = rid_map.get_resource(rid)
+                if resource is None or find_interface(resource, IWall) is not wall:
+                    results['removed'].append(rid)
+                else:
+                    results['resources'][rid] = resource
+            relations_map = wall.relations_map
+            for (relation_id, removed) in changed[RELATION].items():
+                relation = None
+                if not removed:
+                    relation = relations_map.get_as_json(relation_id)
+                if relation is None:
+                    results['removed_relations'].append(relation_id)
+                else:
+                    results['relations'].append(relation)
+            return results
+
+
+class WallSearchQuerySchema(colander.Schema):
+    text = colander.SchemaNode(
+        colander.String(),
+        title=_("Words in the title. Each word matches the beginning of words."),
+        missing=colander.drop,
+    )
+    int_indicator = colander.SchemaNode(
+        colander.Int(),
+        title=_("Cards with exactly this indicator value"),
+        missing=colander.drop,
+    )
+    int_indicator_min = colander.SchemaNode(
+        colander.Int(),
+        title=_("Cards with at least this indicator value"),
+        missing=colander.drop,
+    )
+    int_indicator_max = colander.SchemaNode(
+        colander.Int(),
+        title=_("Cards with at most this indicator value"),
+        missing=colander.drop,
+    )
+
+
+class WallSearchAPISchema(ResourceAPISchema):
+    querystring = WallSearchQuerySchema()
+
+
+@resource(path='/api/1/walls/{rid}/search',
+          cors_origins=('*',),
+          tags=['Walls'],
+          factory='kedja.root_factory')
+class WallSearchAPIView(ResourceAPIBase):
+    type_name = 'Wall'
+
+    @view(schema=WallSearchAPISchema(), validators=(colander_validator, validators.VIEW_RESOURCE))
+    def get(self):
+        """ Find cards and collections within the wall. Returns a sorted list of the rids that match all criteria.
+        """
+        wall = self.base_get(self.request.matchdict['rid'], type_name='Wall')
+        if wall:
+            params = self.request.params
+            kwargs = {}
+            for name in ('int_indicator', 'int_indicator_min', 'int_indicator_max'):
+                if name in params:
+                    kwargs[name] = int(params[name])
+            if wall.catalog is None:
+                # Not indexed yet, see scripts/migrate_wall_catalog.py
+                return []
+            return list(wall.catalog.search(text=params.get('text', None), **kwargs))
 
 
 class WallACLSchema(colander.Schema):
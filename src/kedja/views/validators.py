@@ -21,3 +21,4 @@ ADD_WALL = HasPermissionType(permissions.ADD, rget='get_root', type_name='Wall')
 ADD_COLLECTION = HasPermissionType(permissions.ADD, type_name='Collection')
 ADD_CARD = HasPermissionType(permissions.ADD, type_name='Card')
 ADD_TEMPLATE = HasPermissionType(permissions.MANAGE_TEMPLATES, rget='get_root')
+VIEW_STATUS = HasPermissionType(permissions.VIEW_STATUS, rget='get_root')